@@ -8,8 +8,9 @@ import importlib
 import sys
 import os 
 import time
+import numpy as np
 
-t = 1 # Delay seconds for the demo. 
+t = 1 # Delay seconds for the demo. 0 turns the delays and viewport redraws off (see straviz_batch.py).
 
 
 # Get the path to the directory containing the script
@@ -20,8 +21,37 @@ if script_dir not in sys.path:
     sys.path.append(script_dir)
 
 # Now you can import helpers
+import material_library as materials
+importlib.reload(materials)
 import helpers as hp
 importlib.reload(hp)
+import run_loader as loader
+importlib.reload(loader)
+import run_track
+importlib.reload(run_track)
+from run_track import RunTrack
+import run_scaling
+importlib.reload(run_scaling)
+import run_geometry as geom
+importlib.reload(geom)
+import run_filters
+importlib.reload(run_filters)
+import geometry_cache
+importlib.reload(geometry_cache)
+import pipeline_trace
+importlib.reload(pipeline_trace)
+import run_binary
+importlib.reload(run_binary)
+import run_import
+importlib.reload(run_import)
+import run_composite
+importlib.reload(run_composite)
+import run_lod
+importlib.reload(run_lod)
+import run_live
+importlib.reload(run_live)
+import scene_data
+importlib.reload(scene_data)
 
 ### Global Variables
 txt_name = "myRun!"
@@ -30,49 +60,643 @@ z_scale = 0.02              # bigger makes it taller. 0.01 is 'real' scale.
 extrusion_base_z = 0        # Calculated at run time
 extrusion_base_xy = 0.5     # Bigger makes it wider
 obj_max= 300                # The max size (x or y) a run could theoretically be.
+scaling_strategy = 'linear' # How the run footprint is fitted to the platform (see run_scaling.py):
+                            # 'linear' maps obj_max to 100, 'log1p' and 'power' make the larger side 100.
+scaling_exponent = 0.92     # Exponent of the 'power' strategy.
+light_mode = 'attribute'    # 'attribute': pace drives emission in the glass, no light objects.
+                            # 'extremes': real lights at the fastest/slowest points, capped by max_pace_lights.
+                            # 'per_point': one real light per track point (slow on long runs).
+max_pace_lights = 32        # Light budget for light_mode 'extremes'.
+pace_attribute = "pace_glow" # Name of the per-vertex pace attribute driving the glass emission: 1 at the
+                            # slowest point, 0 at the fastest, so meshes without it do not glow.
+geometry_mode = 'operators' # 'operators': curve -> convert -> extrude -> boolean, as in the video.
+                            # 'data': the same steps on bpy.data and bmesh (see scene_data.py), no UI context needed.
+                            # 'kernel': build the finished solid with run_geometry (no bpy.ops, much faster).
+kernel_resolution = 12      # Bezier samples per segment in 'kernel' mode (the curve's resolution_u).
+smooth_window = None        # Causal Savitzky-Golay filter over this many points on x/y and altitude, right after
+                            # loading (see run_filters.smooth_track). None keeps the recorded noise.
+smooth_degree = 2           # Polynomial degree of that filter.
+gain_threshold = None       # Elevation gain only counts climbs bigger than this many metres (hysteresis), so
+                            # barometer jitter adds nothing. None sums every rise, as calculate_altitude_gain.
+resample_points = None      # Resample the track to this many points along its length. None keeps the watch samples.
+resample_spacing = None     # Or resample every this many model units (used when resample_points is None).
+resample_method = 'linear'  # 'linear' or 'cubic' interpolation of the resampled attributes.
+simplify_tolerance = None   # Max path deviation in model units when simplifying the track. None keeps every point.
+simplify_method = 'rdp'     # 'rdp' (Ramer-Douglas-Peucker) or 'visvalingam' (Visvalingam-Whyatt).
+cache_dir = None            # Directory for cached run geometry (see geometry_cache.py). None turns the cache off.
+cache_max_mb = 512          # The cache evicts least recently used runs beyond this size.
+trace_path = None           # Base path for per-stage timings: writes <trace_path>.json and <trace_path>.trace.json
+                            # (Chrome trace events). None turns tracing off. Set t = 0 so the demo delays don't count.
+trace_memory = True         # Record Python memory with tracemalloc while tracing (slows Python code down).
+composite_layout = 'overlay' # main_composite: 'overlay' stacks every run in one shared frame, 'grid' gives each run a cell.
+composite_max_points = 2000 # Simplify each run of a composite to at most this many points. None keeps every point.
+composite_max_vertices = 1_000_000 # Runs are merged into meshes of at most this many vertices.
+density_radius = None       # main_composite: walls get wider where more runs passed within this distance
+                            # (normalized units, see route_density.py). None keeps the HR widths.
+density_mode = 'replace'    # 'replace' the HR widths with the route density, or 'modulate' them by it.
+lod_budgets = None          # Triangle budgets of decimated viewport proxies, e.g. (20_000, 100_000), smallest first.
+                            # None builds only the full mesh. Renders always use the full mesh (see run_lod.py).
+lod_viewport_level = 0      # Index into lod_budgets of the proxy the viewport shows.
+live_poll_seconds = 1.0     # main_live: how often the live file is checked for new points.
+live_rebuild_seconds = 30.0 # main_live: the run solid is rebuilt at most this often...
+live_rebuild_points = 5     # ...and only once this many new points arrived (always at the end of the run).
+material_library_path = None # .blend to append the materials from (see material_library.py). None builds them from the specs.
+
+tracer = pipeline_trace.NULL_TRACER # Set by main() when trace_path is set.
+geometry_caches = {} # One GeometryCache per cache_dir, so its hit and miss counts add up over builds.
 
 
 run_file = os.path.join(script_dir, "myRun.json")
 
-def main():
-    sun_light = bpy.data.lights.new(name="sun", type='SUN')
-    sun_object = bpy.data.objects.new(name="sun", object_data=sun_light)
-    bpy.context.collection.objects.link(sun_object)
+def main(run_path=None):
+    """
+    Builds the run model in the current scene.
+
+    Parameters:
+        run_path (str): Run file to build. Defaults to run_file.
+
+    Returns:
+        bpy.types.Object: The finished run object.
+    """
+    global tracer
+    run_path = run_path or run_file
+    tracer = (pipeline_trace.Tracer(counter=scene_counts, trace_memory=trace_memory)
+              if trace_path else pipeline_trace.NULL_TRACER)
+    try:
+        with tracer.stage("main", run=os.path.basename(run_path)):
+            curve_object = build_scene(run_path)
+    finally:
+        if trace_path:
+            tracer.metadata = {"name": os.path.basename(run_path), "run": run_path,
+                               "blender": bpy.app.version_string, "settings": geometry_parameters()}
+            tracer.write(trace_path)
+            tracer.close()
+            print(tracer.summary())
+            print(f"Wrote pipeline trace to {trace_path}.json and {trace_path}.trace.json")
+        tracer = pipeline_trace.NULL_TRACER
+    return curve_object
+
+def main_data(run_path=None):
+    """
+    main() without any UI context: no operators, selection, active object or window redraws,
+    only bpy.data, bmesh and explicit object references (see scene_data.py). This is what the
+    batch builds use. geometry_mode 'operators' is built as 'data'; 'kernel' stays as it is.
+
+    Returns:
+        bpy.types.Object: The finished run object.
+    """
+    global geometry_mode, t
+    settings = geometry_mode, t
+    geometry_mode = 'data' if geometry_mode == 'operators' else geometry_mode
+    t = 0 # The demo delays only make sense with a window
+    try:
+        return main(run_path)
+    finally:
+        geometry_mode, t = settings
+
+def geometry_cache_for(directory):
+    """Returns the GeometryCache of directory, created on first use and sized by cache_max_mb."""
+    cache = geometry_caches.get(directory)
+    if cache is None:
+        cache = geometry_caches[directory] = geometry_cache.GeometryCache(directory)
+    cache.max_bytes = cache_max_mb * 2 ** 20
+    return cache
+
+def build_scene(run_path):
+    """
+    The body of main: run object (from the cache or built), text, platform and materials.
+    Every step is a named stage of the pipeline trace.
+    """
+    with tracer.stage("sun"):
+        sun_light = bpy.data.lights.new(name="sun", type='SUN')
+        sun_object = scene_data.link(bpy.data.objects.new(name="sun", object_data=sun_light))
+
+    # Light objects are not cached, so only the attribute light mode can be served from the cache.
+    use_cache = cache_dir is not None and light_mode == 'attribute'
+    with tracer.stage("cache_lookup"):
+        cache = geometry_cache_for(cache_dir) if use_cache else None
+        cache_key = cache.key(run_path, geometry_parameters()) if cache else None
+        cached = cache.get(cache_key) if cache else None
+
+    if cached is not None:
+        # Same run file and geometry settings as an earlier build: skip straight to text and materials.
+        with tracer.stage("cache_load"):
+            curve_object = run_object_from_arrays(cached)
+        ttl_distance, ttl_gain, avg_pace = (cached["stats"][name] for name in ("ttl_distance", "ttl_gain", "avg_pace"))
+        print(f"Loaded run geometry from cache ({cache})")
+    else:
+        with tracer.stage("build_run"):
+            curve_object, ttl_distance, ttl_gain, avg_pace = build_run(run_path)
+        if cache:
+            with tracer.stage("cache_store"):
+                cache.put(cache_key, **run_object_arrays(curve_object),
+                          stats={"ttl_distance": ttl_distance, "ttl_gain": ttl_gain, "avg_pace": avg_pace})
+            print(f"Stored run geometry in cache ({cache})")
+
+    # Generate the text for the platform: 
+
+    txt_location = (-45.9648, 43.706, 2.5) # curve_object.location.copy()
+    
+    #txt_location[1] -= 4
+    with tracer.stage("text"):
+        text_obj = create_extruded_text(
+        name=txt_name,
+        distance=ttl_distance,
+        gain=ttl_gain,
+        pace=avg_pace,
+        extrusion_depth=0.2,
+        scale=(4, 4, 4),
+        location=txt_location
+        )
+
+    scene_data.remove_object(sun_object) # remove sun
+
+    sleep_update(t)
+    with tracer.stage("text_material"):
+        materials.use_library(material_library_path)
+        hp.assign_text_material(text_obj)
+    sleep_update(t)
+    with tracer.stage("platform"):
+        platform_obj = add_platform()
+    sleep_update(t)
+    with tracer.stage("platform_material"):
+        hp.assign_platform_material(platform_obj)
+    sleep_update(t)
+    with tracer.stage("glass_material"):
+        hp.assign_glass_material(obj=curve_object, ior=1.45, roughness=0.01,
+                                 pace_attribute=pace_attribute if light_mode == 'attribute' else None)
+    sleep_update(t)
+    if lod_budgets:
+        with tracer.stage("lods", budgets=list(lod_budgets)):
+            add_run_lods(curve_object, cache, run_path)
+        sleep_update(t)
+    return curve_object
+
+def main_composite(run_paths):
+    """
+    Builds many runs onto one platform (see run_composite.py).
+
+    The run solids are merged into as few meshes as composite_max_vertices allows, each with
+    the pace attribute and a per-vertex "run_index" attribute. Text, platform and materials are
+    created once, and the pace is shown with the glass emission only (no light objects), so the
+    object count stays at a handful however many runs there are.
+
+    Parameters:
+        run_paths (list of str): Run files to merge, in any format process_run_file reads.
+
+    Returns:
+        list of bpy.types.Object: The merged run mesh objects.
+    """
+    global tracer
+    tracer = (pipeline_trace.Tracer(counter=scene_counts, trace_memory=trace_memory)
+              if trace_path else pipeline_trace.NULL_TRACER)
+    try:
+        with tracer.stage("main_composite", runs=len(run_paths)):
+            run_objects = build_composite_scene(run_paths)
+    finally:
+        if trace_path:
+            tracer.metadata = {"name": f"{len(run_paths)} runs", "runs": list(run_paths),
+                               "blender": bpy.app.version_string, "settings": geometry_parameters()}
+            tracer.write(trace_path)
+            tracer.close()
+            print(tracer.summary())
+            print(f"Wrote pipeline trace to {trace_path}.json and {trace_path}.trace.json")
+        tracer = pipeline_trace.NULL_TRACER
+    return run_objects
+
+def build_composite_scene(run_paths):
+    """The body of main_composite: merged run meshes, then one text, platform and set of materials."""
+    with tracer.stage("composite_solids", runs=len(run_paths)):
+        composite = run_composite.build_composite(
+            run_paths, lambda path: process_run_file(path, z_scale),
+            layout=composite_layout, half_width=extrusion_base_xy, resolution=kernel_resolution,
+            max_points=composite_max_points, obj_max=obj_max, scale_max=100,
+            density_radius=density_radius, density_mode=density_mode)
+    print(f"Merged {len(composite)} of {len(run_paths)} runs into {len(composite.vertices)} vertices")
+
+    run_objects = []
+    for i, chunk in enumerate(composite.chunks(composite_max_vertices)):
+        with tracer.stage("mesh", runs=len(chunk), vertices=len(chunk.vertices), faces=len(chunk.faces)):
+            mesh = mesh_from_arrays(f"CompositeMesh_{i}", chunk.vertices, chunk.faces)
+            for name, values, attribute_type in ((pace_attribute, pace_glow(chunk.pace).astype(np.float32), 'FLOAT'),
+                                                 ("run_index", chunk.run_index, 'INT')):
+                attribute = mesh.attributes.new(name=name, type=attribute_type, domain='POINT')
+                attribute.data.foreach_set("value", values)
+            run_object = bpy.data.objects.new(name=f"MyRuns_{i}", object_data=mesh)
+            bpy.context.scene.collection.objects.link(run_object)
+        run_objects.append(run_object)
+        sleep_update(t)
+
+    with tracer.stage("text"):
+        text_obj = create_extruded_text(
+        name=f"{txt_name} ({len(composite)} runs)",
+        distance=composite.ttl_distance,
+        gain=composite.ttl_gain,
+        pace=composite.avg_pace,
+        extrusion_depth=0.2,
+        scale=(4, 4, 4),
+        location=(-45.9648, 43.706, 2.5)
+        )
+    sleep_update(t)
+    with tracer.stage("text_material"):
+        materials.use_library(material_library_path)
+        hp.assign_text_material(text_obj)
+    with tracer.stage("platform"):
+        platform_obj = add_platform()
+    with tracer.stage("platform_material"):
+        hp.assign_platform_material(platform_obj)
+    with tracer.stage("glass_material"):
+        # One Glass_Material shared by every merged mesh.
+        for run_object in run_objects:
+            hp.assign_glass_material(obj=run_object, ior=1.45, roughness=0.01, pace_attribute=pace_attribute)
+    sleep_update(t)
+    if lod_budgets:
+        with tracer.stage("lods", budgets=list(lod_budgets)):
+            for run_object in run_objects:
+                add_run_lods(run_object)
+        sleep_update(t)
+    return run_objects
+
+live_state = None # Set by main_live while a live run is followed, see live_step.
+
+def main_live(stream_path, blocking=None):
+    """
+    Follows a run while it happens: a JSON-lines file that grows by one line per point (see
+    run_live.py). Every check appends only the new points to the spline (positions, handles
+    and HR radii) and updates the text from running totals. The glass solid with the pace
+    attribute is rebuilt from all points on a throttled schedule (live_rebuild_seconds,
+    live_rebuild_points), and once more when the run ends.
+
+    Parameters:
+        stream_path (str): The JSON-lines live file. It does not have to exist yet.
+        blocking (bool): Poll in a loop until the run ends instead of with a Blender timer.
+                         Defaults to True in background mode, where timers do not run.
+    """
+    global live_state
+    live_stop()
+    blocking = bpy.app.background if blocking is None else blocking
+
+    curve_data = bpy.data.curves.new(name="LiveCurveData", type='CURVE')
+    curve_data.dimensions = '3D'
+    curve_data.fill_mode = 'FULL'
+    curve_data.extrude = extrusion_base_xy
+    curve_data.use_fill_caps = True
+    curve_data.splines.new(type='BEZIER')
+    curve_object = bpy.data.objects.new(name="MyRunLive", object_data=curve_data)
+    curve_object.rotation_euler = (1.57, 0, 0)
+    bpy.context.scene.collection.objects.link(curve_object)
+    hp.assign_glass_material(obj=curve_object, ior=1.45, roughness=0.01)
+
+    text_obj = create_extruded_text(name=txt_name, distance=0, gain=0, pace=0, extrusion_depth=0.2,
+                                    scale=(4, 4, 4), location=(-45.9648, 43.706, 2.5))
+    materials.use_library(material_library_path)
+    hp.assign_text_material(text_obj)
+    hp.assign_platform_material(add_platform())
+
+    # Names, not references: Blender may reallocate the data between timer calls.
+    live_state = {
+        "tail": run_live.JsonLinesTail(stream_path),
+        "run": run_live.LiveRun(z_scale, gain_threshold=gain_threshold),
+        "throttle": run_live.Throttle(live_rebuild_seconds, live_rebuild_points),
+        "curve_object": curve_object.name,
+        "text_object": text_obj.name,
+        "solid_object": None,
+    }
+    print(f"Following live run {stream_path}")
+    if blocking:
+        while not live_step():
+            time.sleep(live_poll_seconds)
+        live_stop()
+    else:
+        bpy.app.timers.register(_live_timer, first_interval=0)
+
+def live_step():
+    """
+    One check of the live file: extends the curve and text with the new points and rebuilds
+    the solid when the throttle allows it.
+
+    Returns:
+        bool: True once the run has ended.
+    """
+    tail, run = live_state["tail"], live_state["run"]
+    records = tail.read()
+    curve_object = bpy.data.objects[live_state["curve_object"]]
+    if tail.restarted:
+        # The file was started over: drop the points so far.
+        tail.restarted = False
+        run = live_state["run"] = run_live.LiveRun(z_scale, gain_threshold=gain_threshold)
+        live_state["throttle"] = run_live.Throttle(live_rebuild_seconds, live_rebuild_points)
+        curve_object.data.splines.clear()
+        curve_object.data.splines.new(type='BEZIER')
+
+    start, stop = run.extend(records)
+    if stop > start:
+        extend_live_curve(curve_object.data.splines[0], run.points[:stop], run.hr[:stop], start)
+        text_obj = bpy.data.objects[live_state["text_object"]]
+        text_obj.data.body = run_text(txt_name, run.ttl_distance, run.total_gain, run.avg_pace)
+
+    throttle = live_state["throttle"]
+    if len(run) >= 2 and throttle.due(len(run), run.done):
+        rebuild_live_solid(run.track(), curve_object)
+        throttle.mark(len(run))
+    return run.done
+
+def live_stop():
+    """Stops following the live run (the scene is kept)."""
+    global live_state
+    if bpy.app.timers.is_registered(_live_timer):
+        bpy.app.timers.unregister(_live_timer)
+    if live_state is not None:
+        print(f"Stopped following live run {live_state['tail'].path}: {live_state['run']}")
+    live_state = None
+
+def _live_timer():
+    if live_state is None:
+        return None
+    if live_step():
+        live_stop()
+        return None
+    return live_poll_seconds
+
+def extend_live_curve(spline, points, widths, start):
+    """
+    Appends points[start:] to a Bezier spline that holds points[:start].
+
+    Only the new points are written, plus the neighbours whose AUTO handles or radius depend on
+    them: the previous point's handles, and point 0's radius (it looks forward to point 1).
+
+    :param spline: The live Bezier spline.
+    :param points: (N, 3) array of all points so far, in (x, z, y) order.
+    :param widths: (N,) HR widths of all points so far.
+    :param start: Number of points already in the spline.
+    """
+    stop = len(points)
+    bezier_points = spline.bezier_points
+    if stop > len(bezier_points):
+        bezier_points.add(stop - len(bezier_points))  # A new spline already has one point
+
+    # Handles of point i depend on i - 1 and i + 1, radii on i - 1 (point 0 on point 1).
+    lo = max(start - 2, 0)
+    co = points[lo:stop]
+    handle_left, handle_right = geom.bezier_auto_handles(co)
+    radii = geom.curve_point_radii(co, widths[lo:stop])
+    for i in range(max(start - 1, 0), stop):
+        point = bezier_points[i]
+        j = i - lo
+        if i >= start:
+            point.co = co[j]
+        point.handle_left = handle_left[j]
+        point.handle_right = handle_right[j]
+        if i >= start or i == 0:
+            point.radius = radii[j]
+
+def rebuild_live_solid(track, curve_object):
+    """
+    Rebuilds the live run solid from all points so far with run_geometry, replacing the mesh
+    of the previous rebuild. The solid and the live curve get the same centring and resize as
+    object transforms, so the points added later line up without touching the old ones.
+    """
+    with tracer.stage("live_solid", points=len(track)):
+        vertices, faces, params = geom.build_run_solid(track.points, track.hr, half_width=extrusion_base_xy,
+                                                       resolution=kernel_resolution, center=False)
+        center, factors = geom.footprint_transform(vertices, obj_max=obj_max, scale_max=100)
+        mesh = mesh_from_arrays("LiveRunMesh", vertices, faces)
+        ring_pace = np.interp(params, np.arange(len(track)), pace_glow(normalize_paces(track.pace)))
+        attribute = mesh.attributes.new(name=pace_attribute, type='FLOAT', domain='POINT')
+        attribute.data.foreach_set("value", np.repeat(ring_pace, 4).astype(np.float32))
+
+        name = live_state["solid_object"]
+        solid = bpy.data.objects.get(name) if name else None
+        if solid is None:
+            solid = bpy.data.objects.new(name="MyRun", object_data=mesh)
+            bpy.context.scene.collection.objects.link(solid)
+            live_state["solid_object"] = solid.name
+        else:
+            old_mesh = solid.data
+            solid.data = mesh
+            bpy.data.meshes.remove(old_mesh)
+        hp.assign_glass_material(obj=solid, ior=1.45, roughness=0.01, pace_attribute=pace_attribute)
+
+        offset = -center * factors
+        solid.location = (offset[0], offset[1], 0)
+        solid.scale = (factors[0], factors[1], 1)
+        # The curve is rotated: its local (x, z, y) axes are world (x, -y, z).
+        curve_object.location = (offset[0], offset[1], geom.LIFT)
+        curve_object.scale = (factors[0], 1, factors[1])
+    print(f"Rebuilt live run solid from {len(track)} points")
+
+def build_run(run_path):
+    """
+    Parses a run file and builds its solid.
 
+    Returns:
+        tuple: (run object, total distance, elevation gain, average pace)
+    """
     # First read the file and extract the variables 
-    result = process_run_file(run_file, z_scale)
-    starting_coordinates = result["starting_coordinates"]
+    with tracer.stage("parse"):
+        result = process_run_file(run_path, z_scale)
     ttl_distance = result["ttl_distance"]
     points = result["points"]
-    hr_widths = result["hr_widths"]
-    real_distances = result["real_distances"]
-    paces = result["paces"]
-    avg_pace = 1 / (sum(paces) / len(paces))
-    altitudes = result["altitudes"]
-    ttl_gain = calculate_altitude_gain(altitudes)
-    extrusion_distance = get_highest_point(points) * -2
+    track = RunTrack.from_run(result, z_scale) # Array view of the run for the statistics
+    if smooth_window is not None:
+        # Filtered before the statistics, so the gain and highest point come from the smoothed altitude.
+        with tracer.stage("smooth", points=len(track)):
+            track = run_filters.smooth_track(track, window=smooth_window, degree=smooth_degree)
+    with tracer.stage("statistics", points=len(points)):
+        avg_pace = track.avg_pace
+        ttl_gain = (track.total_gain if gain_threshold is None
+                    else run_filters.hysteresis_gain(track.altitude, gain_threshold))
+        extrusion_distance = track.highest_point * -2
+
+    # Statistics above come from every point; the geometry only needs the resampled/simplified path.
+    if resample_points is not None or resample_spacing is not None:
+        point_count = len(track)
+        with tracer.stage("resample", points=point_count):
+            track = run_filters.resample_track(track, n_points=resample_points, spacing=resample_spacing,
+                                               method=resample_method)
+        print(f"Resampled {point_count} -> {len(track)} points")
+    if simplify_tolerance is not None:
+        with tracer.stage("simplify", points=len(track)):
+            track, report = run_filters.simplify_track(track, simplify_tolerance, method=simplify_method)
+        print(report)
+    points, hr_widths, paces = track.points, track.hr, track.pace
     
+    with tracer.stage("geometry", mode=geometry_mode, points=len(track)):
+        if geometry_mode == 'kernel':
+            curve_object = build_run_object_kernel(track)
+        else:
+            build_run_object = build_run_object_data if geometry_mode == 'data' else build_run_object_operators
+            with tracer.stage("fit"):
+                # The curve's outline is the track plus each point's wall half-width, so the
+                # fit is known before any geometry exists.
+                margin = extrusion_base_xy * geom.curve_point_radii(points, hr_widths)
+                fit = scaling_fit(geom.track_to_world(points), margin=margin)
+            curve_object = build_run_object(points, hr_widths, paces, extrusion_distance, fit)
+
+    return curve_object, ttl_distance, ttl_gain, avg_pace
+
+
+def scene_counts():
+    """
+    Totals sampled at every stage boundary of the pipeline trace: objects, mesh vertices and
+    faces, and curve control points. Reads only collection lengths, so it stays cheap.
+    """
+    return {
+        "objects": len(bpy.data.objects),
+        "vertices": sum(len(mesh.vertices) for mesh in bpy.data.meshes),
+        "faces": sum(len(mesh.polygons) for mesh in bpy.data.meshes),
+        "curve_points": sum(len(spline.bezier_points) + len(spline.points)
+                            for curve in bpy.data.curves for spline in curve.splines),
+    }
+
+
+def geometry_parameters():
+    """Every setting that changes the run geometry, for the geometry cache key."""
+    return {
+        "z_scale": z_scale,
+        "extrusion_base_xy": extrusion_base_xy,
+        "obj_max": obj_max,
+        "scale_max": 100,  # as passed to hp.resize_object
+        "scaling": [scaling_strategy, scaling_exponent],
+        "geometry_mode": geometry_mode,
+        "kernel_resolution": kernel_resolution,
+        "light_mode": light_mode,
+        # The cached mesh stores the pace values under this name, which the glass shader reads.
+        "pace_attribute": pace_attribute,
+        "smooth": [smooth_window, smooth_degree, gain_threshold],
+        "resample": [resample_points, resample_spacing, resample_method],
+        "simplify": [simplify_tolerance, simplify_method],
+    }
+
+
+def run_object_arrays(obj, mesh=None):
+    """
+    Reads a finished run mesh back into arrays for the geometry cache, in world space so the
+    cached object needs no transform. Includes the pace attribute when there is one.
+    mesh defaults to the object's own; pass a LOD mesh of the object to store that instead.
+    """
+    mesh = mesh or obj.data
+    vertices = np.empty(len(mesh.vertices) * 3, dtype=np.float32)
+    mesh.vertices.foreach_get("co", vertices)
+    matrix = np.array(obj.matrix_world, dtype=np.float64)
+    vertices = vertices.reshape(-1, 3) @ matrix[:3, :3].T + matrix[:3, 3]
+
+    corners = np.empty(len(mesh.loops), dtype=np.int32)
+    mesh.loops.foreach_get("vertex_index", corners)
+    face_sizes = np.empty(len(mesh.polygons), dtype=np.int32)
+    mesh.polygons.foreach_get("loop_total", face_sizes)
+
+    attributes = {}
+    attribute = mesh.attributes.get(pace_attribute)
+    if attribute is not None and attribute.domain == 'POINT':
+        values = np.empty(len(mesh.vertices), dtype=np.float32)
+        attribute.data.foreach_get("value", values)
+        attributes[pace_attribute] = values
+    return {"vertices": vertices, "corners": corners, "face_sizes": face_sizes, "attributes": attributes}
+
+
+def run_object_from_arrays(arrays):
+    """Creates the run object from arrays stored by run_object_arrays."""
+    mesh = mesh_from_cached_arrays("RunMesh", arrays)
+    run_object = bpy.data.objects.new(name="MyRun", object_data=mesh)
+    bpy.context.scene.collection.objects.link(run_object)
+    return run_object
+
+
+def mesh_from_cached_arrays(name, arrays):
+    """Creates a mesh, with its attributes, from arrays stored by run_object_arrays."""
+    mesh = mesh_from_polygons(name, arrays["vertices"], arrays["corners"], arrays["face_sizes"])
+    for attribute_name, values in arrays["attributes"].items():
+        attribute = mesh.attributes.new(name=attribute_name, type='FLOAT', domain='POINT')
+        attribute.data.foreach_set("value", np.ascontiguousarray(values, dtype=np.float32))
+    return mesh
+
+
+def add_run_lods(run_object, cache=None, run_path=None):
+    """
+    Builds a decimated proxy mesh for every budget in lod_budgets and shows lod_viewport_level
+    in the viewport (see run_lod.py). With a geometry cache, each level is stored under its own
+    key, so a rebuild loads the proxies instead of decimating again.
+
+    Parameters:
+        run_object (bpy.types.Object): The finished run object, materials already assigned.
+        cache (geometry_cache.GeometryCache): Cache for the proxies, or None.
+        run_path (str): Run file the object was built from (for the cache key).
+    """
+    proxies = []
+    for budget in sorted(lod_budgets):
+        key = cache.key(run_path, {**geometry_parameters(), "lod_triangles": budget}) if cache else None
+        cached = cache.get(key) if cache else None
+        name = f"{run_object.data.name}_LOD{budget}"
+        if cached is not None:
+            # Cached vertices are in world space; a freshly built run object may still carry a transform.
+            inverse = np.linalg.inv(np.array(run_object.matrix_world, dtype=np.float64))
+            cached["vertices"] = cached["vertices"] @ inverse[:3, :3].T + inverse[:3, 3]
+            proxy = mesh_from_cached_arrays(name, cached)
+        else:
+            proxy = run_lod.decimated_mesh(run_object, budget, name)
+            if cache:
+                cache.put(key, **run_object_arrays(run_object, proxy))
+        proxies.append(proxy)
+    run_lod.attach_lods(run_object, proxies, lod_viewport_level)
+    run_lod.register_handlers()
+
+
+def scaling_fit(xy, margin=0.0):
+    """
+    Fits a footprint to the platform with scaling_strategy.
+
+    Parameters:
+        xy (np.ndarray): (N, 2+) world coordinates of the footprint.
+        margin (float): Added around their bounding box.
+
+    Returns:
+        run_scaling.Fit: Centre and per-axis factors of the footprint.
+    """
+    params = run_scaling.strategy_params(scaling_strategy, obj_max=obj_max, scale_max=100,
+                                         exponent=scaling_exponent)
+    return run_scaling.fit(xy, scaling_strategy, margin=margin, **params)
+
+
+def build_run_object_operators(points, hr_widths, paces, extrusion_distance, fit):
+    """
+    Builds the run solid with the original operator chain: Bezier curve, convert to mesh,
+    edit-mode extrude, then a boolean cut at the platform top. Centring and resizing are the
+    object transform from `fit`, so no operator has to touch the finished mesh for them.
+
+    Parameters:
+        fit (run_scaling.Fit): Fit of the track's footprint (see scaling_fit).
+
+    Returns:
+        bpy.types.Object: The run mesh object.
+    """
     # Create a curve for the run  
-    curve_data = bpy.data.curves.new(name="RunCurveData", type='CURVE')
-    curve_data.dimensions = '3D'  # Set the curve to be 3D
-    curve_object = bpy.data.objects.new(name="MyRun", object_data=curve_data)
-    bpy.context.scene.collection.objects.link(curve_object) # add it to the scene
+    with tracer.stage("curve"):
+        curve_data = bpy.data.curves.new(name="RunCurveData", type='CURVE')
+        curve_data.dimensions = '3D'  # Set the curve to be 3D
+        curve_object = bpy.data.objects.new(name="MyRun", object_data=curve_data)
+        bpy.context.scene.collection.objects.link(curve_object) # add it to the scene
 
 
-    spline = curve_data.splines.new(type='BEZIER') # Spline connects the points
+        spline = curve_data.splines.new(type='BEZIER') # Spline connects the points
     
     # Add point lights anchored to the curve 
-    add_point_lights_with_anchor(curve_object=curve_object, 
-                                 points=points, 
-                                 paces=paces, 
-                                 min_brightness=10, 
-                                 max_brightness=100)
+    with tracer.stage("lights", mode=light_mode):
+        if light_mode == 'per_point':
+            add_point_lights_with_anchor(curve_object=curve_object, 
+                                         points=points, 
+                                         paces=paces, 
+                                         min_brightness=10, 
+                                         max_brightness=100)
+        elif light_mode == 'extremes':
+            add_pace_extreme_lights(curve_object=curve_object,
+                                    points=points,
+                                    paces=paces,
+                                    max_lights=max_pace_lights,
+                                    min_brightness=10,
+                                    max_brightness=100)
 
     sleep_update(t)
-    # Z and Y are switched because of the extrusion thing
-    # These are the point locations in the coordinate space
-    spline.bezier_points.add(len(points)-1)
-    
     curve_object.data.fill_mode = 'FULL'
     sleep_update(t)
     curve_object.data.extrude = extrusion_base_xy
@@ -80,9 +704,10 @@ def main():
     curve_object.rotation_euler = (1.57, 0, 0) # Rotate the curve 
 
     sleep_update(t)
-    generate_curve_from_points(spline, points)  # Make the curve
-    sleep_update(t)
-    set_curve_point_radiuses(spline, hr_widths) # Apply HR to width
+    # Z and Y are switched because of the extrusion thing
+    # These are the point locations in the coordinate space
+    with tracer.stage("curve_points"):
+        build_curve_bulk(spline, points, hr_widths) # Make the curve and apply HR to width
     
     sleep_update(t)
     # Set the curve object as the active object
@@ -94,65 +719,203 @@ def main():
     sleep_update(t)
     
     # Convert the curve to a mesh
-    bpy.ops.object.convert(target='MESH')
+    resolution_u = curve_data.resolution_u # Needed to map mesh rings back to track points
+    with tracer.stage("convert"):
+        bpy.ops.object.convert(target='MESH')
     sleep_update(t)
-    bpy.ops.object.shade_flat() 
+    with tracer.stage("shade_flat"):
+        bpy.ops.object.shade_flat() 
+    if light_mode == 'attribute':
+        # Extrude and boolean carry the attribute along, so write it once here.
+        with tracer.stage("pace_attribute"):
+            add_pace_attribute(curve_object, paces, resolution_u, name=pace_attribute)
     #curve_object.scale = (xy_scale, 1,  xy_scale)
     sleep_update(t)
     
 
     # Extrude the mesh
-    bpy.ops.object.editmode_toggle()
+    with tracer.stage("extrude"):
+        bpy.ops.object.editmode_toggle()
+        sleep_update(t)
+        bpy.ops.mesh.select_all(action='SELECT')
+        sleep_update(t)
+        extrude_mesh(extrusion_distance)
+        sleep_update(t)
+        bpy.ops.object.editmode_toggle() 
     sleep_update(t)
-    bpy.ops.mesh.select_all(action='SELECT')
-    sleep_update(t)
-    extrude_mesh(extrusion_distance)
-    sleep_update(t)
-    bpy.ops.object.editmode_toggle() 
-    sleep_update(t)
-    # Move the run to the center of the platform.
-    adjust_object_position(curve_object)
-    sleep_update(t)
-    # Log scale the X,Y dimensions to fit in the platform.
-    # hp.log_scale_run_object(obj=curve_object, max_size=100)
-    #hp.scale_object_xz_non_linear(obj=curve_object, max_size=100, min_size=1, exponent=0.92)
-    hp.resize_object(obj=curve_object, obj_max=obj_max, scale_max=100)
+    # Move the run to the center of the platform, 3 up, and fit its X,Y dimensions to the platform.
+    # The curve is rotated: its local (x, z) axes are world (x, -y), hence the scale order.
+    with tracer.stage("position"):
+        offset = fit.offset
+        curve_object.location = (offset[0], offset[1], 300 / 100.0)
+        curve_object.scale = (fit.factors[0], 1, fit.factors[1])
     sleep_update(t)
     # Create a cube to remove the bottom extrusion
-    boolean_cube = add_boolean_cube()
-    sleep_update(t)
-    apply_boolean_difference(curve_object, boolean_cube)
-    sleep_update(t)
-    delete_object_by_name("Boolean_Cube") # Remove the cube after using it
+    with tracer.stage("boolean"):
+        boolean_cube = add_boolean_cube()
+        sleep_update(t)
+        apply_boolean_difference(curve_object, boolean_cube)
+        sleep_update(t)
+        delete_object_by_name("Boolean_Cube") # Remove the cube after using it
     sleep_update(t)
 
-    
-    # Generate the text for the platform: 
+    return curve_object
 
-    txt_location = (-45.9648, 43.706, 2.5) # curve_object.location.copy()
-    
-    #txt_location[1] -= 4
-    text_obj = create_extruded_text(
-    name=txt_name,
-    distance=ttl_distance,
-    gain=ttl_gain,
-    pace=avg_pace,
-    extrusion_depth=0.2,
-    scale=(4, 4, 4),
-    location=txt_location
-    )
 
-    bpy.data.objects.remove(sun_object, do_unlink=True) # remove sun
+def build_run_object_data(points, hr_widths, paces, extrusion_distance, fit):
+    """
+    The steps of build_run_object_operators on the data API (see scene_data.py): the curve is
+    converted from its evaluated mesh, extruded with bmesh and cut with an evaluated boolean
+    modifier. Nothing reads the selection, the active object or a window.
+
+    Parameters:
+        fit (run_scaling.Fit): Fit of the track's footprint (see scaling_fit).
 
+    Returns:
+        bpy.types.Object: The run mesh object.
+    """
+    with tracer.stage("curve"):
+        curve_data = bpy.data.curves.new(name="RunCurveData", type='CURVE')
+        curve_data.dimensions = '3D'
+        curve_data.fill_mode = 'FULL'
+        curve_data.extrude = extrusion_base_xy
+        curve_data.use_fill_caps = True # Make it solid
+        spline = curve_data.splines.new(type='BEZIER')
+        curve_object = scene_data.link(bpy.data.objects.new(name="MyRun", object_data=curve_data))
+        curve_object.rotation_euler = (1.57, 0, 0) # Rotate the curve
+
+    with tracer.stage("lights", mode=light_mode):
+        if light_mode == 'per_point':
+            add_point_lights_with_anchor(curve_object=curve_object, points=points, paces=paces,
+                                         min_brightness=10, max_brightness=100)
+        elif light_mode == 'extremes':
+            add_pace_extreme_lights(curve_object=curve_object, points=points, paces=paces,
+                                    max_lights=max_pace_lights, min_brightness=10, max_brightness=100)
+
+    with tracer.stage("curve_points"):
+        build_curve_bulk(spline, points, hr_widths) # Make the curve and apply HR to width
+
+    resolution_u = curve_data.resolution_u # Needed to map mesh rings back to track points
+    with tracer.stage("convert"):
+        run_object = scene_data.curve_to_mesh(curve_object) # The lights move over to the mesh object
+    with tracer.stage("shade_flat"):
+        scene_data.shade_flat(run_object.data)
+    if light_mode == 'attribute':
+        with tracer.stage("pace_attribute"):
+            add_pace_attribute(run_object, paces, resolution_u, name=pace_attribute)
+
+    with tracer.stage("extrude"):
+        # extrude_mesh moves along the global Z axis; the mesh is in the rotated curve's space.
+        scene_data.extrude_region(run_object.data, scene_data.local_direction(run_object, (0, 0, extrusion_distance)))
+    with tracer.stage("position"):
+        offset = fit.offset
+        run_object.location = (offset[0], offset[1], 300 / 100.0)
+        run_object.scale = (fit.factors[0], 1, fit.factors[1])
+    with tracer.stage("boolean"):
+        boolean_cube = add_boolean_cube()
+        apply_boolean_difference(run_object, boolean_cube)
+        scene_data.remove_object(boolean_cube) # Remove the cube after using it
+    return run_object
+
+
+def build_run_object_kernel(track):
+    """
+    Builds the run solid from run_geometry arrays and loads it with bulk foreach_set calls.
+    Skips the curve convert, extrude, origin_set, resize and boolean operators entirely:
+    the vertices are fitted to the platform with scaling_fit before the mesh exists.
+
+    Parameters:
+        track (RunTrack): The parsed run.
+
+    Returns:
+        bpy.types.Object: The run mesh object, already centred and scaled on the platform.
+    """
+    with tracer.stage("kernel_solid"):
+        vertices, faces, params = geom.build_run_solid(track.points, track.hr,
+                                                       half_width=extrusion_base_xy,
+                                                       resolution=kernel_resolution, center=False)
+        vertices = scaling_fit(vertices).apply(vertices)
+
+    with tracer.stage("mesh", vertices=len(vertices), faces=len(faces)):
+        mesh = mesh_from_arrays("RunMesh", vertices, faces)
+        run_object = bpy.data.objects.new(name="MyRun", object_data=mesh)
+        bpy.context.scene.collection.objects.link(run_object)
     sleep_update(t)
-    hp.assign_text_material(text_obj)
-    sleep_update(t)
-    platform_obj = add_platform()
-    sleep_update(t)
-    hp.assign_platform_material(platform_obj)
-    sleep_update(t)
-    hp.assign_glass_material(obj=curve_object, ior=1.45, roughness=0.01)
-    sleep_update(t)
+
+    with tracer.stage("pace_attribute" if light_mode == 'attribute' else "lights", mode=light_mode):
+        add_kernel_pace(run_object, track, vertices, params)
+    return run_object
+
+
+def add_kernel_pace(run_object, track, vertices, params):
+    """
+    Pace display for a kernel-built run: the emission attribute or the light objects,
+    depending on light_mode.
+    """
+    mesh = run_object.data
+    if light_mode == 'attribute':
+        # Every vertex ring belongs to one sample, so the pace maps across exactly.
+        ring_pace = np.interp(params, np.arange(len(track)), pace_glow(normalize_paces(track.pace)))
+        attribute = mesh.attributes.new(name=pace_attribute, type='FLOAT', domain='POINT')
+        attribute.data.foreach_set("value", np.repeat(ring_pace, 4).astype(np.float32))
+    elif light_mode in ('per_point', 'extremes'):
+        # Lights sit on the top centre line of the wall, below it by 0.1 on the world Z axis.
+        rings = vertices.reshape(-1, 4, 3)
+        centre_line = (rings[:, 0] + rings[:, 1]) / 2
+        at_points = np.rint(params) == params
+        light_points = [tuple(point) for point in centre_line[at_points]]
+        add_lights = add_point_lights_with_anchor if light_mode == 'per_point' else add_pace_extreme_lights
+        kwargs = {"max_lights": max_pace_lights} if light_mode == 'extremes' else {}
+        add_lights(curve_object=run_object, points=light_points, paces=track.pace,
+                   min_brightness=10, max_brightness=100, drop_axis=2, **kwargs)
+
+
+def mesh_from_arrays(name, vertices, faces):
+    """
+    Creates a mesh data-block from vertex and face arrays with bulk foreach_set calls.
+
+    Parameters:
+        name (str): Name of the new mesh.
+        vertices (np.ndarray): (V, 3) vertex positions.
+        faces (np.ndarray): (F, k) vertex indices, all faces with the same corner count k.
+
+    Returns:
+        bpy.types.Mesh: The new mesh.
+    """
+    faces = np.asarray(faces)
+    return mesh_from_polygons(name, vertices, faces.ravel(), np.full(len(faces), faces.shape[1]))
+
+
+def mesh_from_polygons(name, vertices, corners, face_sizes):
+    """
+    Creates a mesh data-block from flat polygon data with bulk foreach_set calls.
+
+    Parameters:
+        name (str): Name of the new mesh.
+        vertices (np.ndarray): (V, 3) vertex positions.
+        corners (np.ndarray): Vertex index of every face corner, face after face.
+        face_sizes (np.ndarray): Number of corners of each face.
+
+    Returns:
+        bpy.types.Mesh: The new mesh.
+    """
+    vertices = np.ascontiguousarray(vertices, dtype=np.float32)
+    corners = np.ascontiguousarray(corners, dtype=np.int32)
+    face_sizes = np.ascontiguousarray(face_sizes, dtype=np.int32)
+
+    mesh = bpy.data.meshes.new(name)
+    mesh.vertices.add(len(vertices))
+    mesh.vertices.foreach_set("co", vertices.ravel())
+    mesh.loops.add(len(corners))
+    mesh.loops.foreach_set("vertex_index", corners)
+    mesh.polygons.add(len(face_sizes))
+    mesh.polygons.foreach_set("loop_start", (np.cumsum(face_sizes) - face_sizes).astype(np.int32))
+    if bpy.app.version < (4, 0, 0):
+        # Blender 4 derives the polygon sizes from loop_start and made loop_total read-only.
+        mesh.polygons.foreach_set("loop_total", face_sizes)
+    mesh.update(calc_edges=True)
+    return mesh
+
 
 def set_curve_point_radius(curve_object, point_index, new_radius):
     """
@@ -181,6 +944,42 @@ def generate_curve_from_points(spline, points):
         bez_point.handle_left_type = 'AUTO'
         bez_point.handle_right_type = 'AUTO'
 
+def build_curve_bulk(spline, points, widths):
+    """
+    Fills a Bezier spline with all points, handles and HR radii in a handful of foreach_set calls.
+
+    Does the work of generate_curve_from_points + set_curve_point_radiuses without touching
+    the points one by one. Handle positions are computed to match AUTO handles (see
+    run_geometry.bezier_auto_handles) because foreach_set cannot write enum properties such
+    as handle_left_type; the handles are stored as plain positions instead.
+
+    :param spline: A Bezier spline. Missing points are added, so a new spline can be passed.
+    :param points: Sequence of (x, z, y) points or an (N, 3) array.
+    :param widths: List of widths based on HR.
+    """
+    co = run_track.as_point_array(points)
+    if len(widths) != len(co):
+        raise ValueError("The number of widths must match the number of points in the curve.")
+
+    bezier_points = spline.bezier_points
+    missing = len(co) - len(bezier_points)
+    if missing < 0:
+        raise ValueError("The spline already has more points than the run.")
+    if missing:
+        bezier_points.add(missing)
+
+    # Blender stores curve data as float32; handing it float32 buffers avoids a conversion pass.
+    co32 = co.astype(np.float32)
+    handle_left, handle_right = geom.bezier_auto_handles(co32)
+    radii = geom.curve_point_radii(co32, widths)
+
+    bezier_points.foreach_set("co", co32.ravel())
+    bezier_points.foreach_set("handle_left", handle_left.astype(np.float32).ravel())
+    bezier_points.foreach_set("handle_right", handle_right.astype(np.float32).ravel())
+    bezier_points.foreach_set("radius", radii.astype(np.float32))
+    print(f"Built curve with {len(co)} points")
+
+
 def extrude_mesh(distance=extrusion_base_z):
     """
     Extrude the active mesh along the Z-axis by the specified distance.
@@ -239,23 +1038,9 @@ def add_boolean_cube(name="Boolean_Cube"):
     Parameters:
         name (str): The name to assign to the cube.
     """
-    # Deselect all objects
-    bpy.ops.object.select_all(action='DESELECT')
-
-    # Add a cube to the scene
-    bpy.ops.mesh.primitive_cube_add(location=(0, 0, 0))
-
-    # Ensure the newly added cube is selected and active
-    cube = bpy.context.object  # The newly added cube is automatically the active object
-
-    # Name the cube
-    cube.name = name
-
-    # Set the cube's scale to 5,000 in each direction (Blender's cube has a default size of 2x2x2)
-    cube.scale[0] = 50  # Scale X
-    cube.scale[1] = 50  # Scale Y
-    cube.scale[2] = 50  # Scale Z
-    cube.location.z = -4750 / 100  # Adjust location
+    # Blender's cube has a default size of 2x2x2, so scale 50 in each direction.
+    # Its top ends at the platform top (2.5).
+    cube = scene_data.add_cube(name, scale=(50, 50, 50), location=(0, 0, -4750 / 100))
 
     print(f"Added cube '{cube.name}' with dimensions: {10_000} x {10_000} x {10_000}")
     return cube
@@ -268,64 +1053,35 @@ def add_platform(name="Platform"):
     Parameters:
         name (str): The name to assign to the platform.
     """
-    # Deselect all objects
-    bpy.ops.object.select_all(action='DESELECT')
-
-    # Add a cube to the scene
-    bpy.ops.mesh.primitive_cube_add(location=(0, 0, 0))
-
-    # Ensure the newly added cube is selected and active
-    cube = bpy.context.object  # The newly added cube is automatically the active object
-
-    # Name the cube
-    cube.name = name
-
-    # Set the cube's scale (Blender's cube has a default size of 2x2x2)
-    cube.scale[0] = 50  # Scale X to 5,000 (10,000/2)
-    cube.scale[1] = 50  # Scale Y to 5,000 (10,000/2)
-    cube.scale[2] = 2.5  # Scale Z to 250 (500/2)
+    # Blender's cube has a default size of 2x2x2: scale X and Y to 5,000 (10,000/2), Z to 250 (500/2)
+    cube = scene_data.add_cube(name, scale=(50, 50, 2.5))
 
     print(f"Added platform '{cube.name}' with dimensions: {10_000} x {10_000} x {500}")
     return cube
 
-def process_run_file(json_file_path, z_scale):
-    with open(json_file_path, 'r') as file:
-        data = json.load(file)
+def process_run_file(json_file_path, z_scale, streaming=True):
+    """
+    Reads a run file and returns its header values and per-point data.
 
-    # Extract top-level variables
-    starting_coordinates = data["startingCoordinates"]
-    starting_latitude = starting_coordinates["latitude"]
-    starting_longitude = starting_coordinates["longitude"]
-    ttl_distance = data["ttlDistance"]
-    
-    # Extract normalized points data
-    norm_points = data["normPoints"]
-    points = []
-    hr_widths = []
-    real_distances = []
-    paces = []
-    altitudes = []
-
-    for entry in norm_points:
-        x = entry["coordinates"]["x"] / 100
-        y = entry["coordinates"]["y"] / 100
-        z = entry["altitudeFromZero"] * z_scale
-        
-        points.append((x, z, y))  # (x, z, y) format
-        hr_widths.append(entry["HR"])
-        real_distances.append(entry["realDistance"])
-        paces.append(entry["pace"])
-        altitudes.append(entry["altitudeFromZero"])
+    Parameters:
+        json_file_path (str): Path to the run JSON file, or a binary .svrun file (see
+                              run_binary), which is detected from its first bytes and memory-mapped.
+                              .gpx, .tcx and .fit files are imported with run_import.
+        z_scale (float): Multiplier applied to the altitude for the point z value.
+        streaming (bool): Read normPoints into typed columns, streamed for large files (see
+                          run_loader.load_run_columns). False uses the original json.load + lists loader.
 
-    return {
-        "starting_coordinates": (starting_latitude, starting_longitude),
-        "ttl_distance": ttl_distance,
-        "points": points,
-        "hr_widths": hr_widths,
-        "real_distances": real_distances,
-        "paces": paces,
-        "altitudes": altitudes
-    }
+    Returns:
+        dict: starting_coordinates, ttl_distance, points (x, z, y), hr_widths,
+              real_distances, paces and altitudes.
+    """
+    if os.path.splitext(json_file_path)[1].lower() in run_import.ACTIVITY_SUFFIXES:
+        return run_import.load_activity(json_file_path, z_scale)
+    if streaming:
+        return run_binary.load_run(json_file_path, z_scale)
+    if run_binary.is_binary_run(json_file_path):
+        return run_binary.load_run_binary(json_file_path, z_scale)
+    return loader.load_run_json(json_file_path, z_scale)
 
 
 # Highest point in the Z axis, used to determine the extrusion distance
@@ -397,11 +1153,12 @@ def apply_boolean_difference(target_obj, operand_obj):
     if not (target_obj and operand_obj):
         raise ValueError("Both target and operand objects must be provided.")
 
-    # Ensure the objects are in the same collection
-    if operand_obj.name not in bpy.context.scene.collection.objects:
-        bpy.context.scene.collection.objects.link(operand_obj)
-    if target_obj.name not in bpy.context.scene.collection.objects:
-        bpy.context.scene.collection.objects.link(target_obj)
+    # Ensure the objects are in the scene, so the depsgraph evaluates them
+    scene_objects = bpy.context.scene.collection.objects
+    if operand_obj.name not in scene_objects:
+        scene_objects.link(operand_obj)
+    if target_obj.name not in scene_objects:
+        scene_objects.link(target_obj)
 
     # Add the boolean modifier to the target object
     bool_mod = target_obj.modifiers.new(name="Boolean_Difference", type='BOOLEAN')
@@ -409,9 +1166,8 @@ def apply_boolean_difference(target_obj, operand_obj):
     bool_mod.operation = 'DIFFERENCE'  # Set the operation to 'Difference'
     bool_mod.solver = 'FAST'  # Set the solver to 'Fast'
 
-    # Apply the modifier
-    bpy.context.view_layer.objects.active = target_obj
-    bpy.ops.object.modifier_apply(modifier=bool_mod.name)
+    # Apply the modifier: the evaluated mesh replaces the object's data
+    scene_data.apply_modifier(target_obj, bool_mod)
 
     print(f"Applied boolean difference using '{operand_obj.name}' on '{target_obj.name}'.")
 
@@ -433,27 +1189,19 @@ def create_extruded_text(name, distance, gain, pace, extrusion_depth=0.2, scale=
         bpy.types.Object: The created text object.
     """
     # Combine the values into a formatted string with line breaks
-    text = f"{name}\nTotal Distance: {distance:.2f}km\nElevation Gain: {gain}m\nAvg. Pace: {pace:.1f}min/km"
-    
-    # Create a new text object
-    bpy.ops.object.text_add(location=location)
-    text_obj = bpy.context.object
-    
-    # Set the text content
-    text_obj.data.body = text
-    
-    # Adjust extrusion depth
-    text_obj.data.extrude = extrusion_depth
-    
-    # Set text alignment to justify
-    text_obj.data.align_x = 'JUSTIFY'  # Options: 'LEFT', 'CENTER', 'RIGHT', 'JUSTIFY'
-    
-    # Set the scale
-    text_obj.scale = scale
-    text_obj.location.z = 250 / 100 # Move up along Z-axis
+    text = run_text(name, distance, gain, pace)
+
+    # Create the text object, justified (options: 'LEFT', 'CENTER', 'RIGHT', 'JUSTIFY') and
+    # moved up along the Z-axis onto the platform
+    text_obj = scene_data.add_text(text, location=(location[0], location[1], 250 / 100), scale=scale,
+                                   extrude=extrusion_depth, align_x='JUSTIFY')
 
     return text_obj
 
+def run_text(name, distance, gain, pace):
+    """The platform text: name, total distance, elevation gain and average pace on separate lines."""
+    return f"{name}\nTotal Distance: {distance:.2f}km\nElevation Gain: {gain:.0f}m\nAvg. Pace: {pace:.1f}min/km"
+
 def delete_object_by_name(object_name):
     """
     Deletes an object by its name.
@@ -463,15 +1211,8 @@ def delete_object_by_name(object_name):
     """
     obj = bpy.data.objects.get(object_name)
     if obj:
-        # Deselect all objects to avoid issues
-        bpy.ops.object.select_all(action='DESELECT')
-
-        # Select the object to be deleted
-        obj.select_set(True)
-        bpy.context.view_layer.objects.active = obj
-
-        # Delete the object
-        bpy.ops.object.delete()
+        # Delete the object, and its data if nothing else uses it
+        scene_data.remove_object(obj)
 
         print(f"Deleted object: {object_name}")
     else:
@@ -514,7 +1255,7 @@ def set_curve_point_radiuses(spline, widths):
         print(f"Point {i}: Adjusted radius to {current_point.radius}")
 
 
-def add_point_lights_with_anchor(curve_object, points, paces, min_brightness=10, max_brightness=1000):
+def add_point_lights_with_anchor(curve_object, points, paces, min_brightness=10, max_brightness=1000, drop_axis=1):
     """
     Adds point lights at positions along the curve, anchoring them to the curve object.
     Brightness is controlled by the paces variable.
@@ -525,6 +1266,7 @@ def add_point_lights_with_anchor(curve_object, points, paces, min_brightness=10,
         paces (list of float): List of paces corresponding to each point.
         min_brightness (float): Minimum brightness value for the lights.
         max_brightness (float): Maximum brightness value for the lights.
+        drop_axis (int): Local axis along which the lights are moved 0.1 down (1 on the rotated curve).
     """
     if len(points) != len(paces):
         raise ValueError("The number of points and paces must match.")
@@ -545,26 +1287,113 @@ def add_point_lights_with_anchor(curve_object, points, paces, min_brightness=10,
 
         # Convert point tuple to a list to modify it
         location = list(point)
-        location[1] -= .1
+        location[drop_axis] -= .1
 
-        # Add a point light at the modified location
-        bpy.ops.object.light_add(type='POINT', location=location)
-        light = bpy.context.object  # Get the created light object
-        light.name = f"Point_Light_{i}"
-        light.data.energy = brightness  # Set the brightness of the light
-
-        # Parent the light to the curve object
-        light.parent = curve_object
+        # Add a point light at the modified location, parented to the curve object
+        scene_data.add_point_light(f"Point_Light_{i}", location, brightness, parent=curve_object)
 
         print(f"Added light at {location} with brightness {brightness:.2f}, anchored to {curve_object.name}")
 
 
+def normalize_paces(paces):
+    """
+    Maps paces to 0-1 (slowest to fastest value). All-equal paces map to 0.
+    """
+    paces = np.asarray(paces, dtype=np.float64)
+    pace_range = paces.max() - paces.min()
+    if pace_range == 0:
+        return np.zeros_like(paces)
+    return (paces - paces.min()) / pace_range
+
+
+def pace_glow(normalized):
+    """
+    Values of the pace_attribute driving the glass emission, from normalized paces: 1 - normalized,
+    so the slowest points glow most and a mesh without the attribute (read as 0) stays dark.
+    """
+    return 1.0 - np.asarray(normalized, dtype=np.float64)
+
+
+def add_pace_attribute(obj, paces, resolution_u, name="pace_glow"):
+    """
+    Writes the pace glow (see pace_glow) as a float attribute on every vertex of a converted run mesh.
+
+    Curve-to-mesh conversion emits the vertices ring by ring along the spline, with
+    resolution_u rings per Bezier segment, so a vertex's position in the vertex list gives
+    its parameter along the track. Pace is interpolated linearly between track points.
+
+    Parameters:
+        obj (bpy.types.Object): The run mesh object, straight after the curve convert.
+        paces (list of float): Pace for each track point.
+        resolution_u (int): resolution_u of the curve the mesh was converted from.
+        name (str): Name of the attribute to write.
+    """
+    mesh = obj.data
+    glow = pace_glow(normalize_paces(paces))
+    n_vertices = len(mesh.vertices)
+    if n_vertices == 0:
+        return
+
+    rings = max((len(glow) - 1) * resolution_u + 1, 1)
+    ring_index = np.minimum(np.arange(n_vertices) * rings // n_vertices, rings - 1)
+    values = np.interp(ring_index / resolution_u, np.arange(len(glow)), glow)
+
+    attribute = mesh.attributes.get(name)
+    if attribute is None:
+        attribute = mesh.attributes.new(name=name, type='FLOAT', domain='POINT')
+    attribute.data.foreach_set("value", values.astype(np.float32))
+    print(f"Wrote pace attribute '{name}' to {n_vertices} vertices of {obj.name}")
+
+
+def add_pace_extreme_lights(curve_object, points, paces, max_lights=32, min_brightness=10, max_brightness=1000, drop_axis=1):
+    """
+    Adds at most max_lights point lights, half at the fastest and half at the slowest points
+    of the run. Brightness follows the same pace mapping as add_point_lights_with_anchor.
+
+    Parameters:
+        curve_object (bpy.types.Object): The curve object to which lights will be anchored.
+        points (list of tuple): List of 3D points (x, y, z).
+        paces (list of float): List of paces corresponding to each point.
+        max_lights (int): Maximum number of lights to create.
+        min_brightness (float): Minimum brightness value for the lights.
+        max_brightness (float): Maximum brightness value for the lights.
+        drop_axis (int): Local axis along which the lights are moved 0.1 down (1 on the rotated curve).
+
+    Returns:
+        list of bpy.types.Object: The created light objects.
+    """
+    if len(points) != len(paces):
+        raise ValueError("The number of points and paces must match.")
+
+    normalized = normalize_paces(paces)
+    order = np.argsort(normalized, kind="stable")
+    if len(order) > max_lights:
+        slow = max_lights // 2
+        order = np.concatenate((order[:slow], order[len(order) - (max_lights - slow):]))
+
+    lights = []
+    for i in np.sort(order):
+        brightness = max_brightness - (normalized[i] * (max_brightness - min_brightness))
+        location = list(points[i])
+        location[drop_axis] -= .1
+
+        # Data API instead of light_add, so no operator or active object is involved
+        lights.append(scene_data.add_point_light(f"Point_Light_{i}", location, brightness, parent=curve_object))
+
+    print(f"Added {len(lights)} pace lights anchored to {curve_object.name}")
+    return lights
+
+
 def sleep_update(t):
     """
     Refresh the viewport and sleep so that the demo looks cool.
+    Does nothing when t is 0 or Blender runs in the background (there is no window to redraw).
     """
+    if t <= 0 or bpy.app.background:
+        return
     bpy.context.view_layer.update()
     bpy.ops.wm.redraw_timer(type='DRAW_WIN_SWAP', iterations=1)
     time.sleep(t)
 
-main() 
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,235 @@
+# Spreads a queue of run files across several background Blender processes.
+#
+#   python batch_scheduler.py runs/ -o models/ -j 16
+#   python batch_scheduler.py runs/ -o models/ -j 4 --worker-cmd "python benchmarks/stub_worker.py {runs} -o {output_dir}"
+#
+# Each job is one worker process (by default `blender -b -P straviz_batch.py`) that builds
+# --chunk-size runs. Jobs that crash, exit non-zero or run past --timeout are killed and
+# retried. Worker output is merged into one stream, each line prefixed with its job.
+# Plain Python: the scheduler itself never imports bpy.
+
+import argparse
+import glob
+import os
+import shlex
+import signal
+import subprocess
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+script_dir = os.path.dirname(os.path.abspath(__file__))
+
+RUN_SUFFIXES = (".json", ".svrun", ".gpx", ".tcx", ".fit")  # Files picked up from input directories
+# --python-exit-code: Blender exits with 0 even when the script raises, which would mark the job done.
+DEFAULT_WORKER_CMD = "{blender} -b --factory-startup --python-exit-code 1 -P {script} -- {runs} -o {output_dir}"
+
+
+class Job:
+    """One worker invocation: the runs it builds, and how each attempt went."""
+    __slots__ = ("index", "runs", "attempts", "returncode", "seconds", "timed_out")
+
+    def __init__(self, index, runs):
+        self.index = index
+        self.runs = runs
+        self.attempts = 0
+        self.returncode = None
+        self.seconds = 0.0
+        self.timed_out = False
+
+    @property
+    def ok(self):
+        return self.returncode == 0
+
+
+def run_files_in(directory):
+    """The run and activity files directly inside directory, matching RUN_SUFFIXES in any case (.FIT too)."""
+    return [os.path.join(directory, name) for name in os.listdir(directory)
+            if os.path.splitext(name)[1].lower() in RUN_SUFFIXES]
+
+
+def expand_runs(inputs):
+    """Files, directories (every run file inside, see RUN_SUFFIXES) and glob patterns -> sorted run paths."""
+    paths = []
+    for item in inputs:
+        if os.path.isdir(item):
+            paths.extend(run_files_in(item))
+        elif glob.has_magic(item):
+            paths.extend(glob.glob(item))
+        else:
+            paths.append(item)
+    return sorted(set(os.path.abspath(path) for path in paths))
+
+
+def build_command(template, runs, output_dir, job_index, blender="blender"):
+    """
+    Turns a worker command template into an argv list.
+
+    {runs} expands to one argument per run file; {output_dir}, {job}, {blender} and
+    {script} are substituted inside arguments.
+    """
+    argv = []
+    for token in shlex.split(template):
+        if token == "{runs}":
+            argv.extend(runs)
+        else:
+            argv.append(token.format(output_dir=output_dir, job=job_index, blender=blender,
+                                     script=os.path.join(script_dir, "straviz_batch.py"),
+                                     runs=" ".join(runs)))
+    return argv
+
+
+class Scheduler:
+    """
+    Runs jobs on a fixed number of concurrent worker processes.
+
+    Parameters:
+        template (str): Worker command template (see build_command).
+        output_dir (str): Passed to the workers as {output_dir}.
+        workers (int): Number of worker processes running at once.
+        timeout (float): Seconds before a job's process is killed. None waits forever.
+        retries (int): Extra attempts for a job whose process failed, crashed or timed out.
+        blender (str): Blender executable for the default template.
+        out (file): Where merged progress is written.
+
+    Subclasses can override command() to build other worker command lines from a job, and
+    `unit` names what a job's items are in the progress lines.
+    """
+    unit = "runs"
+
+    def __init__(self, template, output_dir, workers, timeout=None, retries=1, blender="blender", out=sys.stdout):
+        self.template = template
+        self.output_dir = output_dir
+        self.workers = workers
+        self.timeout = timeout
+        self.retries = retries
+        self.blender = blender
+        self.out = out
+        self._lock = threading.Lock()
+        self._finished = 0
+        self._total = 0
+
+    def log(self, prefix, message):
+        with self._lock:
+            self.out.write(f"{prefix} {message}\n")
+            self.out.flush()
+
+    def command(self, job):
+        """The argv of a job's worker process."""
+        return build_command(self.template, job.runs, self.output_dir, job.index, self.blender)
+
+    def _attempt(self, job):
+        """Runs one attempt of a job. Returns (returncode, seconds, timed_out)."""
+        argv = self.command(job)
+        prefix = f"[job {job.index} try {job.attempts}]"
+        start = time.perf_counter()
+        # A new session lets a timeout kill Blender together with anything it spawned.
+        process = subprocess.Popen(argv, stdout=subprocess.PIPE, stderr=subprocess.STDOUT,
+                                   text=True, bufsize=1, start_new_session=(os.name == "posix"))
+        timed_out = threading.Event()
+
+        def kill():
+            timed_out.set()
+            try:
+                if os.name == "posix":
+                    os.killpg(process.pid, signal.SIGKILL)
+                else:
+                    process.kill()
+            except ProcessLookupError:
+                pass
+
+        timer = threading.Timer(self.timeout, kill) if self.timeout else None
+        if timer:
+            timer.start()
+        try:
+            for line in process.stdout:
+                self.log(prefix, line.rstrip("\n"))
+            returncode = process.wait()
+        finally:
+            if timer:
+                timer.cancel()
+        return returncode, time.perf_counter() - start, timed_out.is_set()
+
+    def _run(self, job):
+        while job.attempts <= self.retries:
+            job.attempts += 1
+            try:
+                job.returncode, seconds, job.timed_out = self._attempt(job)
+            except OSError as error:
+                self.log(f"[job {job.index}]", f"could not start worker: {error}")
+                job.returncode, seconds, job.timed_out = -1, 0.0, False
+            job.seconds += seconds
+            if job.ok:
+                break
+            reason = "timed out" if job.timed_out else f"exited with {job.returncode}"
+            retrying = job.attempts <= self.retries
+            self.log(f"[job {job.index}]", f"{reason} after {seconds:.1f}s" + (", retrying" if retrying else ""))
+
+        with self._lock:
+            self._finished += 1
+            finished = self._finished
+        status = "done" if job.ok else "FAILED"
+        self.log(f"[{finished}/{self._total}]", f"job {job.index} {status} in {job.seconds:.1f}s "
+                                                 f"({len(job.runs)} {self.unit}, {job.attempts} attempts)")
+        return job
+
+    def run(self, jobs):
+        """Runs every job and returns them, in submission order, once all have finished."""
+        self._total = len(jobs)
+        self._finished = 0
+        with ThreadPoolExecutor(max_workers=self.workers) as pool:
+            return list(pool.map(self._run, jobs))
+
+
+def make_jobs(run_paths, chunk_size):
+    return [Job(i, run_paths[start:start + chunk_size])
+            for i, start in enumerate(range(0, len(run_paths), chunk_size), start=1)]
+
+
+def summarize(jobs, wall_seconds, workers, out=sys.stdout, unit="runs"):
+    """Prints totals, throughput and how close the batch got to linear speed-up."""
+    failed = [job for job in jobs if not job.ok]
+    runs = sum(len(job.runs) for job in jobs)
+    busy = sum(job.seconds for job in jobs)
+    out.write(f"\n{runs} {unit} in {len(jobs)} jobs on {workers} workers: {wall_seconds:.1f}s wall, "
+              f"{busy:.1f}s worker time, {runs / wall_seconds if wall_seconds else 0:.2f} {unit}/s\n")
+    if wall_seconds:
+        speedup = busy / wall_seconds
+        out.write(f"Speed-up {speedup:.1f}x ({100 * speedup / workers:.0f}% of linear)\n")
+    for job in failed:
+        out.write(f"FAILED job {job.index}: {', '.join(os.path.basename(str(run)) for run in job.runs)}\n")
+    out.flush()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Build many StraViz runs on parallel Blender workers.")
+    parser.add_argument("inputs", nargs="+", help="Run files, directories or glob patterns.")
+    parser.add_argument("-o", "--output-dir", required=True, help="Directory for the built models.")
+    parser.add_argument("-j", "--workers", type=int, default=os.cpu_count() or 1, help="Concurrent workers.")
+    parser.add_argument("--chunk-size", type=int, default=1,
+                        help="Runs per worker process; more runs amortise Blender start-up but retry together.")
+    parser.add_argument("--timeout", type=float, default=None, help="Seconds before a job is killed.")
+    parser.add_argument("--retries", type=int, default=1, help="Extra attempts for a failed job.")
+    parser.add_argument("--blender", default="blender", help="Blender executable.")
+    parser.add_argument("--worker-cmd", default=DEFAULT_WORKER_CMD,
+                        help="Worker command template with {runs}, {output_dir}, {job}, {blender}, {script}.")
+    args = parser.parse_args(argv)
+
+    run_paths = expand_runs(args.inputs)
+    if not run_paths:
+        print("Nothing to build.")
+        return 1
+    os.makedirs(args.output_dir, exist_ok=True)
+
+    jobs = make_jobs(run_paths, max(args.chunk_size, 1))
+    scheduler = Scheduler(args.worker_cmd, args.output_dir, args.workers, timeout=args.timeout,
+                          retries=args.retries, blender=args.blender)
+    start = time.perf_counter()
+    jobs = scheduler.run(jobs)
+    summarize(jobs, time.perf_counter() - start, args.workers)
+    return 0 if all(job.ok for job in jobs) else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
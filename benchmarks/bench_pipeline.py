@@ -0,0 +1,228 @@
+# Scaling benchmark for the StraViz pipeline functions, runnable without Blender.
+#
+# Usage:
+#   python benchmarks/bench_pipeline.py                               (100 to 100,000 points)
+#   python benchmarks/bench_pipeline.py --points 1000 --points 1000000 --json results.json
+#   python benchmarks/bench_pipeline.py --baseline results.json       (exit 1 on a regression)
+#
+# Synthetic runs come from synthetic_runs.py and Blender is replaced by fake_bpy.py, so the
+# timings cover the Python work in each function, not Blender's own (C) work. For every
+# function it prints the time at each size and the fitted exponent k of time ~ n^k:
+# k near 1 is linear, k near 2 means the function is quadratic in the number of points.
+
+import argparse
+import contextlib
+import gc
+import json
+import math
+import os
+import sys
+import tempfile
+import time
+
+benchmarks_dir = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.dirname(benchmarks_dir))
+
+import fake_bpy
+fake_bpy.install()
+
+import StraViz as sv
+import helpers as hp
+from run_track import RunTrack
+from synthetic_runs import SIZES, synthetic_run_path
+
+Z_SCALE = 0.02
+FIT_FLOOR = 1e-4    # Seconds; faster results are mostly call overhead and are left out of the fit
+NOISE_FLOOR = 1e-3  # Seconds; faster results are too noisy to flag as regressions
+
+
+class Run:
+    """A synthetic run of one size, loaded once and shared by the benchmarks."""
+
+    def __init__(self, path):
+        self.path = path
+        self.result = sv.process_run_file(path, Z_SCALE)
+        self.points = list(self.result["points"])
+        self.altitudes = list(self.result["altitudes"])
+        self.paces = list(self.result["paces"])
+        self.widths = list(self.result["hr_widths"])
+
+    def __len__(self):
+        return len(self.points)
+
+    def run_object(self):
+        """A fresh fake run object sized like the run's bounding box (x, z, y)."""
+        fake_bpy.reset()
+        size = [max(column) - min(column) or 1.0 for column in zip(*self.points)]
+        return fake_bpy.FakeObject("MyRun", type='MESH', size=size)
+
+
+def track_statistics(result):
+    """The NumPy replacement for calculate_altitude_gain, get_highest_point and the pace mean."""
+    track = RunTrack.from_run(result, Z_SCALE)
+    return track.total_gain, track.highest_point, track.avg_pace
+
+
+# Each benchmark takes a Run and returns (function, args); the set-up is not timed.
+BENCHMARKS = {
+    "process_run_file": lambda run: (sv.process_run_file, (run.path, Z_SCALE)),
+    "process_run_file (json.load)": lambda run: (sv.process_run_file, (run.path, Z_SCALE, False)),
+    "calculate_altitude_gain": lambda run: (sv.calculate_altitude_gain, (run.altitudes,)),
+    "get_highest_point": lambda run: (sv.get_highest_point, (run.points,)),
+    "RunTrack statistics": lambda run: (track_statistics, (run.result,)),
+    "set_curve_point_radiuses": lambda run: (sv.set_curve_point_radiuses,
+                                             (fake_bpy.Spline(run.points), run.widths)),
+    "add_point_lights_with_anchor": lambda run: (sv.add_point_lights_with_anchor,
+                                                 (run.run_object(), run.points, run.paces, 10, 100)),
+    "helpers.resize_object": lambda run: (hp.resize_object, (run.run_object(), 300, 100)),
+    "helpers.log_scale_run_object": lambda run: (hp.log_scale_run_object, (run.run_object(), 100)),
+    "helpers.scale_object_xz_non_linear": lambda run: (hp.scale_object_xz_non_linear,
+                                                       (run.run_object(), 100, 1, 0.92)),
+    "StraViz.scaling_fit": lambda run: (sv.scaling_fit, (sv.geom.track_to_world(run.points),)),
+}
+
+
+def time_call(setup, run, repeats):
+    """
+    Best wall time of `repeats` calls, each on freshly set-up arguments, with the functions'
+    console output discarded. Returns (seconds, calls recorded by fake_bpy in one call).
+    """
+    best = float("inf")
+    with open(os.devnull, "w") as devnull:
+        for _ in range(repeats):
+            function, args = setup(run)
+            gc.collect()
+            fake_bpy.calls.reset()
+            with contextlib.redirect_stdout(devnull):
+                start = time.perf_counter()
+                function(*args)
+                best = min(best, time.perf_counter() - start)
+            counts = dict(fake_bpy.calls.counts)
+    return best, counts
+
+
+def scaling_exponent(sizes, seconds):
+    """Least-squares slope of log(seconds) against log(size), over results above FIT_FLOOR."""
+    pairs = [(math.log(n), math.log(s)) for n, s in zip(sizes, seconds) if s is not None and s >= FIT_FLOOR]
+    if len(pairs) < 2:
+        return None
+    mean_x = sum(x for x, _ in pairs) / len(pairs)
+    mean_y = sum(y for _, y in pairs) / len(pairs)
+    spread = sum((x - mean_x) ** 2 for x, _ in pairs)
+    return sum((x - mean_x) * (y - mean_y) for x, y in pairs) / spread if spread else None
+
+
+def run_benchmarks(sizes, names, run_dir, repeats, budget):
+    """
+    Times every benchmark at every size. A benchmark that takes longer than budget seconds
+    at one size is skipped at the larger sizes.
+
+    Returns:
+        dict: {name: {"seconds": [...], "calls": [...], "exponent": k}} with None for skipped sizes.
+    """
+    results = {name: {"seconds": [], "calls": []} for name in names}
+    over_budget = set()
+    for n_points in sizes:
+        run = Run(synthetic_run_path(run_dir, n_points))
+        for name in names:
+            if name in over_budget:
+                seconds, counts = None, None
+            else:
+                seconds, counts = time_call(BENCHMARKS[name], run, repeats)
+                if seconds > budget:
+                    over_budget.add(name)
+            results[name]["seconds"].append(seconds)
+            results[name]["calls"].append(counts)
+        print(f"{n_points} points done", file=sys.stderr)
+    for result in results.values():
+        result["exponent"] = scaling_exponent(sizes, result["seconds"])
+    return results
+
+
+def format_seconds(seconds):
+    if seconds is None:
+        return "skipped"
+    if seconds < 1e-3:
+        return f"{seconds * 1e6:.0f} us"
+    if seconds < 1:
+        return f"{seconds * 1e3:.1f} ms"
+    return f"{seconds:.2f} s"
+
+
+def report(sizes, results):
+    width = max(len(name) for name in results)
+    print(f"{'':<{width}} " + " ".join(f"{n:>10}" for n in sizes) + "   n^k")
+    for name, result in results.items():
+        exponent = result["exponent"]
+        print(f"{name:<{width}} " + " ".join(f"{format_seconds(s):>10}" for s in result["seconds"])
+              + ("     -" if exponent is None else f"  {exponent:4.2f}"))
+
+    print("\nBlender calls per run (fake bpy), at the largest size timed:")
+    for name, result in results.items():
+        timed = [(n, counts) for n, counts in zip(sizes, result["calls"]) if counts is not None]
+        n_points, counts = timed[-1] if timed else (None, None)
+        if counts:
+            listed = ", ".join(f"{call} {count}" for call, count in sorted(counts.items()))
+            print(f"  {name} ({n_points} points): {listed}")
+
+
+def regressions(sizes, results, baseline, max_slowdown):
+    """(name, size, seconds, baseline seconds) for every result slower than max_slowdown x baseline."""
+    found = []
+    for name, result in results.items():
+        previous = baseline.get("results", {}).get(name)
+        if previous is None:
+            continue
+        previous_by_size = dict(zip(baseline["sizes"], previous["seconds"]))
+        for n_points, seconds in zip(sizes, result["seconds"]):
+            before = previous_by_size.get(n_points)
+            if seconds is None or before is None or before < NOISE_FLOOR:
+                continue
+            if seconds > before * max_slowdown:
+                found.append((name, n_points, seconds, before))
+    return found
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Time StraViz functions across run sizes without Blender.")
+    parser.add_argument("--points", type=int, action="append", default=[],
+                        help=f"Run size to time (repeatable). Defaults to {', '.join(map(str, SIZES[:-1]))}.")
+    parser.add_argument("--only", action="append", default=[], choices=sorted(BENCHMARKS),
+                        metavar="NAME", help="Only run this benchmark (repeatable).")
+    parser.add_argument("--repeats", type=int, default=3, help="Timing repeats; the best is kept.")
+    parser.add_argument("--budget", type=float, default=30.0,
+                        help="Skip larger sizes of a benchmark once one call takes longer than this (seconds).")
+    parser.add_argument("--run-dir", default=None, help="Keep the synthetic runs here to reuse them.")
+    parser.add_argument("--json", default=None, help="Write the results to this file.")
+    parser.add_argument("--baseline", default=None, help="Results file of an earlier run to compare against.")
+    parser.add_argument("--max-slowdown", type=float, default=1.5,
+                        help="With --baseline: fail when a result is this many times slower.")
+    args = parser.parse_args(argv)
+
+    sizes = sorted(set(args.points)) or list(SIZES[:-1])
+    names = args.only or list(BENCHMARKS)
+    with contextlib.ExitStack() as stack:
+        run_dir = args.run_dir or stack.enter_context(tempfile.TemporaryDirectory())
+        os.makedirs(run_dir, exist_ok=True)
+        results = run_benchmarks(sizes, names, run_dir, args.repeats, args.budget)
+
+    report(sizes, results)
+    if args.json:
+        with open(args.json, "w") as file:
+            json.dump({"sizes": sizes, "results": results}, file, indent=1)
+
+    if args.baseline:
+        with open(args.baseline) as file:
+            baseline = json.load(file)
+        found = regressions(sizes, results, baseline, args.max_slowdown)
+        for name, n_points, seconds, before in found:
+            print(f"REGRESSION {name} at {n_points} points: {format_seconds(seconds)} "
+                  f"(was {format_seconds(before)})")
+        if found:
+            return 1
+        print(f"No regressions beyond {args.max_slowdown}x against {args.baseline}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,82 @@
+# Memory and time comparison of the eager and streaming run file loaders.
+#
+# Usage:
+#   python benchmarks/compare_loaders.py testRun.json
+#   python benchmarks/compare_loaders.py --points 100000 --points 500000
+#
+# Plain Python only, Blender is not needed.
+
+import argparse
+import gc
+import os
+import sys
+import tempfile
+import time
+import tracemalloc
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import run_loader as loader
+from synthetic_runs import write_synthetic_run
+
+Z_SCALE = 0.02
+
+
+def measure(load, path, repeats):
+    """
+    Returns (best wall seconds, peak traced bytes, bytes still held by the result).
+    """
+    best = float("inf")
+    for _ in range(repeats):
+        gc.collect()
+        start = time.perf_counter()
+        load(path, Z_SCALE)
+        best = min(best, time.perf_counter() - start)
+
+    gc.collect()
+    tracemalloc.start()
+    result = load(path, Z_SCALE)
+    retained, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    del result
+    return best, peak, retained
+
+
+def compare(path, repeats):
+    size = os.path.getsize(path)
+    print(f"{os.path.basename(path)}: {size / 1e6:.2f} MB")
+    rows = []
+    for name, load in (("json.load", loader.load_run_json), ("streaming", loader.load_run_streaming),
+                       ("columns", loader.load_run_columns)):
+        seconds, peak, retained = measure(load, path, repeats)
+        rows.append((name, seconds, peak, retained))
+        print(f"  {name:<10} {seconds * 1000:9.1f} ms   peak {peak / 1e6:8.2f} MB   "
+              f"retained {retained / 1e6:8.2f} MB   peak/file {peak / size:5.2f}x")
+    (_, eager_s, eager_peak, eager_kept), (_, stream_s, stream_peak, stream_kept) = rows[:2]
+    print(f"  streaming: {eager_peak / stream_peak:.1f}x lower peak, {eager_kept / stream_kept:.1f}x less retained, "
+          f"{stream_s / eager_s:.2f}x the time")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Compare the eager and streaming run loaders.")
+    parser.add_argument("paths", nargs="*", help="Run JSON files to load.")
+    parser.add_argument("--points", type=int, action="append", default=[],
+                        help="Also benchmark a synthetic run of this many points (repeatable).")
+    parser.add_argument("--repeats", type=int, default=3, help="Timing repeats per loader.")
+    args = parser.parse_args(argv)
+
+    if not args.paths and not args.points:
+        parser.error("give at least one run file or --points")
+
+    for path in args.paths:
+        compare(path, args.repeats)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        for n_points in args.points:
+            path = os.path.join(tmp, f"synthetic_{n_points}.json")
+            write_synthetic_run(path, n_points)
+            compare(path, args.repeats)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,338 @@
+# A small stand-in for Blender's bpy and mathutils modules, so StraViz code can be imported
+# and timed on a machine without Blender.
+#
+#   import fake_bpy
+#   fake_bpy.install()      # before importing StraViz or helpers
+#   import StraViz as sv
+#   ...
+#   print(fake_bpy.calls.counts)
+#
+# It only models what the benchmarked functions touch: objects with scale/dimensions,
+# Bezier points, lights, the few operators they run and the context they read. Every
+# operator call and data-block creation is counted in `calls`. Nothing is rendered or
+# computed the way Blender would, so timings measure the Python side of each function.
+
+import math
+import sys
+import types
+from collections import Counter
+
+
+class CallLog:
+    """Counts operator calls ("ops.object.light_add") and data-block creations ("data.lights.new")."""
+
+    def __init__(self):
+        self.counts = Counter()
+
+    def record(self, name):
+        self.counts[name] += 1
+
+    def reset(self):
+        self.counts.clear()
+
+    def total(self):
+        return sum(self.counts.values())
+
+
+calls = CallLog()
+
+
+class Vector:
+    """The parts of mathutils.Vector used by StraViz: arithmetic, x/y/z, length, to_2d, normalized."""
+    __slots__ = ("_values",)
+
+    def __init__(self, values=(0.0, 0.0, 0.0)):
+        self._values = [float(v) for v in values]
+
+    def __len__(self):
+        return len(self._values)
+
+    def __iter__(self):
+        return iter(self._values)
+
+    def __getitem__(self, index):
+        return self._values[index]
+
+    def __setitem__(self, index, value):
+        self._values[index] = float(value)
+
+    def __repr__(self):
+        return f"Vector({tuple(self._values)})"
+
+    def __add__(self, other):
+        return Vector(a + b for a, b in zip(self._values, other))
+
+    def __sub__(self, other):
+        return Vector(a - b for a, b in zip(self._values, other))
+
+    def __mul__(self, scalar):
+        return Vector(a * scalar for a in self._values)
+
+    __rmul__ = __mul__
+
+    def _axis(index):
+        return property(lambda self: self._values[index],
+                        lambda self, value: self.__setitem__(index, value))
+
+    x, y, z = _axis(0), _axis(1), _axis(2)
+    del _axis
+
+    @property
+    def length(self):
+        return math.sqrt(sum(a * a for a in self._values))
+
+    def to_2d(self):
+        return Vector(self._values[:2])
+
+    def normalized(self):
+        length = self.length
+        return Vector(a / length for a in self._values) if length else Vector(self._values)
+
+
+class FakeID:
+    """A data-block with a name and custom properties (id["key"])."""
+
+    def __init__(self, name):
+        self.name = name
+        self.properties = {}
+
+    def __getitem__(self, key):
+        return self.properties[key]
+
+    def __setitem__(self, key, value):
+        self.properties[key] = value
+
+    def __contains__(self, key):
+        return key in self.properties
+
+    def get(self, key, default=None):
+        return self.properties.get(key, default)
+
+
+class LightData(FakeID):
+    def __init__(self, name, type='POINT'):
+        super().__init__(name)
+        self.type = type
+        self.energy = 10.0
+
+
+class BezierPoint:
+    __slots__ = ("co", "handle_left", "handle_right", "handle_left_type", "handle_right_type", "radius")
+
+    def __init__(self, co=(0.0, 0.0, 0.0)):
+        self.co = Vector(co)
+        self.handle_left = Vector(co)
+        self.handle_right = Vector(co)
+        self.handle_left_type = self.handle_right_type = 'FREE'
+        self.radius = 1.0
+
+
+class Spline:
+    def __init__(self, points=()):
+        self.bezier_points = [BezierPoint(point) for point in points]
+        self.points = []
+
+
+class CurveData(FakeID):
+    def __init__(self, name, type='CURVE'):
+        super().__init__(name)
+        self.splines = []
+
+
+class FakeObject(FakeID):
+    """
+    An object whose dimensions follow its scale like Blender's: dimensions = size * scale,
+    where size is the bounding box of the (unscaled) data.
+    """
+
+    def __init__(self, name, data=None, type='MESH', size=(2.0, 2.0, 2.0), location=(0.0, 0.0, 0.0)):
+        super().__init__(name)
+        self.data = data
+        self.type = type
+        self.size = Vector(size)
+        self.location = Vector(location)
+        self.rotation_euler = Vector()
+        self.scale = Vector((1.0, 1.0, 1.0))
+        self.parent = None
+        self.selected = False
+        self.users_collection = [context.scene.collection]
+
+    @property
+    def dimensions(self):
+        return Vector(s * k for s, k in zip(self.size, self.scale))
+
+    def select_set(self, state):
+        self.selected = state
+
+
+class DataCollection:
+    """bpy.data.<kind>: name lookup plus new/remove, counting every new()."""
+
+    def __init__(self, kind, factory):
+        self.kind = kind
+        self.factory = factory
+        self.items = {}
+        self.suffixes = {}
+
+    def __len__(self):
+        return len(self.items)
+
+    def __iter__(self):
+        return iter(list(self.items.values()))
+
+    def get(self, name, default=None):
+        return self.items.get(name, default)
+
+    def _unique(self, name):
+        # Blender-style "Name.001" suffixes; the last suffix per name is remembered so that
+        # creating many objects with one name stays linear.
+        if name not in self.items:
+            return name
+        i = self.suffixes.get(name, 0)
+        candidate = name
+        while candidate in self.items:
+            i += 1
+            candidate = f"{name}.{i:03d}"
+        self.suffixes[name] = i
+        return candidate
+
+    def new(self, name, *args, **kwargs):
+        calls.record(f"data.{self.kind}.new")
+        item = self.factory(self._unique(name), *args, **kwargs)
+        self.items[item.name] = item
+        return item
+
+    def remove(self, item, do_unlink=True):
+        self.items.pop(item.name, None)
+
+
+class ObjectList(list):
+    """collection.objects: link() appends. Membership also works with object names."""
+
+    def link(self, obj):
+        calls.record("collection.objects.link")
+        self.append(obj)
+
+    def unlink(self, obj):
+        self.remove(obj)
+
+    def __contains__(self, item):
+        return any(obj is item or obj.name == item for obj in self)
+
+
+def _new_object(name, object_data=None):
+    kind = getattr(object_data, "type", None)
+    return FakeObject(name, object_data, type='LIGHT' if isinstance(object_data, LightData) else
+                      'CURVE' if isinstance(object_data, CurveData) else kind or 'MESH')
+
+
+def _add_object(name, obj_type, data, location):
+    obj = data_module.objects.new(name, data)
+    obj.type = obj_type
+    obj.location = Vector(location)
+    context.scene.collection.objects.link(obj)
+    context.object = context.view_layer.objects.active = obj
+    return obj
+
+
+def _light_add(type='POINT', location=(0.0, 0.0, 0.0), **kwargs):
+    _add_object("Point", 'LIGHT', data_module.lights.new("Point", type=type), location)
+
+
+def _primitive_cube_add(location=(0.0, 0.0, 0.0), **kwargs):
+    _add_object("Cube", 'MESH', None, location)
+
+
+def _text_add(location=(0.0, 0.0, 0.0), **kwargs):
+    _add_object("Text", 'FONT', data_module.curves.new("Text", type='FONT'), location)
+
+
+def _transform_apply(location=False, rotation=False, scale=True, **kwargs):
+    obj = context.view_layer.objects.active
+    if obj is not None and scale:
+        obj.size = obj.dimensions
+        obj.scale = Vector((1.0, 1.0, 1.0))
+
+
+OPERATORS = {
+    "object.light_add": _light_add,
+    "mesh.primitive_cube_add": _primitive_cube_add,
+    "object.text_add": _text_add,
+    "object.transform_apply": _transform_apply,
+}
+
+
+class Operators:
+    """bpy.ops: any path can be called. Known operators change the fake scene, the rest only count."""
+
+    def __init__(self, path=""):
+        self._path = path
+
+    def __getattr__(self, name):
+        return Operators(f"{self._path}.{name}" if self._path else name)
+
+    def __call__(self, *args, **kwargs):
+        calls.record(f"ops.{self._path}")
+        handler = OPERATORS.get(self._path)
+        if handler is not None:
+            handler(**kwargs)
+        return {'FINISHED'}
+
+
+class _Namespace:
+    def __init__(self, **attributes):
+        self.__dict__.update(attributes)
+
+
+def _reset_scene():
+    scene_collection = _Namespace(objects=ObjectList(), children=[])
+    context.scene = _Namespace(collection=scene_collection, cursor=_Namespace(location=Vector()))
+    context.collection = scene_collection
+    context.view_layer = _Namespace(objects=_Namespace(active=None), update=lambda: None)
+    context.object = None
+
+
+context = _Namespace()
+data_module = _Namespace(
+    objects=DataCollection("objects", _new_object),
+    lights=DataCollection("lights", LightData),
+    curves=DataCollection("curves", CurveData),
+    meshes=DataCollection("meshes", FakeID),
+    materials=DataCollection("materials", FakeID),
+)
+
+
+def reset():
+    """Empties the fake scene and data, and zeroes the call counts."""
+    for collection in vars(data_module).values():
+        collection.items.clear()
+        collection.suffixes.clear()
+    _reset_scene()
+    calls.reset()
+
+
+def install():
+    """
+    Registers the fake modules as bpy and mathutils in sys.modules (unless a bpy, real or
+    fake, is already imported) and returns the bpy module. Installing again keeps the first
+    fake, so modules that already imported it see the same handlers and data.
+    """
+    if "bpy" in sys.modules:
+        return sys.modules["bpy"]
+    bpy = types.ModuleType("bpy")
+    bpy.IS_FAKE = True
+    bpy.context = context
+    bpy.data = data_module
+    bpy.ops = Operators()
+    handlers = _Namespace(persistent=lambda function: function, render_pre=[], render_post=[], render_cancel=[],
+                          save_pre=[], save_post=[], load_post=[])
+    bpy.app = _Namespace(version=(4, 2, 0), version_string="4.2.0 (fake)", background=True, handlers=handlers)
+    bpy.types = _Namespace(Object=FakeObject)
+    mathutils = types.ModuleType("mathutils")
+    mathutils.Vector = Vector
+    sys.modules["bpy"] = bpy
+    sys.modules["mathutils"] = mathutils
+    return bpy
+
+
+_reset_scene()
@@ -0,0 +1,52 @@
+# Stand-in for `blender -b -P straviz_batch.py` when testing batch_scheduler.py without Blender.
+#
+#   python batch_scheduler.py runs/ -o out/ -j 8 \
+#       --worker-cmd "python benchmarks/stub_worker.py {runs} -o {output_dir} --seconds 0.5 --crash-once"
+#
+# For each run it sleeps, prints progress lines like the real worker, and writes
+# <output_dir>/<run>.blend containing the run path. It can crash or hang on request.
+
+import argparse
+import os
+import sys
+import time
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Fake StraViz batch worker.")
+    parser.add_argument("runs", nargs="+")
+    parser.add_argument("-o", "--output-dir", required=True)
+    parser.add_argument("--seconds", type=float, default=0.2, help="Time to spend per run.")
+    parser.add_argument("--busy", action="store_true", help="Spin the CPU instead of sleeping.")
+    parser.add_argument("--crash-once", action="store_true",
+                        help="Exit with an error the first time each run is seen (uses a marker file).")
+    parser.add_argument("--hang", default=None, help="Never finish a run whose file name contains this text.")
+    args = parser.parse_args(argv)
+
+    for i, run_path in enumerate(args.runs, start=1):
+        name = os.path.splitext(os.path.basename(run_path))[0]
+        print(f"[{i}/{len(args.runs)}] Building {run_path}", flush=True)
+
+        marker = os.path.join(args.output_dir, f"{name}.crashed")
+        if args.crash_once and not os.path.exists(marker):
+            open(marker, "w").close()
+            print(f"Simulated crash on {name}", flush=True)
+            os.abort()
+        if args.hang and args.hang in name:
+            while True:
+                time.sleep(1)
+
+        start = time.perf_counter()
+        if args.busy:
+            while time.perf_counter() - start < args.seconds:
+                pass
+        else:
+            time.sleep(args.seconds)
+        with open(os.path.join(args.output_dir, f"{name}.blend"), "w") as file:
+            file.write(run_path + "\n")
+        print(f"{name:<40} {time.perf_counter() - start:9.2f}", flush=True)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,93 @@
+# Synthetic run files in the testRun.json schema, for benchmarks at any size.
+#
+# Usage:
+#   python benchmarks/synthetic_runs.py -o runs/                 (100 to 1,000,000 points)
+#   python benchmarks/synthetic_runs.py -o runs/ --points 5000 --seed 3
+#
+# The path is a smoothed random walk with the same step length, realDistance/pace ratio,
+# HR buckets and altitude range as testRun.json, so the geometry looks like a real run.
+# Plain Python only, Blender is not needed.
+
+import argparse
+import math
+import os
+import random
+
+SIZES = (100, 1_000, 10_000, 100_000, 1_000_000)
+
+UNITS_PER_KM = 961.5    # Path units per kilometre of realDistance, as in testRun.json
+STEP = (850.0, 1050.0)  # Path units between samples
+MAX_ALTITUDE = 400      # altitudeFromZero stays within 0..MAX_ALTITUDE
+
+
+def run_points(n_points, seed=0):
+    """
+    Yields (x, y, altitudeFromZero, HR, pace, realDistance) for n_points samples.
+    """
+    rng = random.Random(seed)
+    x = y = 0.0
+    heading = rng.uniform(0, 2 * math.pi)
+    altitude = 0
+    climb = 0.0
+    for _ in range(n_points):
+        step = rng.uniform(*STEP)
+        real_distance = step / UNITS_PER_KM
+        # Climbing raises the HR bucket; the watch's pace is realDistance / 5 in testRun.json.
+        hr = max(0, min(10, round(6 + climb / 4 + rng.gauss(0, 1))))
+        yield x, y, altitude, hr, real_distance / 5, real_distance
+
+        heading += rng.gauss(0, 0.35)
+        x += step * math.cos(heading)
+        y += step * math.sin(heading)
+        climb = 0.8 * climb + rng.gauss(0, 4)
+        altitude = int(min(max(altitude + climb, 0), MAX_ALTITUDE))
+
+
+def write_synthetic_run(path, n_points, seed=0):
+    """
+    Writes a run with n_points entries in the same layout as testRun.json.
+    Entries are formatted by hand rather than with json.dumps, so a million points take seconds.
+    """
+    total = 0.0
+    with open(path, "w") as file:
+        file.write('{\n "startingCoordinates" : {\n  "longitude" : -116.32850772364361,\n'
+                   '  "latitude" : 51.62955090271296\n },\n')
+        # ttlDistance is the sum of realDistance, so it goes after the points.
+        file.write(' "zeroAltitude" : 1834,\n "normPoints" : [\n')
+        for i, (x, y, altitude, hr, pace, real_distance) in enumerate(run_points(n_points, seed)):
+            total += real_distance
+            file.write(f'  {{\n   "altitudeFromZero" : {altitude},\n   "pace" : {pace!r},\n   "HR" : {hr},\n'
+                       f'   "coordinates" : {{\n    "y" : {y!r},\n    "x" : {x!r}\n   }},\n'
+                       f'   "realDistance" : {real_distance!r}\n  }}')
+            file.write(",\n" if i < n_points - 1 else "\n")
+        file.write(f' ],\n "ttlDistance" : {total!r}\n}}\n')
+    return path
+
+
+def synthetic_run_path(directory, n_points, seed=0):
+    """
+    Path of the synthetic run of n_points in directory, written on first use and reused after.
+    """
+    path = os.path.join(directory, f"synthetic_{n_points}_{seed}.json")
+    if not os.path.exists(path):
+        write_synthetic_run(path + ".tmp", n_points, seed)
+        os.replace(path + ".tmp", path)
+    return path
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Write synthetic StraViz run files.")
+    parser.add_argument("-o", "--output-dir", required=True, help="Directory for the run files.")
+    parser.add_argument("--points", type=int, action="append", default=[],
+                        help=f"Points per run (repeatable). Defaults to {', '.join(map(str, SIZES))}.")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args(argv)
+
+    os.makedirs(args.output_dir, exist_ok=True)
+    for n_points in args.points or SIZES:
+        path = synthetic_run_path(args.output_dir, n_points, args.seed)
+        print(f"{path}: {n_points} points, {os.path.getsize(path) / 1e6:.1f} MB")
+
+
+if __name__ == "__main__":
+    main()
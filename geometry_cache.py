@@ -0,0 +1,154 @@
+# Content-addressed on-disk cache of finished run meshes.
+# Keys hash the run file bytes together with every setting that changes the geometry, so a
+# rebuild with only a new material or text loads the mesh instead of redoing the geometry.
+# NumPy only, no bpy.
+
+import hashlib
+import json
+import os
+import tempfile
+import zipfile
+
+import numpy as np
+
+CACHE_SUFFIX = ".npz"
+_READ_CHUNK = 1 << 20
+
+
+class GeometryCache:
+    """
+    Directory of .npz mesh files with a size-bounded least-recently-used eviction policy.
+
+    Recency is the file modification time, refreshed on every hit, so several worker processes
+    can share one cache directory without a separate index. Writes go through a temporary
+    file and os.replace, so readers never see a half-written entry.
+
+    Parameters:
+        directory (str): Cache directory (created if missing).
+        max_bytes (int): Total size the cache is trimmed back to after each insert.
+    """
+
+    def __init__(self, directory, max_bytes=512 * 2 ** 20):
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        os.makedirs(directory, exist_ok=True)
+
+    def __repr__(self):
+        return (f"GeometryCache({self.directory}: {self.hits} hits, {self.misses} misses, "
+                f"{self.evictions} evictions)")
+
+    @staticmethod
+    def key(run_path, parameters):
+        """
+        Hash of the run file's bytes plus the geometry parameters (any JSON-serializable dict).
+        """
+        digest = hashlib.sha256()
+        with open(run_path, "rb") as file:
+            for chunk in iter(lambda: file.read(_READ_CHUNK), b""):
+                digest.update(chunk)
+        digest.update(b"\0")
+        digest.update(json.dumps(parameters, sort_keys=True).encode())
+        return digest.hexdigest()
+
+    def _path(self, key):
+        return os.path.join(self.directory, key + CACHE_SUFFIX)
+
+    def get(self, key):
+        """
+        Returns the cached entry as a dict, or None on a miss:
+            vertices (V, 3) float32, corners (L,) int32, face_sizes (F,) int32,
+            attributes {name: (V,) float32}, stats {name: float}
+        """
+        path = self._path(key)
+        try:
+            with np.load(path) as data:
+                entry = {
+                    "vertices": data["vertices"],
+                    "corners": data["corners"],
+                    "face_sizes": data["face_sizes"],
+                    "attributes": {name[len("attribute:"):]: data[name]
+                                   for name in data.files if name.startswith("attribute:")},
+                    "stats": {name[len("stat:"):]: float(data[name])
+                              for name in data.files if name.startswith("stat:")},
+                }
+            os.utime(path)
+        except FileNotFoundError:
+            # Not cached, or evicted by another process meanwhile.
+            self.misses += 1
+            return None
+        except (OSError, ValueError, KeyError, EOFError, zipfile.BadZipFile):
+            # Damaged, e.g. truncated by a full disk or copied half-way: drop it and rebuild.
+            self.misses += 1
+            self._discard(path)
+            return None
+        self.hits += 1
+        return entry
+
+    def _discard(self, path):
+        try:
+            os.unlink(path)
+        except OSError:
+            pass  # Already evicted, or not ours to delete; the next put replaces it
+
+    def put(self, key, vertices, corners, face_sizes, attributes=None, stats=None):
+        """
+        Stores a mesh (polygons given as flat corner indices plus per-face sizes) with optional
+        per-vertex float attributes and scalar statistics, then trims the cache to max_bytes.
+        """
+        arrays = {
+            "vertices": np.asarray(vertices, dtype=np.float32).reshape(-1, 3),
+            "corners": np.asarray(corners, dtype=np.int32),
+            "face_sizes": np.asarray(face_sizes, dtype=np.int32),
+        }
+        for name, values in (attributes or {}).items():
+            arrays[f"attribute:{name}"] = np.asarray(values, dtype=np.float32)
+        for name, value in (stats or {}).items():
+            arrays[f"stat:{name}"] = np.float64(value)
+
+        handle, temporary = tempfile.mkstemp(dir=self.directory, suffix=".tmp")
+        try:
+            with os.fdopen(handle, "wb") as file:
+                np.savez(file, **arrays)
+            os.replace(temporary, self._path(key))
+        except BaseException:
+            os.unlink(temporary)
+            raise
+        self.evict()
+
+    def entries(self):
+        """(path, size, last used) for every entry, least recently used first."""
+        found = []
+        for name in os.listdir(self.directory):
+            if not name.endswith(CACHE_SUFFIX):
+                continue
+            path = os.path.join(self.directory, name)
+            try:
+                stat = os.stat(path)
+            except FileNotFoundError:
+                continue  # Evicted by another process meanwhile
+            found.append((path, stat.st_size, stat.st_mtime))
+        return sorted(found, key=lambda entry: entry[2])
+
+    def size(self):
+        return sum(size for _, size, _ in self.entries())
+
+    def evict(self):
+        """Deletes least recently used entries until the cache fits in max_bytes."""
+        entries = self.entries()
+        total = sum(size for _, size, _ in entries)
+        for path, size, _ in entries:
+            if total <= self.max_bytes:
+                break
+            try:
+                os.unlink(path)
+                self.evictions += 1
+            except FileNotFoundError:
+                pass
+            total -= size
+
+    def clear(self):
+        for path, _, _ in self.entries():
+            os.unlink(path)
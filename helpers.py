@@ -2,9 +2,13 @@
 # Helper methods for the main StraViz script. 
 # This is not organized but it works for the demo. 
 
+import importlib
 import math
 import bpy
 
+import material_library as materials
+importlib.reload(materials)
+
 def log_scale_run_object(obj, max_size=100):
     """
     Logarithmically scales the x and z dimensions of a Blender object to be between 1 and max_size.
@@ -102,188 +106,55 @@ def resize_object(obj, obj_max, scale_max):
 
     print("ScaleMax Done")
 
-def assign_glass_material(obj, ior=1.45, roughness=0.01):
+def assign_glass_material(obj, ior=1.45, roughness=0.01, pace_attribute="pace_glow", min_emission=0.0,
+                          max_emission=5.0):
     """
-    Creates or reuses a Glass BSDF material and assigns it to the given object.
+    Assigns the shared Glass BSDF material variant for these parameters (see material_library).
 
     :param obj: Blender object to apply the material to.
     :param ior: Index of Refraction for the Glass BSDF (default: 1.45).
     :param roughness: Roughness for the Glass BSDF (default: 0.01).
+    :param pace_attribute: Name of the 0-1 pace glow attribute on the mesh (see StraViz.pace_glow),
+                           which drives an emission shader added on top of the glass. None gives
+                           plain glass.
+    :param min_emission: Emission strength where the attribute is 0 (fastest point, or no attribute).
+    :param max_emission: Emission strength where the attribute is 1 (slowest point).
     """
     if obj is None:
         print("No object provided.")
         return
-    
-    # Material name based on properties
-    material_name = f"Glass_Material"
-    
-    # Check if the material already exists
-    material = bpy.data.materials.get(material_name)
-    if material is None:
-        # Create a new material
-        material = bpy.data.materials.new(name=material_name)
-        material.use_nodes = True
-        
-        # Get the material's node tree
-        nodes = material.node_tree.nodes
-        links = material.node_tree.links
 
-        # Clear default nodes
-        nodes.clear()
-        
-        # Create the necessary nodes
-        output_node = nodes.new(type='ShaderNodeOutputMaterial')
-        output_node.location = (400, 0)
-        
-        glass_node = nodes.new(type='ShaderNodeBsdfGlass')
-        glass_node.location = (0, 0)
-        
-        # Set Glass BSDF properties
-        glass_node.inputs['IOR'].default_value = ior
-        glass_node.inputs['Roughness'].default_value = roughness
-        
-        # Connect Glass BSDF to Material Output
-        links.new(glass_node.outputs['BSDF'], output_node.inputs['Surface'])
-        
-        print(f"Created new material: {material_name}")
-    else:
-        print(f"Reusing existing material: {material_name}")
-    
-    # Assign the material to the object
-    if obj.data.materials:
-        # Replace the existing material
-        obj.data.materials[0] = material
-    else:
-        # Add the new material
-        obj.data.materials.append(material)
-    
+    material = materials.get_material("Glass_Material", ior=ior, roughness=roughness, pace_attribute=pace_attribute,
+                                      min_emission=min_emission, max_emission=max_emission)
+    materials.assign_material(obj, material)
     print(f"Glass material with IOR {ior} and roughness {roughness} applied to {obj.name}.")
 
 
-def assign_text_material(obj): 
+def assign_text_material(obj, roughness=0.5, emission_strength=0.4):
     """
-    Creates or reuses a Principled BSDF material and assigns it to the given object.
-    Sets the roughness to 0.5 and the emission strength to 0.4.
+    Assigns the shared Principled BSDF text material variant (see material_library).
 
     :param obj: Blender object to apply the material to.
+    :param roughness: Roughness of the Principled BSDF (default: 0.5).
+    :param emission_strength: Strength of the (unlinked) Emission node (default: 0.4).
     """
     if obj is None:
         print("No object provided.")
         return
 
-    # Material name based on properties
-    material_name = f"TextMat"
-
-    # Check if the material already exists
-    material = bpy.data.materials.get(material_name)
-    if material is None:
-        # Create a new material
-        material = bpy.data.materials.new(name=material_name)
-        material.use_nodes = True
-        
-        # Get the material's node tree
-        nodes = material.node_tree.nodes
-        links = material.node_tree.links
-
-        # Clear default nodes
-        for node in nodes:
-            nodes.remove(node)
-
-        # Create Principled BSDF and Output nodes
-        bsdf = nodes.new(type="ShaderNodeBsdfPrincipled")
-        bsdf.location = (0, 0)
-        bsdf.inputs["Roughness"].default_value = 0.5  # Set roughness
-
-        output = nodes.new(type="ShaderNodeOutputMaterial")
-        output.location = (200, 0)
-
-        # Link BSDF to Material Output
-        links.new(bsdf.outputs["BSDF"], output.inputs["Surface"])
-
-        # Create Emission node
-        emission = nodes.new(type="ShaderNodeEmission")
-        emission.location = (-200, 0)
-        emission.inputs["Strength"].default_value = 0.4  # Set emission strength
-
-        # Link Emission to Material Output (if desired, can combine with other nodes)
-        # links.new(emission.outputs["Emission"], output.inputs["Surface"])
+    materials.assign_material(obj, materials.get_material("TextMat", roughness=roughness,
+                                                          emission_strength=emission_strength))
 
-        print(f"Created new material: {material_name}")
-    else:
-        print(f"Reusing existing material: {material_name}")
-        # Adjust existing material properties
-        nodes = material.node_tree.nodes
-        bsdf = nodes.get("Principled BSDF")
-        if bsdf:
-            bsdf.inputs["Roughness"].default_value = 0.5
-        emission = nodes.get("Emission")
-        if emission:
-            emission.inputs["Strength"].default_value = 0.4
-
-    # Assign the material to the object
-    if obj.data.materials:
-        # Replace the existing material
-        obj.data.materials[0] = material
-    else:
-        # Add the new material
-        obj.data.materials.append(material)
-
-
-def assign_platform_material(obj): 
 
+def assign_platform_material(obj, roughness=0.5):
     """
-    Creates or reuses a Principled BSDF material and assigns it to the given object.
-    Sets the roughness to 0.5 and the emission strength to 0.4.
+    Assigns the shared Principled BSDF platform material variant (see material_library).
 
     :param obj: Blender object to apply the material to.
+    :param roughness: Roughness of the Principled BSDF (default: 0.5).
     """
     if obj is None:
         print("No object provided.")
         return
 
-    # Material name based on properties
-    material_name = f"Platform"
-
-    # Check if the material already exists
-    material = bpy.data.materials.get(material_name)
-    if material is None:
-        # Create a new material
-        material = bpy.data.materials.new(name=material_name)
-        material.use_nodes = True
-        
-        # Get the material's node tree
-        nodes = material.node_tree.nodes
-        links = material.node_tree.links
-
-        # Clear default nodes
-        for node in nodes:
-            nodes.remove(node)
-
-        # Create Principled BSDF and Output nodes
-        bsdf = nodes.new(type="ShaderNodeBsdfPrincipled")
-        bsdf.location = (0, 0)
-        bsdf.inputs["Roughness"].default_value = 0.5  # Set roughness
-
-        output = nodes.new(type="ShaderNodeOutputMaterial")
-        output.location = (200, 0)
-
-        # Link BSDF to Material Output
-        links.new(bsdf.outputs["BSDF"], output.inputs["Surface"])
-
-
-        print(f"Created new material: {material_name}")
-    else:
-        print(f"Reusing existing material: {material_name}")
-        # Adjust existing material properties
-        nodes = material.node_tree.nodes
-        bsdf = nodes.get("Principled BSDF")
-        if bsdf:
-            bsdf.inputs["Roughness"].default_value = 0.5
-
-    # Assign the material to the object
-    if obj.data.materials:
-        # Replace the existing material
-        obj.data.materials[0] = material
-    else:
-        # Add the new material
-        obj.data.materials.append(material)
+    materials.assign_material(obj, materials.get_material("Platform", roughness=roughness))
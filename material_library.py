@@ -0,0 +1,233 @@
+# Declarative StraViz materials and a process-wide registry of their variants.
+#
+# Each material is a spec: default parameters plus the nodes and links of its node tree.
+# get_material(name, **params) returns the variant for those parameters, building it from the
+# spec (or appending it from a library .blend) only the first time it is asked for in the
+# current file. Variants with the default parameters keep the plain material name.
+#
+# Write a library with every default material, for use_library():
+#   blender -b -P material_library.py -- materials.blend
+
+import hashlib
+import os
+import sys
+
+import bpy
+
+VARIANT_KEY = "straviz_variant"  # Material property identifying the spec variant it was built from
+
+# Node entry: name, type, location, inputs {socket: value}, properties {attribute: value},
+# and optionally "when"/"unless": a parameter that must be set/unset for the node to exist.
+# Link entry: (from node, from socket, to node, to socket[, {"when"/"unless": parameter}]).
+# A string value that names a parameter is replaced by the parameter's value.
+SPECS = {
+    "Glass_Material": {
+        # The defaults are the glass of the default pipeline (light_mode 'attribute'), which keeps
+        # the plain "Glass_Material" name; the light modes use "Glass_Material[no_pace_attribute]".
+        "defaults": {"ior": 1.45, "roughness": 0.01, "pace_attribute": "pace_glow",
+                     "min_emission": 0.0, "max_emission": 5.0},
+        "nodes": [
+            {"name": "Material Output", "type": "ShaderNodeOutputMaterial", "location": (400, 0)},
+            {"name": "Glass BSDF", "type": "ShaderNodeBsdfGlass", "location": (0, 0),
+             "inputs": {"IOR": "ior", "Roughness": "roughness"}},
+            # Pace emission: the attribute is 1 - normalized pace (StraViz.pace_glow), so slower is
+            # brighter, as with the point lights, and a mesh without it reads 0 and gets min_emission.
+            {"name": "Pace Attribute", "type": "ShaderNodeAttribute", "location": (-600, -300),
+             "properties": {"attribute_name": "pace_attribute"}, "when": "pace_attribute"},
+            {"name": "Pace Strength", "type": "ShaderNodeMapRange", "location": (-400, -300),
+             "inputs": {"From Min": 0.0, "From Max": 1.0, "To Min": "min_emission", "To Max": "max_emission"},
+             "when": "pace_attribute"},
+            {"name": "Pace Emission", "type": "ShaderNodeEmission", "location": (-200, -300),
+             "when": "pace_attribute"},
+            {"name": "Pace Add", "type": "ShaderNodeAddShader", "location": (200, 0), "when": "pace_attribute"},
+        ],
+        "links": [
+            ("Glass BSDF", "BSDF", "Material Output", "Surface", {"unless": "pace_attribute"}),
+            ("Pace Attribute", "Fac", "Pace Strength", "Value", {"when": "pace_attribute"}),
+            ("Pace Strength", "Result", "Pace Emission", "Strength", {"when": "pace_attribute"}),
+            ("Glass BSDF", "BSDF", "Pace Add", 0, {"when": "pace_attribute"}),
+            ("Pace Emission", "Emission", "Pace Add", 1, {"when": "pace_attribute"}),
+            ("Pace Add", "Shader", "Material Output", "Surface", {"when": "pace_attribute"}),
+        ],
+    },
+    "TextMat": {
+        "defaults": {"roughness": 0.5, "emission_strength": 0.4},
+        "nodes": [
+            {"name": "Principled BSDF", "type": "ShaderNodeBsdfPrincipled", "location": (0, 0),
+             "inputs": {"Roughness": "roughness"}},
+            {"name": "Material Output", "type": "ShaderNodeOutputMaterial", "location": (200, 0)},
+            # Not linked, as in the original text material; kept for manual tweaking.
+            {"name": "Emission", "type": "ShaderNodeEmission", "location": (-200, 0),
+             "inputs": {"Strength": "emission_strength"}},
+        ],
+        "links": [
+            ("Principled BSDF", "BSDF", "Material Output", "Surface"),
+        ],
+    },
+    "Platform": {
+        "defaults": {"roughness": 0.5},
+        "nodes": [
+            {"name": "Principled BSDF", "type": "ShaderNodeBsdfPrincipled", "location": (0, 0),
+             "inputs": {"Roughness": "roughness"}},
+            {"name": "Material Output", "type": "ShaderNodeOutputMaterial", "location": (200, 0)},
+        ],
+        "links": [
+            ("Principled BSDF", "BSDF", "Material Output", "Surface"),
+        ],
+    },
+}
+
+# What write_library puts in a library by default: every spec's defaults, plus the glass without
+# the pace emission that StraViz uses in the light modes other than 'attribute'.
+LIBRARY_VARIANTS = [(name, {}) for name in SPECS] + [("Glass_Material", {"pace_attribute": None})]
+
+# (spec name, parameters) -> material name, for every variant asked for in this process.
+# Kept across importlib.reload, which StraViz runs on every script execution.
+_registry = globals().get("_registry", {})
+stats = globals().get("stats", {"built": 0, "appended": 0, "reused": 0})
+_library = globals().get("_library", {"path": None, "names": frozenset()})
+
+
+def variant_params(name, params):
+    """The spec's defaults updated with params, rejecting parameters the spec does not have."""
+    spec = SPECS[name]
+    unknown = set(params) - set(spec["defaults"])
+    if unknown:
+        raise ValueError(f"Material '{name}' has no parameter(s) {', '.join(sorted(unknown))}.")
+    return {**spec["defaults"], **params}
+
+
+def variant_key(name, params):
+    return name, tuple(sorted(params.items()))
+
+
+def variant_name(name, params):
+    """
+    Material name of a variant: the plain name for the defaults, otherwise the name with the
+    changed parameters, e.g. "Glass_Material[ior=1.5]", or "Glass_Material[no_pace_attribute]" for
+    a parameter turned off. Hashed if that exceeds Blender's 63 characters.
+    """
+    defaults = SPECS[name]["defaults"]
+    changed = [f"no_{key}" if value is None else f"{key}={value}"
+               for key, value in sorted(params.items()) if value != defaults[key]]
+    if not changed:
+        return name
+    full = f"{name}[{','.join(changed)}]"
+    if len(full) <= 63:
+        return full
+    return f"{name}[{hashlib.sha1(full.encode()).hexdigest()[:10]}]"
+
+
+def use_library(path):
+    """
+    Appends materials from this .blend file (see write_library) instead of building them,
+    when it holds the variant asked for. The file's material names are read once per process.
+    None goes back to building every material.
+    """
+    if path == _library["path"]:
+        return
+    names = frozenset()
+    if path is not None:
+        with bpy.data.libraries.load(path, link=False) as (data_from, data_to):
+            names = frozenset(data_from.materials)
+        print(f"Material library {path}: {len(names)} materials")
+    _library["path"], _library["names"] = path, names
+
+
+def get_material(name, **params):
+    """
+    Returns the material variant of spec `name` with the given parameters, creating it in the
+    current file only if it is not there yet.
+
+    Parameters:
+        name (str): A key of SPECS.
+        **params: Parameters that differ from the spec defaults.
+
+    Returns:
+        bpy.types.Material: The shared variant.
+    """
+    params = variant_params(name, params)
+    key = variant_key(name, params)
+    material_name = _registry.get(key) or variant_name(name, params)
+
+    material = bpy.data.materials.get(material_name)
+    if material is not None and material.get(VARIANT_KEY) == repr(key):
+        stats["reused"] += 1
+    elif material_name in _library["names"] and material is None:
+        with bpy.data.libraries.load(_library["path"], link=False) as (data_from, data_to):
+            data_to.materials = [material_name]
+        material = data_to.materials[0]
+        material[VARIANT_KEY] = repr(key)
+        stats["appended"] += 1
+        print(f"Appended material {material_name} from {_library['path']}")
+    else:
+        material = build_material(name, params, material_name)
+        stats["built"] += 1
+        print(f"Created new material: {material.name}")
+    _registry[key] = material.name
+    return material
+
+
+def _resolve(value, params):
+    return params[value] if isinstance(value, str) and value in params else value
+
+
+def _included(entry, params):
+    when, unless = entry.get("when"), entry.get("unless")
+    return (when is None or params[when]) and (unless is None or not params[unless])
+
+
+def build_material(name, params, material_name=None):
+    """Builds a new material from the spec `name` with fully resolved params."""
+    spec = SPECS[name]
+    material = bpy.data.materials.new(name=material_name or name)
+    material.use_nodes = True
+    nodes = material.node_tree.nodes
+    links = material.node_tree.links
+    nodes.clear()
+
+    for entry in spec["nodes"]:
+        if not _included(entry, params):
+            continue
+        node = nodes.new(type=entry["type"])
+        node.name = entry["name"]
+        node.location = entry["location"]
+        for socket, value in entry.get("inputs", {}).items():
+            node.inputs[socket].default_value = _resolve(value, params)
+        for attribute, value in entry.get("properties", {}).items():
+            setattr(node, attribute, _resolve(value, params))
+
+    for from_node, from_socket, to_node, to_socket, *options in spec["links"]:
+        if options and not _included(options[0], params):
+            continue
+        links.new(nodes[from_node].outputs[from_socket], nodes[to_node].inputs[to_socket])
+
+    material[VARIANT_KEY] = repr(variant_key(name, params))
+    return material
+
+
+def assign_material(obj, material):
+    """Puts the material in the object's first material slot."""
+    if obj.data.materials:
+        obj.data.materials[0] = material
+    else:
+        obj.data.materials.append(material)
+
+
+def write_library(path, variants=None):
+    """
+    Builds material variants and writes them to a library .blend file.
+
+    Parameters:
+        path (str): Output .blend file.
+        variants (list of tuple): (spec name, params) pairs. Defaults to LIBRARY_VARIANTS.
+    """
+    materials = {get_material(name, **params) for name, params in variants or LIBRARY_VARIANTS}
+    bpy.data.libraries.write(path, materials, fake_user=True)
+    print(f"Wrote {len(materials)} materials to {path}")
+
+
+if __name__ == "__main__":
+    # Blender passes its own arguments first; ours follow "--".
+    argv = sys.argv[sys.argv.index("--") + 1:] if "--" in sys.argv else []
+    write_library(os.path.abspath(argv[0] if argv else "materials.blend"))
@@ -0,0 +1,142 @@
+# Opt-in per-stage timing for the StraViz pipeline.
+# Records wall and CPU time per named stage plus counts and Python memory at every stage
+# boundary, and writes them as plain JSON and as Chrome trace events (chrome://tracing,
+# https://ui.perfetto.dev). No bpy: the Blender side passes in a function that counts things.
+
+import json
+import os
+import time
+import tracemalloc
+from contextlib import contextmanager
+
+
+class Tracer:
+    """
+    Collects stage records. Stages can be nested; each record keeps its depth.
+
+    Parameters:
+        counter (callable): Optional function returning a dict of counts (vertices, faces,
+                            objects, ...) that is sampled at the start and end of every stage.
+        trace_memory (bool): Track Python allocations with tracemalloc. This slows Python code
+                             down noticeably, so it can be turned off for pure timing runs.
+    """
+
+    def __init__(self, counter=None, trace_memory=True):
+        self.counter = counter
+        self.trace_memory = trace_memory
+        self.records = []
+        self.metadata = {}
+        self._depth = 0
+        self._peaks = [] # Highest peak seen so far by each open stage, across nested peak resets
+        self._origin = time.perf_counter()
+        self._started_tracemalloc = False
+        if trace_memory and not tracemalloc.is_tracing():
+            tracemalloc.start()
+            self._started_tracemalloc = True
+
+    def _fold_peak(self):
+        """Carries the traced peak into every open stage before it is reset."""
+        peak = tracemalloc.get_traced_memory()[1]
+        self._peaks = [max(open_peak, peak) for open_peak in self._peaks]
+
+    def _counts(self):
+        return self.counter() if self.counter else {}
+
+    @contextmanager
+    def stage(self, name, **details):
+        """Times the enclosed block as one stage. Extra keyword arguments are stored with it."""
+        counts_before = self._counts()
+        tracing = tracemalloc.is_tracing()
+        if tracing:
+            self._fold_peak()
+            self._peaks.append(0)
+            tracemalloc.reset_peak()
+        wall = time.perf_counter()
+        cpu = time.process_time()
+        self._depth += 1
+        try:
+            yield
+        finally:
+            self._depth -= 1
+            cpu_seconds = time.process_time() - cpu
+            end = time.perf_counter()
+            memory = None
+            if tracing:
+                self._fold_peak()
+                memory = {"current": tracemalloc.get_traced_memory()[0], "peak": self._peaks.pop()}
+            self.records.append({
+                "name": name,
+                "depth": self._depth,
+                "start": wall - self._origin,
+                "wall": end - wall,
+                "cpu": cpu_seconds,
+                "memory": memory,
+                "counts_before": counts_before,
+                "counts_after": self._counts(),
+                "details": details,
+            })
+
+    def close(self):
+        """Stops tracemalloc if this tracer started it."""
+        if self._started_tracemalloc:
+            tracemalloc.stop()
+            self._started_tracemalloc = False
+
+    def summary(self):
+        """One line per stage in start order: wall and CPU milliseconds and count changes."""
+        lines = []
+        for record in sorted(self.records, key=lambda r: r["start"]):
+            changes = ", ".join(f"{key} {record['counts_before'].get(key, 0)}->{value}"
+                                for key, value in record["counts_after"].items()
+                                if record["counts_before"].get(key) != value)
+            lines.append(f"{'  ' * record['depth']}{record['name']:<24} {record['wall'] * 1000:9.1f} ms wall "
+                         f"{record['cpu'] * 1000:9.1f} ms cpu  {changes}")
+        return "\n".join(lines)
+
+    def to_json(self, path):
+        with open(path, "w") as file:
+            json.dump({"metadata": self.metadata, "stages": self.records}, file, indent=1)
+
+    def to_chrome_trace(self, path):
+        """
+        Writes complete ("X") events for the stages and counter ("C") events for the counts and
+        memory at every boundary, in microseconds.
+        """
+        pid = os.getpid()
+        events = [{"name": "process_name", "ph": "M", "pid": pid, "tid": 0,
+                   "args": {"name": self.metadata.get("name", "StraViz")}}]
+        for record in self.records:
+            start_us = record["start"] * 1e6
+            end_us = start_us + record["wall"] * 1e6
+            events.append({"name": record["name"], "ph": "X", "pid": pid, "tid": 0,
+                           "ts": start_us, "dur": record["wall"] * 1e6,
+                           "args": {"cpu_ms": record["cpu"] * 1000, "memory": record["memory"],
+                                    "counts": record["counts_after"], **record["details"]}})
+            for ts, counts in ((start_us, record["counts_before"]), (end_us, record["counts_after"])):
+                if counts:
+                    events.append({"name": "counts", "ph": "C", "pid": pid, "ts": ts, "args": counts})
+            if record["memory"]:
+                events.append({"name": "python memory", "ph": "C", "pid": pid, "ts": end_us,
+                               "args": {"current": record["memory"]["current"]}})
+        with open(path, "w") as file:
+            json.dump({"traceEvents": events, "displayTimeUnit": "ms"}, file)
+
+    def write(self, base_path):
+        """Writes <base_path>.json and <base_path>.trace.json."""
+        self.to_json(base_path + ".json")
+        self.to_chrome_trace(base_path + ".trace.json")
+
+
+class NullTracer:
+    """Stand-in used when tracing is off: stages cost one no-op context manager."""
+    records = ()
+
+    @contextmanager
+    def stage(self, name, **details):
+        yield
+
+    def close(self):
+        pass
+
+
+NULL_TRACER = NullTracer()
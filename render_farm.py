@@ -0,0 +1,128 @@
+# Renders one turntable video on several local background Blender processes.
+#
+#   python render_farm.py models/myRun.blend -o renders/myRun --preset preview -j 4
+#   python render_farm.py models/myRun.blend -o renders/myRun --preset final --frames 240 -j 8 --timeout 7200
+#
+# The frame range is split into one contiguous chunk per worker, and each worker renders its
+# chunk with turntable.py using its share of the CPU threads, so all cores are busy while every
+# process only loads the file and builds the scene once. Crashed or timed-out chunks are
+# retried (already rendered frames are skipped). Once every frame exists, the frames are
+# encoded into <output>.mp4 with ffmpeg, or with Blender's sequencer when there is no ffmpeg.
+# Plain Python: the farm itself never imports bpy.
+
+import argparse
+import os
+import shlex
+import shutil
+import subprocess
+import sys
+import time
+
+import batch_scheduler
+
+script_dir = os.path.dirname(os.path.abspath(__file__))
+
+# --python-exit-code makes a turntable.py exception fail the job (see batch_scheduler.DEFAULT_WORKER_CMD).
+DEFAULT_WORKER_CMD = ("{blender} -b {blend} -t {threads} --python-exit-code 1 -P {script} -- "
+                      "--preset {preset} --frames {frames} --start {start} --end {end} -o {output_dir}")
+FRAME_FORMAT = "frame_{:04d}.png"   # As written by turntable.render_frames
+
+
+class RenderScheduler(batch_scheduler.Scheduler):
+    """
+    batch_scheduler.Scheduler whose jobs are frame ranges of one .blend file. A job's `runs`
+    are its frame numbers.
+    """
+    unit = "frames"
+
+    def __init__(self, template, blend_path, output_dir, workers, preset="preview", frames=120, threads=None,
+                 **kwargs):
+        super().__init__(template, output_dir, workers, **kwargs)
+        self.blend_path = blend_path
+        self.preset = preset
+        self.frames = frames
+        self.threads = threads or max(1, (os.cpu_count() or 1) // workers)
+
+    def command(self, job):
+        values = {"blender": self.blender, "blend": self.blend_path, "threads": self.threads,
+                  "script": os.path.join(script_dir, "turntable.py"), "preset": self.preset,
+                  "frames": self.frames, "start": job.runs[0], "end": job.runs[-1],
+                  "output_dir": self.output_dir, "job": job.index}
+        return [token.format(**values) for token in shlex.split(self.template)]
+
+
+def make_frame_jobs(frames, workers, chunk_size=None):
+    """Splits frames 1..frames into contiguous chunks, by default one per worker."""
+    chunk_size = chunk_size or -(-frames // workers)
+    return [batch_scheduler.Job(i, list(range(start, min(start + chunk_size, frames + 1))))
+            for i, start in enumerate(range(1, frames + 1, chunk_size), start=1)]
+
+
+def missing_frames(output_dir, frames):
+    return [frame for frame in range(1, frames + 1)
+            if not os.path.exists(os.path.join(output_dir, FRAME_FORMAT.format(frame)))]
+
+
+def encode(output_dir, video_path, fps=24, blender="blender"):
+    """
+    Encodes output_dir/frame_*.png into an H.264 video with ffmpeg if it is installed, else with
+    Blender (turntable.py --encode). Returns the encoder's exit code.
+    """
+    ffmpeg = shutil.which("ffmpeg")
+    if ffmpeg:
+        argv = [ffmpeg, "-y", "-loglevel", "error", "-framerate", str(fps),
+                "-i", os.path.join(output_dir, "frame_%04d.png"),
+                "-c:v", "libx264", "-pix_fmt", "yuv420p", video_path]
+    else:
+        argv = [blender, "-b", "--factory-startup", "--python-exit-code", "1",
+                "-P", os.path.join(script_dir, "turntable.py"), "--", "--encode", output_dir, "-o", video_path, "--fps", str(fps)]
+    print(f"Encoding with {os.path.basename(argv[0])}: {video_path}")
+    return subprocess.run(argv).returncode
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Render a StraViz turntable on parallel Blender workers.")
+    parser.add_argument("blend", help="Built model (.blend), e.g. from straviz_batch.py.")
+    parser.add_argument("-o", "--output-dir", required=True, help="Directory for the frames; the video is <dir>.mp4.")
+    parser.add_argument("--preset", default="preview", choices=("preview", "eevee", "final"),
+                        help="Render preset (see turntable.PRESETS).")
+    parser.add_argument("--frames", type=int, default=120, help="Frames per full orbit.")
+    parser.add_argument("--fps", type=int, default=24, help="Frame rate of the video.")
+    parser.add_argument("-j", "--workers", type=int, default=min(4, os.cpu_count() or 1),
+                        help="Concurrent Blender processes.")
+    parser.add_argument("--threads", type=int, default=None,
+                        help="Render threads per process (defaults to the CPU count / workers).")
+    parser.add_argument("--chunk-size", type=int, default=None,
+                        help="Frames per job (defaults to an equal share per worker).")
+    parser.add_argument("--timeout", type=float, default=None, help="Seconds before a job is killed.")
+    parser.add_argument("--retries", type=int, default=1, help="Extra attempts for a failed job.")
+    parser.add_argument("--blender", default="blender", help="Blender executable.")
+    parser.add_argument("--worker-cmd", default=DEFAULT_WORKER_CMD,
+                        help="Worker command template with {blender}, {blend}, {threads}, {script}, {preset}, "
+                             "{frames}, {start}, {end}, {output_dir}, {job}.")
+    parser.add_argument("--no-video", action="store_true", help="Only render the frames.")
+    args = parser.parse_args(argv)
+
+    output_dir = os.path.abspath(args.output_dir)
+    os.makedirs(output_dir, exist_ok=True)
+    jobs = make_frame_jobs(args.frames, args.workers, args.chunk_size)
+    scheduler = RenderScheduler(args.worker_cmd, os.path.abspath(args.blend), output_dir, args.workers,
+                                preset=args.preset, frames=args.frames, threads=args.threads,
+                                timeout=args.timeout, retries=args.retries, blender=args.blender)
+    print(f"Rendering {args.frames} frames ({args.preset}) in {len(jobs)} jobs on {args.workers} workers, "
+          f"{scheduler.threads} threads each")
+    start = time.perf_counter()
+    jobs = scheduler.run(jobs)
+    batch_scheduler.summarize(jobs, time.perf_counter() - start, args.workers, unit="frames")
+
+    missing = missing_frames(output_dir, args.frames)
+    if missing:
+        print(f"{len(missing)} frames missing, first {missing[0]}; not encoding.")
+        return 1
+    if args.no_video:
+        return 0
+    return 1 if encode(output_dir, output_dir.rstrip(os.sep) + ".mp4", args.fps, args.blender) else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,222 @@
+# Route density across many runs: how many runs passed near each point.
+#
+# GridIndex hashes the normalized x/y of process_run_file (the coordinates after the /100
+# scaling, before any resize) into square cells and keeps the points sorted by cell. Whole runs
+# are inserted as arrays and queries are vectorized over all points of a run at once.
+#   count_within: exact, compares each point with the points in its neighbouring cells, so it
+#                 slows down where hundreds of runs share a route.
+#   run_counts:   the number of runs near each cell, from each run's own cells spread to their
+#                 neighbours once. Linear in the total point count however much routes overlap;
+#                 this is what the density widths use.
+# NumPy only, no bpy.
+
+import math
+
+import numpy as np
+
+_KEY_OFFSET = 2 ** 31   # Cell coordinates are packed into one int64 key: (ix + offset) << 32 | (iy + offset)
+QUERY_CHUNK = 65536     # Query points compared per batch, which bounds the temporary pair arrays
+
+
+def _cell_keys(ix, iy):
+    return ((ix + _KEY_OFFSET) << 32) | (iy + _KEY_OFFSET)
+
+
+class GridIndex:
+    """
+    Spatial hash of the points of many runs.
+
+    Parameters:
+        cell_size (float): Width of a grid cell in normalized units. Queries are cheapest
+                           with a radius close to it.
+    """
+
+    def __init__(self, cell_size):
+        if cell_size <= 0:
+            raise ValueError("The cell size must be positive.")
+        self.cell_size = float(cell_size)
+        self._chunks = []
+        self.run_count = 0
+        self._built = None
+        self._run_cells = {}
+
+    def __len__(self):
+        return sum(len(xy) for xy, _ in self._chunks)
+
+    def __repr__(self):
+        return f"GridIndex({len(self)} points, {self.run_count} runs, cell {self.cell_size})"
+
+    def insert(self, xy):
+        """
+        Adds one run's points and returns its run id.
+
+        Parameters:
+            xy (np.ndarray): (N, 2) normalized x/y, e.g. RunTrack.points[:, [0, 2]].
+        """
+        xy = np.asarray(xy, dtype=np.float64).reshape(-1, 2)
+        run_id = self.run_count
+        self._chunks.append((xy, run_id))
+        self.run_count += 1
+        self._built = None
+        self._run_cells = {}
+        return run_id
+
+    def _cells(self, xy):
+        cells = np.floor(xy / self.cell_size).astype(np.int64)
+        return cells[:, 0], cells[:, 1]
+
+    def _build(self):
+        """Sorts all points by cell once; reused by every query until the next insert."""
+        if self._built is not None:
+            return self._built
+        if self._chunks:
+            xy = np.concatenate([chunk for chunk, _ in self._chunks])
+            runs = np.concatenate([np.full(len(chunk), run_id, dtype=np.int64) for chunk, run_id in self._chunks])
+        else:
+            xy, runs = np.empty((0, 2)), np.empty(0, dtype=np.int64)
+        keys = _cell_keys(*self._cells(xy))
+        order = np.argsort(keys, kind="stable")
+        cell_keys, cell_starts, cell_counts = np.unique(keys[order], return_index=True, return_counts=True)
+        self._built = (xy[order], runs[order], cell_keys, cell_starts, cell_counts)
+        return self._built
+
+    def _pairs(self, xy, radius):
+        """
+        (query index, indexed point index) of every pair closer than radius, for one batch of
+        query points. Yields one pair of arrays per neighbouring cell offset.
+        """
+        points, _, cell_keys, cell_starts, cell_counts = self._build()
+        if len(cell_keys) == 0:
+            return
+        reach = math.ceil(radius / self.cell_size)
+        ix, iy = self._cells(xy)
+        for dx in range(-reach, reach + 1):
+            for dy in range(-reach, reach + 1):
+                keys = _cell_keys(ix + dx, iy + dy)
+                position = np.minimum(np.searchsorted(cell_keys, keys), len(cell_keys) - 1)
+                found = np.flatnonzero(cell_keys[position] == keys)
+                if not len(found):
+                    continue
+                starts, counts = cell_starts[position[found]], cell_counts[position[found]]
+                query = np.repeat(found, counts)
+                # Index of each candidate inside its cell, then inside the sorted points.
+                within_cell = np.arange(len(query)) - np.repeat(np.cumsum(counts) - counts, counts)
+                candidate = np.repeat(starts, counts) + within_cell
+                offset = xy[query] - points[candidate]
+                close = np.einsum("ij,ij->i", offset, offset) <= radius * radius
+                yield query[close], candidate[close]
+
+    def count_within(self, xy, radius, distinct_runs=True):
+        """
+        Number of indexed points (or of different runs) within radius of each query point.
+
+        Parameters:
+            xy (np.ndarray): (M, 2) query points in the same normalized units.
+            radius (float): Search radius.
+            distinct_runs (bool): Count each run once, however many of its points are near, so
+                                  the value is the number of runs that passed by.
+
+        Returns:
+            np.ndarray: (M,) int64 counts.
+        """
+        xy = np.asarray(xy, dtype=np.float64).reshape(-1, 2)
+        runs = self._build()[1]
+        counts = np.zeros(len(xy), dtype=np.int64)
+        for start in range(0, len(xy), QUERY_CHUNK):
+            batch = xy[start:start + QUERY_CHUNK]
+            pairs = list(self._pairs(batch, radius))
+            if not pairs:
+                continue
+            query = np.concatenate([q for q, _ in pairs])
+            if distinct_runs:
+                candidate = np.concatenate([c for _, c in pairs])
+                query = np.unique(query * self.run_count + runs[candidate]) // self.run_count
+            counts[start:start + len(batch)] = np.bincount(query, minlength=len(batch))
+        return counts
+
+    def _runs_per_cell(self, reach):
+        """
+        (cell keys, runs per cell): every run marks the cells it has points in and the cells up to
+        `reach` cells around them, each cell once per run.
+        """
+        if reach in self._run_cells:
+            return self._run_cells[reach]
+        points, runs = self._build()[:2]
+        runs_scale = max(self.run_count, 1)
+        # One entry per (cell, run) pair, whatever the number of points the run has in the cell.
+        # Cell keys use all 64 bits, so pairs are packed from the cells' ranks instead.
+        keys = _cell_keys(*self._cells(points))
+        cells, rank = np.unique(keys, return_inverse=True)
+        occupied = np.unique(rank * runs_scale + runs)
+        occupied_cells, occupied_runs = cells[occupied // runs_scale], occupied % runs_scale
+        cell_ix = (occupied_cells >> 32) - _KEY_OFFSET
+        cell_iy = (occupied_cells & 0xFFFFFFFF) - _KEY_OFFSET
+        spread = np.concatenate([_cell_keys(cell_ix + dx, cell_iy + dy)
+                                 for dx in range(-reach, reach + 1) for dy in range(-reach, reach + 1)])
+        spread_cells, spread_rank = np.unique(spread, return_inverse=True)
+        marked = np.unique(spread_rank * runs_scale + np.tile(occupied_runs, (2 * reach + 1) ** 2))
+        counts = np.bincount(marked // runs_scale, minlength=len(spread_cells))
+        result = self._run_cells[reach] = (spread_cells, counts)
+        return result
+
+    def run_counts(self, xy, radius):
+        """
+        Number of runs passing near each query point, in linear time: the runs with a point in
+        the cells around the query's cell. Every run within radius is counted; runs up to
+        radius plus about two cell diagonals away can be too, so use a cell size well below the
+        radius (run_densities uses radius / 2).
+
+        Returns:
+            np.ndarray: (M,) int64 counts.
+        """
+        xy = np.asarray(xy, dtype=np.float64).reshape(-1, 2)
+        cell_keys, counts = self._runs_per_cell(math.ceil(radius / self.cell_size))
+        if len(cell_keys) == 0:
+            return np.zeros(len(xy), dtype=np.int64)
+        keys = _cell_keys(*self._cells(xy))
+        position = np.minimum(np.searchsorted(cell_keys, keys), len(cell_keys) - 1)
+        return np.where(cell_keys[position] == keys, counts[position], 0)
+
+
+def run_densities(tracks, radius, cell_size=None):
+    """
+    Density of every point of every run: how many of the runs (its own included) passed near
+    it, with GridIndex.run_counts.
+
+    Parameters:
+        tracks (list of RunTrack): The runs, in one shared normalized frame.
+        radius (float): Search radius in normalized units.
+        cell_size (float): Grid cell size, defaults to radius / 2.
+
+    Returns:
+        list of np.ndarray: One (N,) count array per track.
+    """
+    index = GridIndex(cell_size or radius / 2)
+    for track in tracks:
+        index.insert(track.points[:, [0, 2]])
+    return [index.run_counts(track.points[:, [0, 2]], radius) for track in tracks]
+
+
+def density_widths(counts, max_count, hr_widths=None, mode="replace", max_width=10):
+    """
+    Turns densities into widths for set_curve_point_radiuses / curve_point_radii.
+
+    Parameters:
+        counts (np.ndarray): Per-point densities (1 means only the run itself).
+        max_count (int): Density that gets the full width, usually the largest of all runs.
+        hr_widths (np.ndarray): The run's HR widths, for mode 'modulate'.
+        mode (str): 'replace': width 0 for routes run once up to max_width for the busiest.
+                    'modulate': the HR widths scaled by count / max_count.
+        max_width (float): Width of the busiest routes in mode 'replace' (HR widths go up to 10).
+
+    Returns:
+        np.ndarray: (N,) float widths.
+    """
+    counts = np.asarray(counts, dtype=np.float64)
+    if mode == "replace":
+        return max_width * (counts - 1) / max(max_count - 1, 1)
+    if mode == "modulate":
+        if hr_widths is None:
+            raise ValueError("Mode 'modulate' needs the HR widths.")
+        return np.asarray(hr_widths, dtype=np.float64) * counts / max(max_count, 1)
+    raise ValueError(f"Unknown density mode '{mode}', use 'replace' or 'modulate'.")
@@ -0,0 +1,187 @@
+# Compact binary run files (.svrun) and a memory-mapped loader.
+#
+#   python run_binary.py myRun.json                 -> myRun.svrun next to it
+#   python run_binary.py runs/*.json -o archive/
+#
+# Layout, all little-endian:
+#   64-byte header: magic, version, header size, point count, latitude, longitude,
+#                   ttlDistance, zeroAltitude
+#   then one fixed-width column after the other, each n_points long:
+#   x, y (float64, already divided by 100 like every loader does), altitudeFromZero, pace,
+#   realDistance (float64), HR (int8).
+# Every float column starts on an 8-byte boundary, so the loader hands out NumPy views straight
+# onto the mapped file: nothing is parsed or copied, and processes loading the same file share
+# its pages through the OS page cache. NumPy only, no bpy.
+
+import argparse
+import os
+import struct
+
+import numpy as np
+
+import run_loader as loader
+
+MAGIC = b"SVRUN\0\0\0"
+VERSION = 1
+BINARY_SUFFIX = ".svrun"
+_HEADER = struct.Struct("<8sIIQdddd")
+HEADER_SIZE = 64
+
+# (result key, dtype) in file order; "xs", "ys" and "altitudes" become the points view.
+COLUMNS = (
+    ("xs", np.dtype("<f8")),
+    ("ys", np.dtype("<f8")),
+    ("altitudes", np.dtype("<f8")),
+    ("paces", np.dtype("<f8")),
+    ("real_distances", np.dtype("<f8")),
+    ("hr_widths", np.dtype("i1")),
+)
+
+
+def is_binary_run(path):
+    """True when the file starts with the .svrun magic bytes (the extension is not checked)."""
+    with open(path, "rb") as file:
+        return file.read(len(MAGIC)) == MAGIC
+
+
+def read_header(path):
+    """
+    Returns the header of a binary run as a dict: n_points, starting_coordinates
+    (latitude, longitude), ttl_distance and zero_altitude (NaN when the JSON had none).
+    """
+    with open(path, "rb") as file:
+        raw = file.read(HEADER_SIZE)
+    if len(raw) < _HEADER.size:
+        raise ValueError(f"{path} is too short to be a binary run file.")
+    magic, version, header_size, n_points, latitude, longitude, ttl_distance, zero_altitude = _HEADER.unpack_from(raw)
+    if magic != MAGIC:
+        raise ValueError(f"{path} is not a binary run file.")
+    if version != VERSION or header_size != HEADER_SIZE:
+        raise ValueError(f"{path} is binary run version {version}, this loader reads version {VERSION}.")
+    return {
+        "n_points": n_points,
+        "starting_coordinates": (latitude, longitude),
+        "ttl_distance": ttl_distance,
+        "zero_altitude": zero_altitude,
+    }
+
+
+def write_run_binary(path, starting_coordinates, ttl_distance, zero_altitude, columns):
+    """
+    Writes a binary run file.
+
+    Parameters:
+        path (str): Output file.
+        starting_coordinates (tuple): (latitude, longitude).
+        ttl_distance (float): Total distance in km.
+        zero_altitude (float): Altitude the run's altitudes are relative to, or NaN.
+        columns (dict): Every key of COLUMNS mapped to a sequence of n_points values.
+    """
+    n_points = len(columns["xs"])
+    latitude, longitude = starting_coordinates
+    temporary = path + ".tmp"
+    with open(temporary, "wb") as file:
+        header = _HEADER.pack(MAGIC, VERSION, HEADER_SIZE, n_points, latitude, longitude,
+                              ttl_distance, zero_altitude)
+        file.write(header.ljust(HEADER_SIZE, b"\0"))
+        for key, dtype in COLUMNS:
+            column = np.asarray(columns[key], dtype=dtype)
+            if len(column) != n_points:
+                raise ValueError(f"Column {key} has {len(column)} values, expected {n_points}.")
+            file.write(column.tobytes())
+    os.replace(temporary, path)
+
+
+def convert_json_run(json_path, output_path=None):
+    """
+    Converts a run JSON file (streamed, see run_loader) to a binary run file.
+
+    Returns:
+        str: The output path, <json name>.svrun by default.
+    """
+    output_path = output_path or os.path.splitext(json_path)[0] + BINARY_SUFFIX
+    # z_scale 1 keeps the raw altitudes; the points view is not written.
+    result = loader.load_run_streaming(json_path, 1.0)
+    points = result["points"]
+    write_run_binary(output_path, result["starting_coordinates"], result["ttl_distance"],
+                     result["zero_altitude"], {
+        "xs": points.xs,
+        "ys": points.ys,
+        "altitudes": result["altitudes"],
+        "paces": result["paces"],
+        "real_distances": result["real_distances"],
+        "hr_widths": result["hr_widths"],
+    })
+    return output_path
+
+
+def load_run_binary(path, z_scale):
+    """
+    Memory-maps a binary run file. Returns the same keys as `run_loader.load_run_streaming`;
+    the columns are read-only NumPy views onto the mapped file.
+
+    Parameters:
+        path (str): Path to the .svrun file.
+        z_scale (float): Multiplier applied to altitudeFromZero for the point z value.
+    """
+    header = read_header(path)
+    n_points = header["n_points"]
+    expected = HEADER_SIZE + n_points * sum(dtype.itemsize for _, dtype in COLUMNS)
+    if os.path.getsize(path) != expected:
+        raise ValueError(f"{path} should be {expected} bytes for {n_points} points, "
+                         f"it is {os.path.getsize(path)}.")
+
+    columns = {}
+    if n_points:
+        mapped = np.memmap(path, dtype=np.uint8, mode="r")
+        offset = HEADER_SIZE
+        for key, dtype in COLUMNS:
+            size = n_points * dtype.itemsize
+            columns[key] = mapped[offset:offset + size].view(dtype)
+            offset += size
+    else:
+        columns = {key: np.empty(0, dtype=dtype) for key, dtype in COLUMNS}
+
+    return {
+        "starting_coordinates": header["starting_coordinates"],
+        "ttl_distance": header["ttl_distance"],
+        "points": loader.PointColumns(columns["xs"], columns["ys"], columns["altitudes"], z_scale),
+        "hr_widths": columns["hr_widths"],
+        "real_distances": columns["real_distances"],
+        "paces": columns["paces"],
+        "altitudes": columns["altitudes"],
+        "zero_altitude": header["zero_altitude"]
+    }
+
+
+def load_run(path, z_scale):
+    """
+    Loads a run file of either format: binary runs are memory-mapped, JSON is read into typed
+    columns (streamed when large, see run_loader.load_run_columns).
+    """
+    if is_binary_run(path):
+        return load_run_binary(path, z_scale)
+    return loader.load_run_columns(path, z_scale)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Convert run JSON files to binary .svrun files.")
+    parser.add_argument("inputs", nargs="+", help="Run JSON files.")
+    parser.add_argument("-o", "--output-dir", default=None,
+                        help="Directory for the .svrun files (defaults to next to each input).")
+    args = parser.parse_args(argv)
+
+    if args.output_dir:
+        os.makedirs(args.output_dir, exist_ok=True)
+    for json_path in args.inputs:
+        output_path = None
+        if args.output_dir:
+            name = os.path.splitext(os.path.basename(json_path))[0] + BINARY_SUFFIX
+            output_path = os.path.join(args.output_dir, name)
+        output_path = convert_json_run(json_path, output_path)
+        print(f"{json_path} ({os.path.getsize(json_path) / 1e6:.2f} MB) -> "
+              f"{output_path} ({os.path.getsize(output_path) / 1e6:.2f} MB)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,197 @@
+# Composite "season" pieces: many runs merged into a few large meshes on one platform.
+# Runs are loaded and built one at a time and only their finished solids are kept, so memory
+# grows with the merged mesh, not with the parsed runs. Route density widths (see
+# route_density.py) are the exception: they need every parsed run before the first is built.
+# NumPy only, no bpy.
+
+import math
+
+import numpy as np
+
+import route_density
+import run_filters
+import run_geometry as geom
+from run_track import RunTrack
+
+LAYOUTS = ("overlay", "grid")
+
+
+class CompositeRun:
+    """One run inside a composite: its vertex and face ranges and its statistics."""
+    __slots__ = ("path", "vertex_start", "vertex_stop", "face_start", "face_stop",
+                 "ttl_distance", "ttl_gain", "avg_pace")
+
+    def __init__(self, path, vertex_start, vertex_stop, face_start, face_stop, ttl_distance, ttl_gain, avg_pace):
+        self.path = path
+        self.vertex_start = vertex_start
+        self.vertex_stop = vertex_stop
+        self.face_start = face_start
+        self.face_stop = face_stop
+        self.ttl_distance = ttl_distance
+        self.ttl_gain = ttl_gain
+        self.avg_pace = avg_pace
+
+
+class Composite:
+    """
+    Merged mesh of several runs.
+
+    vertices (V, 3) float32, faces (F, 4) int32 into vertices, and two per-vertex columns:
+    run_index (which run a vertex belongs to) and pace (the run's own 0-1 normalized pace).
+    """
+    __slots__ = ("vertices", "faces", "run_index", "pace", "runs")
+
+    def __init__(self, vertices, faces, run_index, pace, runs):
+        self.vertices = vertices
+        self.faces = faces
+        self.run_index = run_index
+        self.pace = pace
+        self.runs = runs
+
+    def __len__(self):
+        return len(self.runs)
+
+    @property
+    def ttl_distance(self):
+        return sum(run.ttl_distance for run in self.runs)
+
+    @property
+    def ttl_gain(self):
+        return sum(run.ttl_gain for run in self.runs)
+
+    @property
+    def avg_pace(self):
+        """Distance-weighted average pace of all runs (min/km)."""
+        distance = self.ttl_distance
+        if not distance:
+            return 0.0
+        return sum(run.ttl_distance * run.avg_pace for run in self.runs) / distance
+
+    def chunks(self, max_vertices):
+        """
+        Splits the composite at run boundaries into pieces of at most max_vertices vertices
+        (a single bigger run becomes its own piece). Faces are re-indexed per piece.
+        """
+        start = 0
+        while start < len(self.runs):
+            stop = start + 1
+            first = self.runs[start].vertex_start
+            while stop < len(self.runs) and self.runs[stop].vertex_stop - first <= max_vertices:
+                stop += 1
+            runs = self.runs[start:stop]
+            v0, v1 = runs[0].vertex_start, runs[-1].vertex_stop
+            f0, f1 = runs[0].face_start, runs[-1].face_stop
+            yield Composite(self.vertices[v0:v1], self.faces[f0:f1] - v0, self.run_index[v0:v1],
+                            self.pace[v0:v1], runs)
+            start = stop
+
+
+def _normalized(values):
+    values = np.asarray(values, dtype=np.float64)
+    value_range = np.ptp(values) if len(values) else 0
+    return (values - values.min()) / value_range if value_range else np.zeros_like(values)
+
+
+def _fit(vertices, size):
+    """Uniformly shrinks vertices centred on the origin so their footprint fits in size x size."""
+    extent = np.ptp(vertices[:, :2], axis=0).max() if len(vertices) else 0
+    if extent > size:
+        vertices[:, :2] *= size / extent
+
+
+def _load_tracks(run_paths, load):
+    """Yields (path, RunTrack) for every run that loads and has at least two points."""
+    for path in run_paths:
+        try:
+            track = RunTrack.from_run(load(path))
+        except (OSError, ValueError, KeyError) as error:
+            print(f"Skipping {path}: {error}")
+            continue
+        if len(track) < 2:
+            print(f"Skipping {path}: fewer than two points")
+            continue
+        yield path, track
+
+
+def build_composite(run_paths, load, layout="overlay", half_width=0.5, resolution=1, max_points=None,
+                    obj_max=300, scale_max=100, platform_size=100.0, margin=2.0, density_radius=None,
+                    density_mode="replace"):
+    """
+    Builds every run's solid and merges them.
+
+    Parameters:
+        run_paths (list of str): Run files.
+        load (callable): path -> dict in the process_run_file layout.
+        layout (str): 'overlay': all runs in one shared frame, starting at the same point and
+                      scaled together, so repeated routes stack up. 'grid': each run centred
+                      in its own cell of a square grid.
+        half_width (float): extrusion_base_xy of each run.
+        resolution (int): Bezier samples per segment.
+        max_points (int): Simplify each run (Visvalingam-Whyatt) to at most this many points,
+                          which bounds the vertices per run. None keeps every point.
+        obj_max, scale_max: The footprint mapping of helpers.resize_object.
+        platform_size (float): Width of the square platform the runs must fit on.
+        margin (float): Space kept free along the platform edges.
+        density_radius (float): Make the walls wider where more runs passed within this many
+                                normalized units (route_density.run_densities). None keeps the HR widths.
+        density_mode (str): 'replace' or 'modulate' the HR widths (route_density.density_widths).
+
+    Returns:
+        Composite: The merged runs. Runs that fail to load are skipped with a message.
+    """
+    if layout not in LAYOUTS:
+        raise ValueError(f"Unknown composite layout '{layout}', use one of {', '.join(LAYOUTS)}.")
+    usable = platform_size - 2 * margin
+    columns = max(1, math.ceil(math.sqrt(len(run_paths))))
+    cell = usable / columns
+
+    loaded = _load_tracks(run_paths, load)
+    if density_radius is not None:
+        # Densities come from the full tracks, so simplified stretches leave no gaps in the grid.
+        loaded = list(loaded)
+        densities = route_density.run_densities([track for _, track in loaded], density_radius)
+        max_count = max((int(counts.max()) for counts in densities), default=1)
+        print(f"Route density: up to {max_count} runs within {density_radius} of a point")
+
+    vertices, faces, run_index, pace, runs = [], [], [], [], []
+    vertex_count = face_count = 0
+    for path, track in loaded:
+        stats = (track.ttl_distance, track.total_gain, track.avg_pace)
+        widths = track.hr
+        if density_radius is not None:
+            widths = route_density.density_widths(densities[len(runs)], max_count, track.hr, mode=density_mode)
+        if max_points is not None and len(track) > max_points:
+            kept = run_filters.visvalingam_indices(track.points, max_points=max_points)
+            track, widths = track.take(kept), widths[kept]
+
+        run_vertices, run_faces, params = geom.build_run_solid(track.points, widths, half_width=half_width,
+                                                               resolution=resolution, center=(layout == "grid"))
+        if layout == "grid":
+            # Same footprint mapping as a single run, then shrunk into the cell if needed.
+            run_vertices = geom.resize_xy(run_vertices, obj_max=obj_max, scale_max=scale_max)
+            _fit(run_vertices, 0.9 * cell)
+            row, column = divmod(len(runs), columns)
+            run_vertices[:, 0] += -usable / 2 + (column + 0.5) * cell
+            run_vertices[:, 1] += usable / 2 - (row + 0.5) * cell
+
+        ring_pace = np.interp(params, np.arange(len(track)), _normalized(track.pace))
+        vertices.append(run_vertices.astype(np.float32))
+        faces.append(run_faces.astype(np.int32) + vertex_count)
+        run_index.append(np.full(len(run_vertices), len(runs), dtype=np.int32))
+        pace.append(np.repeat(ring_pace, 4).astype(np.float32))
+        runs.append(CompositeRun(path, vertex_count, vertex_count + len(run_vertices),
+                                 face_count, face_count + len(run_faces), *stats))
+        vertex_count += len(run_vertices)
+        face_count += len(run_faces)
+
+    if not runs:
+        raise ValueError("None of the runs could be loaded.")
+    merged = Composite(np.concatenate(vertices), np.concatenate(faces), np.concatenate(run_index),
+                       np.concatenate(pace), runs)
+    if layout == "overlay":
+        # One shared frame: centre the union of all runs and map it like a single run.
+        footprint = merged.vertices[:, :2]
+        footprint -= (footprint.min(axis=0) + footprint.max(axis=0)) / 2
+        merged.vertices = geom.resize_xy(merged.vertices, obj_max=obj_max, scale_max=scale_max).astype(np.float32)
+        _fit(merged.vertices, usable)
+    return merged
@@ -0,0 +1,221 @@
+# Blender-free export of printable StraViz models (binary STL and 3MF).
+#
+#   python run_export.py myRun.json -o myRun.stl
+#   python run_export.py myRun.json -o myRun.3mf
+#
+# The run solid comes from run_geometry (the same kernel as geometry_mode 'kernel'), and the
+# platform is the 100 x 100 x 5 block from add_platform. The vertex array is built whole (the
+# kernel needs every ring to fit the run to the platform), so memory grows with the number of
+# vertices, about 100 bytes per ring. Faces and triangles are generated, scaled and written a
+# range of rings at a time on top of that, so the triangle list (several times larger) is never
+# held in full.
+
+import argparse
+import os
+import struct
+import sys
+import time
+import zipfile
+
+import numpy as np
+
+import run_binary
+import run_geometry as geom
+import run_scaling
+import run_track
+
+# Same defaults as the globals in StraViz.py.
+Z_SCALE = 0.02
+EXTRUSION_BASE_XY = 0.5
+OBJ_MAX = 300
+SCALE_MAX = 100
+RESOLUTION = 12
+SCALING = "linear"
+SCALING_EXPONENT = 0.92
+PLATFORM_SIZE = (100.0, 100.0, 5.0)   # add_platform: default cube scaled by (50, 50, 2.5)
+
+STL_HEADER_SIZE = 80
+STL_TRIANGLE = np.dtype([("normal", "<f4", (3,)), ("vertices", "<f4", (3, 3)), ("attribute", "<u2")])
+
+_3MF_NAMESPACE = "http://schemas.microsoft.com/3dmanufacturing/core/2015/02"
+_3MF_CONTENT_TYPES = (
+    '<?xml version="1.0" encoding="UTF-8"?>\n'
+    '<Types xmlns="http://schemas.openxmlformats.org/package/2006/content-types">'
+    '<Default Extension="rels" ContentType="application/vnd.openxmlformats-package.relationships+xml"/>'
+    '<Default Extension="model" ContentType="application/vnd.ms-package.3dmanufacturing-3dmodel+xml"/>'
+    '</Types>'
+)
+_3MF_RELS = (
+    '<?xml version="1.0" encoding="UTF-8"?>\n'
+    '<Relationships xmlns="http://schemas.openxmlformats.org/package/2006/relationships">'
+    '<Relationship Target="/3D/3dmodel.model" Id="rel0" '
+    'Type="http://schemas.microsoft.com/3dmanufacturing/2013/01/3dmodel"/>'
+    '</Relationships>'
+)
+
+
+class PrintMesh:
+    """
+    A named mesh to export: vertices plus a function producing its quad faces range by range.
+
+    face_ranges() yields (F, 4) index arrays; together they cover every face exactly once.
+    """
+    __slots__ = ("name", "vertices", "face_ranges")
+
+    def __init__(self, name, vertices, face_ranges):
+        self.name = name
+        self.vertices = vertices
+        self.face_ranges = face_ranges
+
+
+def run_print_mesh(run, chunk_rings=65536, half_width=EXTRUSION_BASE_XY, obj_max=OBJ_MAX,
+                   scale_max=SCALE_MAX, resolution=RESOLUTION, scaling=SCALING, exponent=SCALING_EXPONENT):
+    """
+    The run solid for printing, built from the dict returned by process_run_file and fitted
+    to the platform with the run_scaling strategy `scaling`.
+    """
+    vertices, _ = geom.build_run_vertices(run_track.as_point_array(run["points"]), run["hr_widths"],
+                                          half_width=half_width, resolution=resolution, center=False)
+    params = run_scaling.strategy_params(scaling, obj_max=obj_max, scale_max=scale_max, exponent=exponent)
+    vertices = run_scaling.fit(vertices, scaling, **params).apply(vertices)
+    n_rings = len(vertices) // 4
+
+    def face_ranges():
+        for start in range(0, max(n_rings - 1, 1), chunk_rings):
+            yield geom.wall_faces(n_rings, start, start + chunk_rings)
+
+    return PrintMesh("Run", vertices, face_ranges)
+
+
+def platform_print_mesh(size=PLATFORM_SIZE):
+    """The platform block under the run, centred on the origin like add_platform."""
+    vertices, faces = geom.box(size)
+    return PrintMesh("Platform", vertices, lambda: iter((faces,)))
+
+
+def print_meshes(run, **kwargs):
+    """The platform and run solid, in the order they are written."""
+    return [platform_print_mesh(), run_print_mesh(run, **kwargs)]
+
+
+def write_stl(path, meshes, scale=1.0):
+    """
+    Writes all meshes into one binary STL, one chunk of triangles at a time.
+
+    The triangle count in the header is patched in at the end, so the total never has to be
+    known (or held) up front.
+
+    Parameters:
+        path (str): Output file.
+        meshes (list of PrintMesh): Meshes to write.
+        scale (float): Millimetres per model unit.
+
+    Returns:
+        int: Number of triangles written.
+    """
+    count = 0
+    with open(path, "wb") as file:
+        file.write(b"StraViz run model".ljust(STL_HEADER_SIZE, b" "))
+        file.write(struct.pack("<I", 0))
+        for mesh in meshes:
+            vertices = np.asarray(mesh.vertices, dtype=np.float64)
+            for faces in mesh.face_ranges():
+                corners = vertices[geom.triangulate(faces)] * scale
+                normals = np.cross(corners[:, 1] - corners[:, 0], corners[:, 2] - corners[:, 0])
+                lengths = np.linalg.norm(normals, axis=1, keepdims=True)
+                np.divide(normals, lengths, out=normals, where=lengths != 0)
+
+                records = np.zeros(len(corners), dtype=STL_TRIANGLE)
+                records["normal"] = normals
+                records["vertices"] = corners
+                records.tofile(file)
+                count += len(records)
+        file.seek(STL_HEADER_SIZE)
+        file.write(struct.pack("<I", count))
+    return count
+
+
+def _format_rows(template, values):
+    """Formats every row of a 2-D array with one % call for the whole block."""
+    return (template * len(values)) % tuple(values.ravel().tolist())
+
+
+def write_3mf(path, meshes, scale=1.0, chunk_rows=65536):
+    """
+    Writes the meshes as separate objects of one 3MF build, streaming the model XML into the zip.
+
+    Parameters:
+        path (str): Output file.
+        meshes (list of PrintMesh): Meshes to write.
+        scale (float): Millimetres per model unit.
+        chunk_rows (int): Vertices per formatted block.
+
+    Returns:
+        int: Number of triangles written.
+    """
+    count = 0
+    with zipfile.ZipFile(path, "w", compression=zipfile.ZIP_DEFLATED) as archive:
+        archive.writestr("[Content_Types].xml", _3MF_CONTENT_TYPES)
+        archive.writestr("_rels/.rels", _3MF_RELS)
+        with archive.open("3D/3dmodel.model", "w", force_zip64=True) as model:
+            model.write(('<?xml version="1.0" encoding="UTF-8"?>\n'
+                         f'<model unit="millimeter" xml:lang="en-US" xmlns="{_3MF_NAMESPACE}">\n'
+                         '<resources>\n').encode())
+            for object_id, mesh in enumerate(meshes, start=1):
+                vertices = np.asarray(mesh.vertices, dtype=np.float64)
+                model.write(f'<object id="{object_id}" type="model" name="{mesh.name}">\n'
+                            '<mesh>\n<vertices>\n'.encode())
+                for start in range(0, len(vertices), chunk_rows):
+                    model.write(_format_rows('<vertex x="%.5f" y="%.5f" z="%.5f"/>\n',
+                                             vertices[start:start + chunk_rows] * scale).encode())
+                model.write(b"</vertices>\n<triangles>\n")
+                for faces in mesh.face_ranges():
+                    triangles = geom.triangulate(faces)
+                    model.write(_format_rows('<triangle v1="%d" v2="%d" v3="%d"/>\n', triangles).encode())
+                    count += len(triangles)
+                model.write(b"</triangles>\n</mesh>\n</object>\n")
+            model.write(b"</resources>\n<build>\n")
+            for object_id in range(1, len(meshes) + 1):
+                model.write(f'<item objectid="{object_id}"/>\n'.encode())
+            model.write(b"</build>\n</model>\n")
+    return count
+
+
+WRITERS = {".stl": write_stl, ".3mf": write_3mf}
+
+
+def export_run(run_path, output_path, z_scale=Z_SCALE, scale=1.0, **kwargs):
+    """
+    Loads a run file and writes the platform and run solid to an STL or 3MF file,
+    picked by the output extension.
+
+    Returns:
+        int: Number of triangles written.
+    """
+    extension = os.path.splitext(output_path)[1].lower()
+    if extension not in WRITERS:
+        raise ValueError(f"Unsupported export format '{extension}', use .stl or .3mf.")
+    run = run_binary.load_run(run_path, z_scale)
+    return WRITERS[extension](output_path, print_meshes(run, **kwargs), scale=scale)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Export StraViz runs as printable STL or 3MF files.")
+    parser.add_argument("run", help="Run JSON file.")
+    parser.add_argument("-o", "--output", required=True, help="Output .stl or .3mf file.")
+    parser.add_argument("--z-scale", type=float, default=Z_SCALE, help="Altitude scale (StraViz z_scale).")
+    parser.add_argument("--scale", type=float, default=1.0, help="Millimetres per model unit.")
+    parser.add_argument("--resolution", type=int, default=RESOLUTION, help="Bezier samples per segment.")
+    parser.add_argument("--scaling", default=SCALING, choices=sorted(run_scaling.STRATEGIES),
+                        help="How the footprint is fitted to the platform (StraViz scaling_strategy).")
+    parser.add_argument("--exponent", type=float, default=SCALING_EXPONENT, help="Exponent of the 'power' scaling.")
+    args = parser.parse_args(argv)
+
+    start = time.perf_counter()
+    count = export_run(args.run, args.output, z_scale=args.z_scale, scale=args.scale,
+                       resolution=args.resolution, scaling=args.scaling, exponent=args.exponent)
+    print(f"Wrote {count} triangles to {args.output} in {time.perf_counter() - start:.2f}s")
+
+
+if __name__ == "__main__":
+    sys.exit(main())
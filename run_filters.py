@@ -0,0 +1,450 @@
+# Stages that run between loading a run and building its geometry.
+# Each one takes a RunTrack and returns a new RunTrack with every column kept aligned.
+# NumPy only, no bpy.
+
+import collections
+import heapq
+
+import numpy as np
+
+from run_track import RunTrack
+
+# Visvalingam deviation checks over at most this many points run on plain floats.
+_SHORT_SPAN = 32
+
+
+class SimplifyReport:
+    """
+    What a simplification pass did: point counts before and after, and the largest distance
+    from any dropped point to the simplified path (model units).
+    """
+    __slots__ = ("method", "points_before", "points_after", "max_deviation")
+
+    def __init__(self, method, points_before, points_after, max_deviation):
+        self.method = method
+        self.points_before = points_before
+        self.points_after = points_after
+        self.max_deviation = max_deviation
+
+    def __repr__(self):
+        return (f"SimplifyReport({self.method}: {self.points_before} -> {self.points_after} points, "
+                f"max deviation {self.max_deviation:.4f})")
+
+
+def _segment_distances(points, starts, ends):
+    """
+    Distance from each point to the segment between the matching start and end points.
+    All three arguments are (K, 3) arrays.
+    """
+    segment = ends - starts
+    length_sq = np.einsum("ij,ij->i", segment, segment)
+    offset = points - starts
+    t = np.divide(np.einsum("ij,ij->i", offset, segment), length_sq,
+                  out=np.zeros(len(points)), where=length_sq > 0)
+    closest = starts + np.clip(t, 0, 1)[:, None] * segment
+    return np.linalg.norm(points - closest, axis=1)
+
+
+def max_deviation(points, kept):
+    """
+    Largest distance from any original point to the polyline through points[kept].
+    kept must be sorted and include the first and last index.
+    """
+    points = np.asarray(points, dtype=np.float64)
+    kept = np.asarray(kept)
+    if len(kept) < 2:
+        return 0.0
+    # Each original point belongs to the kept segment that spans it.
+    segment = np.clip(np.searchsorted(kept, np.arange(len(points)), side="right") - 1, 0, len(kept) - 2)
+    distances = _segment_distances(points, points[kept[segment]], points[kept[segment + 1]])
+    return float(distances.max())
+
+
+def rdp_indices(points, tolerance):
+    """
+    Ramer-Douglas-Peucker: indices of the points to keep so that no dropped point lies further
+    than tolerance from the simplified path.
+
+    All open segments of one recursion level are split together in a single vectorized pass,
+    so the work is O(N) per level and O(N log N) for typical tracks.
+    """
+    points = np.asarray(points, dtype=np.float64)
+    n = len(points)
+    if n < 3:
+        return np.arange(n)
+
+    keep = np.zeros(n, dtype=bool)
+    keep[0] = keep[-1] = True
+    firsts = np.array([0])
+    lasts = np.array([n - 1])
+    while len(firsts):
+        open_segments = lasts - firsts >= 2
+        firsts, lasts = firsts[open_segments], lasts[open_segments]
+        if not len(firsts):
+            break
+
+        # Every inner point of every open segment, tagged with its segment.
+        counts = lasts - firsts - 1
+        segment = np.repeat(np.arange(len(firsts)), counts)
+        offsets = np.arange(counts.sum()) - np.repeat(np.cumsum(counts) - counts, counts)
+        inner = np.repeat(firsts + 1, counts) + offsets
+        distances = _segment_distances(points[inner], points[firsts[segment]], points[lasts[segment]])
+
+        # Farthest point per segment: the first inner point that reaches the segment maximum.
+        starts = np.cumsum(counts) - counts
+        farthest = np.maximum.reduceat(distances, starts)
+        at_max = np.flatnonzero(distances == farthest[segment])
+        _, first_hit = np.unique(segment[at_max], return_index=True)
+        splits = inner[at_max[first_hit]]
+
+        split_here = farthest > tolerance
+        splits = splits[split_here]
+        keep[splits] = True
+        firsts, lasts = (np.concatenate((firsts[split_here], splits)),
+                         np.concatenate((splits, lasts[split_here])))
+    return np.flatnonzero(keep)
+
+
+def _span_deviation(points, p, q):
+    """
+    Largest distance from points p+1..q-1 to the segment p-q, on plain floats: most spans
+    are a few points long, where NumPy's per-call overhead would dominate.
+    """
+    px, py, pz = points[p]
+    sx, sy, sz = points[q][0] - px, points[q][1] - py, points[q][2] - pz
+    length_sq = sx * sx + sy * sy + sz * sz
+    largest = 0.0
+    for x, y, z in points[p + 1:q]:
+        ox, oy, oz = x - px, y - py, z - pz
+        t = (ox * sx + oy * sy + oz * sz) / length_sq if length_sq > 0 else 0.0
+        t = min(max(t, 0.0), 1.0)
+        dx, dy, dz = ox - t * sx, oy - t * sy, oz - t * sz
+        largest = max(largest, dx * dx + dy * dy + dz * dz)
+    return largest ** 0.5
+
+
+def _triangle_area(points, a, b, c):
+    # Plain floats: called once per removal, where NumPy's per-call overhead would dominate.
+    ax, ay, az = points[a]
+    ux, uy, uz = (points[b][0] - ax, points[b][1] - ay, points[b][2] - az)
+    vx, vy, vz = (points[c][0] - ax, points[c][1] - ay, points[c][2] - az)
+    cx, cy, cz = uy * vz - uz * vy, uz * vx - ux * vz, ux * vy - uy * vx
+    return 0.5 * (cx * cx + cy * cy + cz * cz) ** 0.5
+
+
+def visvalingam_indices(points, tolerance=None, max_points=None):
+    """
+    Visvalingam-Whyatt: repeatedly drops the point whose triangle with its neighbours has the
+    smallest area. Either limit can be left out:
+        tolerance: a point is only dropped if every original point between its neighbours
+                   stays within tolerance of the segment joining them, the same bound as
+                   rdp_indices. Points that would break it are kept.
+        max_points: points are dropped, whatever the deviation, until at most this many remain.
+
+    Uses a heap with lazy invalidation, O(N log N) plus the deviation checks, which only touch
+    the points already dropped from the span being merged. Effective areas never decrease, so a
+    point is never kept ahead of one that was already dropped.
+    """
+    points = np.asarray(points, dtype=np.float64)
+    n = len(points)
+    if n < 3 or (tolerance is None and max_points is None):
+        return np.arange(n)
+
+    target = n if max_points is None else max(int(max_points), 2)
+
+    # Initial areas for every inner point, vectorized; the heap loop then works on plain lists.
+    initial = np.full(n, np.inf)
+    initial[1:-1] = 0.5 * np.linalg.norm(np.cross(points[1:-1] - points[:-2], points[2:] - points[:-2]), axis=1)
+    areas = initial.tolist()
+    coordinates = points.tolist()
+    prev = list(range(-1, n - 1))
+    nxt = list(range(1, n + 1))
+    alive = [True] * n
+    heap = [(areas[i], i) for i in range(1, n - 1)]
+    heapq.heapify(heap)
+
+    remaining = n
+    last_area = 0.0
+    while heap and remaining > 2:
+        area, i = heapq.heappop(heap)
+        if not alive[i] or area != areas[i]:
+            continue  # Stale entry
+        p, q = prev[i], nxt[i]
+        if remaining <= target:
+            if tolerance is None:
+                break
+            if q - p <= _SHORT_SPAN:
+                deviation = _span_deviation(coordinates, p, q)
+            else:
+                span = points[p + 1:q]
+                deviation = _segment_distances(span, np.broadcast_to(points[p], span.shape),
+                                               np.broadcast_to(points[q], span.shape)).max()
+            if deviation > tolerance:
+                continue  # Kept for now; reconsidered if a neighbour is dropped
+        last_area = max(last_area, area)
+        alive[i] = False
+        remaining -= 1
+        nxt[p] = q
+        prev[q] = p
+        for j in (p, q):
+            if 0 < j < n - 1:
+                areas[j] = max(_triangle_area(coordinates, prev[j], j, nxt[j]), last_area)
+                heapq.heappush(heap, (areas[j], j))
+    return np.flatnonzero(alive)
+
+
+def simplify_track(track, tolerance=None, method="rdp", max_points=None):
+    """
+    Simplifies a run's path, keeping HR, pace, altitude and distance aligned with the points
+    that survive.
+
+    Parameters:
+        track (RunTrack): The parsed run.
+        tolerance (float): Largest distance in model units (after the /100 and z_scale
+                           transforms) from any dropped point to the simplified path, for both
+                           methods. Visvalingam only exceeds it to meet max_points.
+        method (str): 'rdp' (Ramer-Douglas-Peucker) or 'visvalingam' (Visvalingam-Whyatt).
+        max_points (int): Visvalingam only: drop points until at most this many remain.
+
+    Returns:
+        tuple: (RunTrack, SimplifyReport)
+    """
+    if method == "rdp":
+        if tolerance is None:
+            raise ValueError("RDP simplification needs a tolerance.")
+        kept = rdp_indices(track.points, tolerance)
+    elif method == "visvalingam":
+        kept = visvalingam_indices(track.points, tolerance, max_points)
+    else:
+        raise ValueError(f"Unknown simplification method '{method}', use 'rdp' or 'visvalingam'.")
+
+    report = SimplifyReport(method, len(track), len(kept), max_deviation(track.points, kept))
+    return track.take(kept), report
+
+
+def _pchip_slopes(x, y):
+    """
+    Fritsch-Carlson slopes for monotone cubic Hermite interpolation of each column of y.
+    Monotone segments stay monotone, so HR and pace never overshoot their sampled range.
+    """
+    h = np.diff(x)[:, None]
+    delta = np.diff(y, axis=0) / h
+    slopes = np.zeros_like(y)
+    if len(x) == 2:
+        slopes[:] = delta
+        return slopes
+
+    # Weighted harmonic mean where neighbouring secants agree in sign, zero otherwise.
+    w1 = 2 * h[1:] + h[:-1]
+    w2 = h[1:] + 2 * h[:-1]
+    same_sign = delta[:-1] * delta[1:] > 0
+    with np.errstate(divide="ignore", invalid="ignore"):
+        harmonic = (w1 + w2) / (w1 / delta[:-1] + w2 / delta[1:])
+    slopes[1:-1] = np.where(same_sign, harmonic, 0.0)
+
+    # One-sided three-point estimates at the ends, limited to keep them shape-preserving.
+    for end, h0, h1, d0, d1 in ((0, h[0], h[1], delta[0], delta[1]), (-1, h[-1], h[-2], delta[-1], delta[-2])):
+        slope = ((2 * h0 + h1) * d0 - h0 * d1) / (h0 + h1)
+        slope = np.where(np.sign(slope) != np.sign(d0), 0.0, slope)
+        slope = np.where((np.sign(d0) != np.sign(d1)) & (np.abs(slope) > np.abs(3 * d0)), 3 * d0, slope)
+        slopes[end] = slope
+    return slopes
+
+
+def interpolate_columns(x, y, x_new, method="linear"):
+    """
+    Interpolates every column of y (shape (N, K)) from the sorted, strictly increasing
+    positions x to x_new, in one vectorized pass.
+
+    Parameters:
+        method (str): 'linear' or 'cubic' (monotone piecewise cubic Hermite).
+    """
+    x = np.asarray(x, dtype=np.float64)
+    y = np.asarray(y, dtype=np.float64).reshape(len(x), -1)
+    x_new = np.asarray(x_new, dtype=np.float64)
+    if len(x) < 2:
+        return np.repeat(y[:1], len(x_new), axis=0)
+
+    segment = np.clip(np.searchsorted(x, x_new, side="right") - 1, 0, len(x) - 2)
+    h = (x[segment + 1] - x[segment])[:, None]
+    t = (x_new[:, None] - x[segment][:, None]) / h
+    y0, y1 = y[segment], y[segment + 1]
+    if method == "linear":
+        return y0 + t * (y1 - y0)
+    if method != "cubic":
+        raise ValueError(f"Unknown interpolation method '{method}', use 'linear' or 'cubic'.")
+
+    slopes = _pchip_slopes(x, y)
+    m0, m1 = slopes[segment], slopes[segment + 1]
+    t2, t3 = t * t, t * t * t
+    return ((2 * t3 - 3 * t2 + 1) * y0 + (t3 - 2 * t2 + t) * h * m0
+            + (-2 * t3 + 3 * t2) * y1 + (t3 - t2) * h * m1)
+
+
+def resample_track(track, n_points=None, spacing=None, method="linear"):
+    """
+    Resamples a run at uniform arc-length positions along its 3-D path, so the point budget no
+    longer depends on how often the watch recorded.
+
+    Points, HR, pace, altitude and real distance are all interpolated at the new positions.
+    HR is rounded back to whole buckets. Stretches where the runner stood still (zero path
+    length) collapse to their first sample; a run that never moves keeps its first and last
+    points.
+
+    Parameters:
+        track (RunTrack): The parsed run.
+        n_points (int): Number of points in the result (including both ends).
+        spacing (float): Target distance between points in model units, rounded up slightly so
+                         both ends of the run are kept. Used when n_points is None.
+        method (str): 'linear' or 'cubic' interpolation.
+
+    Returns:
+        RunTrack: The resampled run.
+    """
+    if (n_points is None) == (spacing is None):
+        raise ValueError("Give exactly one of n_points or spacing.")
+
+    arc = track.arc_length
+    total = arc[-1] if len(arc) else 0.0
+    if spacing is not None:
+        if spacing <= 0:
+            raise ValueError("The spacing must be positive.")
+        n_points = int(np.floor(total / spacing)) + 1
+    n_points = max(int(n_points), 2)
+
+    # Interpolation needs strictly increasing positions.
+    moving = np.concatenate(([True], np.diff(arc) > 0))
+    if moving.sum() < 2:
+        # Nothing to spread the samples along: keep both ends so the curve and sweep still get
+        # two points (a track with fewer is returned unchanged).
+        return track.take([0, len(track) - 1]) if len(track) >= 2 else track
+
+    positions = np.linspace(0.0, total, n_points)
+    columns = np.column_stack((track.points, track.hr, track.pace, track.altitude, track.real_distance))
+    values = interpolate_columns(arc[moving], columns[moving], positions, method=method)
+
+    return RunTrack(points=values[:, 0:3],
+                    hr=np.clip(np.rint(values[:, 3]), track.hr.min(), track.hr.max()),
+                    pace=values[:, 4],
+                    altitude=values[:, 5],
+                    real_distance=values[:, 6],
+                    starting_coordinates=track.starting_coordinates,
+                    ttl_distance=track.ttl_distance,
+                    z_scale=track.z_scale)
+
+
+def savgol_coefficients(window, degree):
+    """
+    Weights of a causal Savitzky-Golay filter, oldest sample first: the value at the newest of
+    `window` samples of the least-squares polynomial of `degree` through them. Polynomials up to
+    that degree pass through unchanged, so trends (climbs, straight lines) come out without lag.
+    """
+    degree = min(degree, window - 1)
+    offsets = np.arange(1 - window, 1, dtype=np.float64)
+    return np.linalg.pinv(np.vander(offsets, degree + 1, increasing=True))[0]
+
+
+def causal_savgol(values, window=9, degree=2):
+    """
+    Causal Savitzky-Golay filter of each column of values: every output only depends on its own
+    and the window - 1 earlier samples. The first samples use the shorter windows available.
+    O(N * window), with no extra arrays beyond the result.
+
+    Parameters:
+        values (np.ndarray): (N,) or (N, K) samples.
+        window (int): Number of samples in each polynomial fit.
+        degree (int): Polynomial degree, below window.
+
+    Returns:
+        np.ndarray: Filtered values, same shape as values.
+    """
+    values = np.asarray(values, dtype=np.float64)
+    if window < 1 or degree < 0:
+        raise ValueError("The window must be at least 1 and the degree at least 0.")
+    smoothed = np.empty_like(values)
+    n = len(values)
+    for k in range(1, min(window, n + 1)):
+        smoothed[k - 1] = savgol_coefficients(k, degree) @ values[:k]
+    if n >= window:
+        windows = np.lib.stride_tricks.sliding_window_view(values, window, axis=0)
+        smoothed[window - 1:] = windows @ savgol_coefficients(window, degree)
+    return smoothed
+
+
+class CausalSavgol:
+    """
+    Streaming form of causal_savgol for points that arrive one at a time: push() returns the
+    filtered value of each new sample, keeping only the last `window` samples.
+    """
+
+    def __init__(self, window=9, degree=2):
+        self.samples = collections.deque(maxlen=window)
+        self.coefficients = [savgol_coefficients(k, degree) for k in range(1, window + 1)]
+
+    def push(self, value):
+        self.samples.append(np.asarray(value, dtype=np.float64))
+        return self.coefficients[len(self.samples) - 1] @ np.array(self.samples)
+
+
+class HysteresisGain:
+    """
+    Elevation gain that ignores wobbles smaller than `threshold` (metres).
+
+    A climb only starts counting once the altitude is threshold above the lowest point since the
+    last descent, and then counts from that low point; a descent is only confirmed once the
+    altitude drops threshold below the top of the climb. Barometer jitter inside that band adds
+    nothing, while every real climb is counted in full. Constant memory per update.
+    """
+
+    def __init__(self, threshold=2.0):
+        self.threshold = threshold
+        self.total = 0.0
+        self.climbing = False
+        self.low = self.high = None
+
+    def update(self, altitude):
+        """Feeds the next altitude and returns the gain so far."""
+        if self.low is None:
+            self.low = self.high = altitude
+        elif self.climbing:
+            if altitude > self.high:
+                self.total += altitude - self.high
+                self.high = altitude
+            elif self.high - altitude >= self.threshold:
+                self.climbing, self.low = False, altitude
+        elif altitude < self.low:
+            self.low = altitude
+        elif altitude - self.low >= self.threshold:
+            self.total += altitude - self.low
+            self.climbing, self.high = True, altitude
+        return self.total
+
+    def extend(self, altitudes):
+        """Feeds a sequence of altitudes and returns the gain so far."""
+        for altitude in np.asarray(altitudes, dtype=np.float64).tolist():
+            self.update(altitude)
+        return self.total
+
+
+def hysteresis_gain(altitudes, threshold=2.0):
+    """Total elevation gain of altitudes with HysteresisGain; threshold 0 sums every rise."""
+    return HysteresisGain(threshold).extend(altitudes)
+
+
+def smooth_track(track, window=9, degree=2):
+    """
+    Filters GPS and altitude noise out of a run with causal_savgol on the x, y, scaled altitude
+    and altitude columns. HR, pace and distances are left as recorded.
+
+    Returns:
+        RunTrack: The smoothed run, with the same number of points.
+    """
+    smoothed = causal_savgol(np.column_stack((track.points, track.altitude)), window, degree)
+    return RunTrack(points=smoothed[:, :3],
+                    hr=track.hr,
+                    pace=track.pace,
+                    altitude=smoothed[:, 3],
+                    real_distance=track.real_distance,
+                    starting_coordinates=track.starting_coordinates,
+                    ttl_distance=track.ttl_distance,
+                    z_scale=track.z_scale)
@@ -0,0 +1,325 @@
+# Array geometry for the StraViz run model.
+# Pure NumPy, no bpy: everything here returns arrays that the Blender side pushes in bulk.
+
+import numpy as np
+
+import run_scaling
+
+# Blender scales the summed unit tangents of an AUTO handle by this factor (calchandleNurb).
+AUTO_HANDLE_FACTOR = 2.5614
+# adjust_object_position moves the run up by 300 cm after setting its origin.
+LIFT = 3.0
+
+
+def bezier_auto_handles(co):
+    """
+    Computes the left and right handle positions Blender gives AUTO handles on an open spline.
+
+    Mirrors Blender's own handle calculation so the shape matches a spline built point by
+    point with handle types set to 'AUTO'. End points use a mirrored neighbour.
+
+    Parameters:
+        co (np.ndarray): (N, 3) control point positions.
+
+    Returns:
+        tuple of np.ndarray: (handle_left, handle_right), each (N, 3).
+    """
+    co = np.asarray(co, dtype=np.float64).reshape(-1, 3)
+    if len(co) < 2:
+        return co.copy(), co.copy()
+
+    prev = np.empty_like(co)
+    nxt = np.empty_like(co)
+    prev[1:] = co[:-1]
+    nxt[:-1] = co[1:]
+    prev[0] = 2 * co[0] - co[1]
+    nxt[-1] = 2 * co[-1] - co[-2]
+
+    dvec_a = co - prev
+    dvec_b = nxt - co
+    len_a = np.linalg.norm(dvec_a, axis=1)
+    len_b = np.linalg.norm(dvec_b, axis=1)
+    len_a[len_a == 0] = 1.0
+    len_b[len_b == 0] = 1.0
+
+    tvec = dvec_b / len_b[:, None] + dvec_a / len_a[:, None]
+    length = np.linalg.norm(tvec, axis=1) * AUTO_HANDLE_FACTOR
+    degenerate = length == 0
+    length[degenerate] = 1.0
+
+    handle_left = co - tvec * (len_a / length)[:, None]
+    handle_right = co + tvec * (len_b / length)[:, None]
+    # Blender leaves the handles alone when the tangent vanishes; collapse them onto the point.
+    handle_left[degenerate] = co[degenerate]
+    handle_right[degenerate] = co[degenerate]
+    return handle_left, handle_right
+
+
+def curve_point_radii(co, widths, base_radius=1.0):
+    """
+    Computes per-point radii the way `set_curve_point_radiuses` does, in one pass.
+
+    Each width is added to the base radius when the point's local direction in the curve's
+    2-D (x, z) plane is defined, and skipped where consecutive points coincide in that plane.
+
+    Parameters:
+        co (np.ndarray): (N, 3) control point positions.
+        widths (sequence of float): HR width for each point.
+        base_radius (float): Radius the points start from (Blender's default is 1.0).
+
+    Returns:
+        np.ndarray: (N,) radii.
+    """
+    co = np.asarray(co, dtype=np.float64).reshape(-1, 3)
+    widths = np.asarray(widths, dtype=np.float64)
+    if len(widths) != len(co):
+        raise ValueError("The number of widths must match the number of points in the curve.")
+    if len(co) < 2:
+        return base_radius + widths
+
+    step = np.diff(co[:, :2], axis=0)
+    has_direction = np.any(step != 0, axis=1)
+    # Point 0 looks forward to point 1, every other point looks back.
+    direction_length = np.concatenate((has_direction[:1], has_direction)).astype(np.float64)
+    return base_radius + widths * direction_length
+
+
+def sample_bezier(co, resolution):
+    """
+    Evaluates the AUTO-handle Bezier spline through co at `resolution` samples per segment,
+    like Blender does with the curve's resolution_u.
+
+    Parameters:
+        co (np.ndarray): (N, 3) control points.
+        resolution (int): Samples per segment. 1 returns the control points themselves.
+
+    Returns:
+        tuple of np.ndarray: (samples (M, 3), params (M,)) where params is the fractional control
+        point index of each sample, for interpolating per-point values with np.interp.
+    """
+    co = np.asarray(co, dtype=np.float64).reshape(-1, 3)
+    n = len(co)
+    if resolution <= 1 or n < 2:
+        return co.copy(), np.arange(n, dtype=np.float64)
+
+    handle_left, handle_right = bezier_auto_handles(co)
+    t = np.arange(resolution, dtype=np.float64) / resolution
+    # Cubic Bernstein weights, shape (resolution, 4)
+    weights = np.stack(((1 - t) ** 3, 3 * (1 - t) ** 2 * t, 3 * (1 - t) * t ** 2, t ** 3), axis=1)
+    # Control polygons of every segment, shape (n - 1, 4, 3)
+    segments = np.stack((co[:-1], handle_right[:-1], handle_left[1:], co[1:]), axis=1)
+    samples = np.einsum("rk,skd->srd", weights, segments).reshape(-1, 3)
+
+    samples = np.vstack((samples, co[-1:]))
+    params = (np.arange(n - 1)[:, None] + t[None, :]).ravel()
+    params = np.append(params, n - 1.0)
+    return samples, params
+
+
+def track_to_world(points):
+    """
+    Converts (x, z, y) curve-local points to world (x, y, z) coordinates.
+
+    The curve object is rotated 90 degrees about X in main(), which maps local (x, z, y)
+    to world (x, -y, z); the kernel builds directly in world space instead.
+    """
+    points = np.asarray(points, dtype=np.float64).reshape(-1, 3)
+    return np.column_stack((points[:, 0], -points[:, 2], points[:, 1]))
+
+
+def horizontal_normals(centers):
+    """
+    Unit normals in the XY plane, pointing left of the direction of travel.
+
+    The tangent at each point is the central difference of its neighbours. Points where the
+    tangent vanishes (the runner stood still) reuse the nearest previous valid normal.
+    """
+    xy = np.asarray(centers, dtype=np.float64)[:, :2]
+    n = len(xy)
+    if n < 2:
+        return np.tile([0.0, 1.0], (n, 1))
+
+    tangent = np.empty_like(xy)
+    tangent[1:-1] = xy[2:] - xy[:-2]
+    tangent[0] = xy[1] - xy[0]
+    tangent[-1] = xy[-1] - xy[-2]
+    length = np.linalg.norm(tangent, axis=1)
+    valid = length > 0
+    if not valid.any():
+        return np.tile([0.0, 1.0], (n, 1))
+
+    # Forward fill invalid tangents, then back fill any leading ones.
+    source = np.where(valid, np.arange(n), -1)
+    source = np.maximum.accumulate(source)
+    source[source < 0] = np.argmax(valid)
+    tangent = tangent[source] / length[source][:, None]
+    return np.column_stack((-tangent[:, 1], tangent[:, 0]))
+
+
+def sweep_wall(centers, half_widths, base_z, faces=True, depth=None):
+    """
+    Sweeps a rectangular section along the centre line: a top edge of width 2 * half_width at
+    each centre's height, running straight down to base_z (or `depth` below the top where that
+    is higher, like an extrusion that stops short of the base). The result is a closed solid.
+
+    Each centre contributes a ring of 4 vertices (top-left, top-right, bottom-right,
+    bottom-left). Faces are quads with outward winding, including both end caps.
+
+    Parameters:
+        centers (np.ndarray): (N, 3) world-space centre line, N >= 2.
+        half_widths (np.ndarray): (N,) half of the wall thickness at each centre.
+        base_z (float): Height of the base plane the wall is clipped at.
+        faces (bool): Whether to build the face array (None is returned in its place otherwise).
+        depth (float): Height of the wall before clipping; None runs every wall down to base_z.
+
+    Returns:
+        tuple of np.ndarray: (vertices (4N, 3) float64, faces (4(N-1)+2, 4) int64)
+    """
+    centers = np.asarray(centers, dtype=np.float64).reshape(-1, 3)
+    half_widths = np.asarray(half_widths, dtype=np.float64)
+    n = len(centers)
+    if n < 2:
+        raise ValueError("At least two points are needed to sweep the run.")
+
+    offset = horizontal_normals(centers) * half_widths[:, None]
+    top = np.maximum(centers[:, 2], base_z)  # Anything under the base plane is clipped away
+    bottom = np.full(n, float(base_z)) if depth is None else np.maximum(centers[:, 2] - depth, base_z)
+
+    vertices = np.empty((n, 4, 3), dtype=np.float64)
+    vertices[:, 0, :2] = centers[:, :2] + offset
+    vertices[:, 1, :2] = centers[:, :2] - offset
+    vertices[:, 2, :2] = vertices[:, 1, :2]
+    vertices[:, 3, :2] = vertices[:, 0, :2]
+    vertices[:, :2, 2] = top[:, None]
+    vertices[:, 2:, 2] = bottom[:, None]
+    return vertices.reshape(-1, 3), wall_faces(n) if faces else None
+
+
+def wall_faces(n_rings, start=0, stop=None):
+    """
+    Quad faces of a swept wall with n_rings rings of 4 vertices, for the segments
+    start..stop-1 (all of them by default). The end caps are included when the range
+    touches the first or last ring, so consecutive ranges tile the whole wall exactly once.
+
+    Returns:
+        np.ndarray: (F, 4) int64 vertex indices into the full vertex array.
+    """
+    stop = n_rings - 1 if stop is None else min(stop, n_rings - 1)
+    ring = np.arange(start, stop)[:, None] * 4
+    k = np.arange(4)
+    k1 = (k + 1) % 4
+    # Side quads (a+k, a+k1, b+k1, b+k) for every segment a -> b and every section edge k.
+    faces = [np.stack((ring + k, ring + k1, ring + 4 + k1, ring + 4 + k), axis=2).reshape(-1, 4)]
+    if start == 0:
+        faces.insert(0, np.array([[3, 2, 1, 0]]))
+    if stop == n_rings - 1:
+        last = 4 * (n_rings - 1)
+        faces.append(np.array([[last, last + 1, last + 2, last + 3]]))
+    return np.vstack(faces).astype(np.int64)
+
+
+def triangulate(faces):
+    """Splits (F, 4) quads into (2F, 3) triangles with the same winding."""
+    faces = np.asarray(faces)
+    return np.stack((faces[:, [0, 1, 2]], faces[:, [0, 2, 3]]), axis=1).reshape(-1, 3)
+
+
+def box(size, center=(0.0, 0.0, 0.0)):
+    """
+    An axis-aligned box as (8, 3) vertices and (6, 4) outward-wound quads.
+    Matches a Blender default cube scaled to `size` (full edge lengths).
+    """
+    half = np.asarray(size, dtype=np.float64) / 2
+    corners = np.array([[-1, -1, -1], [1, -1, -1], [1, 1, -1], [-1, 1, -1],
+                        [-1, -1, 1], [1, -1, 1], [1, 1, 1], [-1, 1, 1]], dtype=np.float64)
+    vertices = corners * half + np.asarray(center, dtype=np.float64)
+    faces = np.array([[0, 3, 2, 1], [4, 5, 6, 7], [0, 1, 5, 4],
+                      [1, 2, 6, 5], [2, 3, 7, 6], [3, 0, 4, 7]], dtype=np.int64)
+    return vertices, faces
+
+
+def build_run_vertices(points, widths, half_width=0.5, resolution=1, base_z=2.5, lift=LIFT, extrusion_scale=2.0,
+                       center=True):
+    """
+    The vertex half of build_run_solid: (vertices (4M, 3), params (M,)) without the faces,
+    which wall_faces can produce range by range when the mesh is streamed out.
+    """
+    vertices, _, params = _build_run_solid(points, widths, half_width, resolution, base_z, lift,
+                                           extrusion_scale, faces=False, center=center)
+    return vertices, params
+
+
+def build_run_solid(points, widths, half_width=0.5, resolution=1, base_z=2.5, lift=LIFT, extrusion_scale=2.0,
+                    center=True):
+    """
+    Builds the finished run solid directly from the parsed points, without the curve convert,
+    extrude and boolean steps.
+
+    Mirrors the operator pipeline in main(): HR-scaled radii (curve_point_radii) times
+    half_width give the wall thickness, the wall is extruded down by extrusion_scale times
+    the highest point, the whole solid is moved up by `lift` (origin_set only moves the
+    origin, so adjust_object_position shifts the geometry by exactly that much), the
+    footprint is centred on the origin, and everything below base_z (the platform top) is
+    cut off.
+
+    Parameters:
+        points: (N, 3) points in (x, z, y) order, as from process_run_file.
+        widths: (N,) HR widths.
+        half_width (float): extrusion_base_xy of the curve.
+        resolution (int): Bezier samples per segment (the curve's resolution_u); 1 is a polyline.
+        base_z (float): Height of the base plane (top of the platform).
+        lift (float): World z offset added to the track heights.
+        extrusion_scale (float): Extrusion depth as a multiple of the highest point.
+        center (bool): Centre the footprint on the origin. False keeps the run's own x/y frame
+                       (the start at the origin), so several runs can share one frame.
+
+    Returns:
+        tuple of np.ndarray: (vertices (4M, 3), faces (F, 4), params (M,)) where params is the
+        fractional track point index of each vertex ring, for mapping per-point attributes.
+    """
+    return _build_run_solid(points, widths, half_width, resolution, base_z, lift, extrusion_scale, faces=True,
+                            center=center)
+
+
+def _build_run_solid(points, widths, half_width, resolution, base_z, lift, extrusion_scale, faces, center=True):
+    co = np.asarray(points, dtype=np.float64).reshape(-1, 3)
+    radii = curve_point_radii(co, widths)
+    samples, params = sample_bezier(co, resolution)
+    half_widths = half_width * np.interp(params, np.arange(len(co)), radii)
+
+    centers = track_to_world(samples)
+    centers[:, 2] += lift
+    depth = extrusion_scale * co[:, 1].max() if len(co) else 0.0
+
+    vertices, wall = sweep_wall(centers, half_widths, base_z, faces=faces, depth=depth)
+    if center:
+        # Centre the footprint on the origin, like origin_set(ORIGIN_GEOMETRY) + snapping to the cursor.
+        footprint_min = vertices[:, :2].min(axis=0)
+        footprint_max = vertices[:, :2].max(axis=0)
+        vertices[:, :2] -= (footprint_min + footprint_max) / 2
+    return vertices, wall, params
+
+
+def footprint_transform(vertices, obj_max, scale_max):
+    """
+    The centring and resize_xy mapping of an uncentred solid (center=False) as a transform:
+    (vertices[:, :2] - center) * factors equals build_run_solid + resize_xy.
+
+    Returns:
+        tuple of np.ndarray: (center (2,), factors (2,))
+    """
+    fitted = run_scaling.fit(vertices, "linear", obj_max=obj_max, scale_max=scale_max)
+    return fitted.center, fitted.factors
+
+
+def resize_xy(vertices, obj_max, scale_max):
+    """
+    Applies helpers.resize_object's footprint mapping to vertices centred on the origin.
+
+    Each horizontal extent d becomes 1 + (d - 1) / (obj_max - 1) * (scale_max - 1)
+    (run_scaling.linear). Returns a new array; heights are unchanged.
+    """
+    vertices = np.array(vertices, dtype=np.float64, copy=True)
+    fitted = run_scaling.fit(vertices, "linear", obj_max=obj_max, scale_max=scale_max)
+    vertices[:, :2] *= fitted.factors
+    return vertices
@@ -0,0 +1,514 @@
+# Imports GPX, TCX and FIT activity files into StraViz runs, without the iPhone app.
+#
+#   python run_import.py archive/*.gpx archive/*.fit -o runs/
+#   python run_import.py ride.tcx -o runs/ --format svrun --interval 0
+#
+# The files are read incrementally (iterparse for GPX/TCX, record by record for FIT) into flat
+# columns, then normalized the way the app's creatRawData + create_NormalizedWorkoutData +
+# removeClosePoints do it, with NumPy over whole arrays:
+#   - one sample every 5 minutes: the first location at least 5 minutes after the previous
+#     one, the HR average per 5-minute clock bucket and the distance sum per 5-minute bucket
+#     from the start, paired up by index
+#   - HR clamped to 130-175 bpm and mapped to 0-10 (truncated like Swift's Int())
+#   - equirectangular x/y in metres from the first sample (earth radius 6371000 m)
+#   - altitude as Int minus the truncated minimum altitude
+#   - points closer than 100 m to an already kept point dropped
+# NumPy only, no bpy.
+
+import argparse
+import json
+import math
+import os
+import struct
+import xml.etree.ElementTree as ElementTree
+from array import array
+from datetime import datetime, timezone
+
+import numpy as np
+
+import run_binary
+from run_loader import PointColumns, HR_TYPECODE
+
+EARTH_RADIUS = 6371000.0    # Metres, as in Conversions.swift
+HR_RANGE = (130.0, 175.0)   # bpm clamped and mapped to 0-10
+HR_BUCKETS = 10
+SAMPLE_INTERVAL = 300.0     # Seconds between samples, the app's 5-minute HealthKit queries
+MIN_POINT_DISTANCE = 100.0  # Metres, the app's removeClosePoints(minDistance:)
+ACTIVITY_SUFFIXES = (".gpx", ".tcx", ".fit")
+
+FIT_EPOCH = 631065600       # 1989-12-31T00:00:00Z in Unix seconds
+_SEMICIRCLES = 180.0 / 2 ** 31
+
+
+class ActivityColumns:
+    """
+    Raw per-record columns of an activity file. Missing values are NaN; distance is the
+    device's cumulative distance in metres when the file has one.
+    """
+    __slots__ = ("time", "latitude", "longitude", "altitude", "hr", "distance")
+
+    def __init__(self):
+        for name in self.__slots__:
+            setattr(self, name, array("d"))
+
+    def append(self, time, latitude, longitude, altitude=math.nan, hr=math.nan, distance=math.nan):
+        self.time.append(time)
+        self.latitude.append(latitude)
+        self.longitude.append(longitude)
+        self.altitude.append(altitude)
+        self.hr.append(hr)
+        self.distance.append(distance)
+
+    def __len__(self):
+        return len(self.time)
+
+    def arrays(self):
+        """The columns as NumPy arrays (views, no copy), keyed by name."""
+        return {name: np.frombuffer(getattr(self, name), dtype=np.float64) if len(self) else np.empty(0)
+                for name in self.__slots__}
+
+
+def _parse_time(text):
+    if not text:
+        return math.nan
+    moment = datetime.fromisoformat(text.strip().replace("Z", "+00:00"))
+    if moment.tzinfo is None:
+        moment = moment.replace(tzinfo=timezone.utc)
+    return moment.timestamp()
+
+
+def _number(text):
+    try:
+        return float(text)
+    except (TypeError, ValueError):
+        return math.nan
+
+
+def _local(tag):
+    """Tag name without its XML namespace."""
+    return tag.rpartition("}")[2]
+
+
+def _iter_elements(path, name):
+    """
+    Yields every finished <name> element (any namespace) of an XML file, then detaches it from
+    its parent, so memory stays flat however long the track is.
+    """
+    parents = []
+    for event, element in ElementTree.iterparse(path, events=("start", "end")):
+        if event == "start":
+            parents.append(element)
+            continue
+        parents.pop()
+        if _local(element.tag) == name:
+            yield element
+            if parents:
+                parents[-1].remove(element)
+
+
+def read_gpx(path):
+    """Reads every <trkpt> of a GPX file. Heart rate comes from any <...:hr> extension element."""
+    columns = ActivityColumns()
+    for element in _iter_elements(path, "trkpt"):
+        values = {}
+        for child in element.iter():
+            name = _local(child.tag)
+            if name in ("ele", "time", "hr"):
+                values[name] = child.text
+        columns.append(_parse_time(values.get("time")), _number(element.get("lat")), _number(element.get("lon")),
+                       _number(values.get("ele")), _number(values.get("hr")))
+    return columns
+
+
+def read_tcx(path):
+    """Reads every <Trackpoint> of a TCX file, including its cumulative DistanceMeters."""
+    columns = ActivityColumns()
+    for element in _iter_elements(path, "Trackpoint"):
+        values = {}
+        for child in element.iter():
+            name = _local(child.tag)
+            if name == "HeartRateBpm":
+                continue  # Its number is in the <Value> child
+            values.setdefault("HeartRateBpm" if name == "Value" else name, child.text)
+        if "LatitudeDegrees" in values:
+            columns.append(_parse_time(values.get("Time")), _number(values["LatitudeDegrees"]),
+                           _number(values.get("LongitudeDegrees")), _number(values.get("AltitudeMeters")),
+                           _number(values.get("HeartRateBpm")), _number(values.get("DistanceMeters")))
+    return columns
+
+
+# FIT "record" message (global number 20) fields: number -> (name, struct code, invalid, scale, offset)
+_FIT_RECORD = 20
+_FIT_FIELDS = {
+    253: ("time", "I", 0xFFFFFFFF, 1, 0),
+    0: ("latitude", "i", 0x7FFFFFFF, 1 / _SEMICIRCLES, 0),
+    1: ("longitude", "i", 0x7FFFFFFF, 1 / _SEMICIRCLES, 0),
+    2: ("altitude", "H", 0xFFFF, 5, 500),
+    78: ("enhanced_altitude", "I", 0xFFFFFFFF, 5, 500),
+    3: ("hr", "B", 0xFF, 1, 0),
+    5: ("distance", "I", 0xFFFFFFFF, 100, 0),
+}
+
+
+class _FitDefinition:
+    """Decoder for one local message type: a struct over the whole message plus field slots."""
+    __slots__ = ("global_number", "struct", "fields")
+
+    def __init__(self, global_number, big_endian, field_defs, developer_size):
+        self.global_number = global_number
+        codes = [">" if big_endian else "<"]
+        self.fields = []
+        for number, size, _ in field_defs:
+            known = _FIT_FIELDS.get(number)
+            if known and struct.calcsize(known[1]) == size and (global_number == _FIT_RECORD or number == 253):
+                self.fields.append((len(self.fields), known))
+                codes.append(known[1])
+            else:
+                codes.append(f"{size}x")
+        if developer_size:
+            codes.append(f"{developer_size}x")
+        self.struct = struct.Struct("".join(codes))
+
+
+def _read_exact(file, size):
+    """Reads exactly size bytes; a FIT file that ends early is a ValueError like any other bad file."""
+    data = file.read(size)
+    if len(data) != size:
+        raise ValueError(f"{file.name} is truncated.")
+    return data
+
+
+def read_fit(path):
+    """
+    Decodes the record messages of a FIT file one message at a time, so only the current
+    message is held in memory. Chained FIT files are read one after the other.
+    """
+    columns = ActivityColumns()
+    with open(path, "rb", buffering=1 << 16) as file:
+        while True:
+            header = file.read(1)
+            if not header:
+                break
+            header_size = header[0]
+            rest = file.read(header_size - 1)
+            if len(rest) < 11 or rest[7:11] != b".FIT":
+                raise ValueError(f"{path} is not a FIT file.")
+            data_size = struct.unpack_from("<I", rest, 3)[0]
+            _read_fit_messages(file, data_size, columns)
+            file.read(2)  # File CRC, not checked: the records are complete without it
+    return columns
+
+
+def _read_fit_messages(file, data_size, columns):
+    definitions = {}
+    last_time = 0
+    remaining = data_size
+    while remaining > 0:
+        record_header = _read_exact(file, 1)[0]
+        remaining -= 1
+        if record_header & 0x80:
+            # Compressed timestamp header: 5-bit offset from the last full timestamp.
+            local = (record_header >> 5) & 0x03
+            offset = record_header & 0x1F
+            last_time = (last_time & ~0x1F) + offset + (0x20 if offset < (last_time & 0x1F) else 0)
+            timestamp = last_time
+        elif record_header & 0x40:
+            fixed = _read_exact(file, 5)
+            big_endian = fixed[1] == 1
+            global_number = struct.unpack_from(">H" if big_endian else "<H", fixed, 2)[0]
+            raw_fields = _read_exact(file, 3 * fixed[4])
+            field_defs = [tuple(raw_fields[i:i + 3]) for i in range(0, len(raw_fields), 3)]
+            remaining -= 5 + len(raw_fields)
+            developer_size = 0
+            if record_header & 0x20:
+                count = _read_exact(file, 1)[0]
+                raw_developer = _read_exact(file, 3 * count)
+                developer_size = sum(raw_developer[i + 1] for i in range(0, len(raw_developer), 3))
+                remaining -= 1 + len(raw_developer)
+            definitions[record_header & 0x0F] = _FitDefinition(global_number, big_endian, field_defs, developer_size)
+            continue
+        else:
+            local = record_header & 0x0F
+            timestamp = None
+
+        definition = definitions.get(local)
+        if definition is None:
+            raise ValueError(f"{file.name} uses local message type {local} before defining it.")
+        message = _read_exact(file, definition.struct.size)
+        remaining -= definition.struct.size
+        values = definition.struct.unpack(message)
+        decoded = {}
+        for index, (name, _, invalid, scale, offset) in definition.fields:
+            if values[index] != invalid:
+                decoded[name] = values[index] / scale - offset
+        if "time" in decoded:
+            last_time = int(decoded["time"])
+        elif timestamp is not None:
+            decoded["time"] = timestamp
+        if definition.global_number == _FIT_RECORD and "latitude" in decoded and "longitude" in decoded:
+            columns.append(decoded.get("time", math.nan) + FIT_EPOCH,
+                           decoded["latitude"], decoded["longitude"],
+                           decoded.get("enhanced_altitude", decoded.get("altitude", math.nan)),
+                           decoded.get("hr", math.nan), decoded.get("distance", math.nan))
+
+
+READERS = {".gpx": read_gpx, ".tcx": read_tcx, ".fit": read_fit}
+
+
+def read_activity(path):
+    """Reads an activity file into ActivityColumns, picking the reader by extension."""
+    extension = os.path.splitext(path)[1].lower()
+    if extension not in READERS:
+        raise ValueError(f"Unsupported activity file '{extension}', use .gpx, .tcx or .fit.")
+    return READERS[extension](path)
+
+
+def haversine(lat1, lon1, lat2, lon2):
+    """Great-circle distance in metres between arrays of points in degrees."""
+    lat1, lon1, lat2, lon2 = (np.radians(value) for value in (lat1, lon1, lat2, lon2))
+    a = np.sin((lat2 - lat1) / 2) ** 2 + np.cos(lat1) * np.cos(lat2) * np.sin((lon2 - lon1) / 2) ** 2
+    return EARTH_RADIUS * 2 * np.arctan2(np.sqrt(a), np.sqrt(1 - a))
+
+
+def gcs_to_cartesian(start_latitude, start_longitude, latitudes, longitudes):
+    """Equirectangular x/y in metres from the start, as convertGCStoCartesian."""
+    start_lat, start_lon = math.radians(start_latitude), math.radians(start_longitude)
+    lat, lon = np.radians(latitudes), np.radians(longitudes)
+    x = EARTH_RADIUS * (lon - start_lon) * np.cos((start_lat + lat) / 2)
+    y = EARTH_RADIUS * (lat - start_lat)
+    return x, y
+
+
+def normalize_hr(hr):
+    """bpm -> 0-10 bucket: clamped to HR_RANGE, mapped linearly and truncated."""
+    low, high = HR_RANGE
+    return np.trunc((np.clip(hr, low, high) - low) / (high - low) * HR_BUCKETS).astype(np.int8)
+
+
+def _segment_distances(columns):
+    """Metres covered by each record since the previous one, from the device distance if any."""
+    n = len(columns["time"])
+    steps = np.zeros(n)
+    if n < 2:
+        return steps
+    device = columns["distance"]
+    if np.isfinite(device).sum() >= 2:
+        # Forward-fill gaps so a missing value does not lose the distance around it.
+        known = np.flatnonzero(np.isfinite(device))
+        filled = np.interp(np.arange(n), known, device[known])
+        steps[1:] = np.maximum(np.diff(filled), 0)
+    else:
+        steps[1:] = haversine(columns["latitude"][:-1], columns["longitude"][:-1],
+                              columns["latitude"][1:], columns["longitude"][1:])
+    return steps
+
+
+def _fill_altitudes(columns):
+    """
+    Altitude of every record, with gaps interpolated between the neighbouring known altitudes
+    (by time when every record has one, else by record order). Only a track without any
+    altitude becomes flat at 0.
+    """
+    altitude = columns["altitude"]
+    known = np.isfinite(altitude)
+    if known.all():
+        return altitude
+    if not known.any():
+        return np.zeros_like(altitude)
+    times = columns["time"]
+    position = times if np.isfinite(times).all() else np.arange(len(altitude), dtype=np.float64)
+    return np.interp(position, position[known], altitude[known])
+
+
+def _location_samples(times, interval):
+    """Indices of the first record and then the first at least `interval` seconds after the last kept one."""
+    kept = [0]
+    while True:
+        nxt = int(np.searchsorted(times, times[kept[-1]] + interval, side="left"))
+        if nxt >= len(times):
+            return np.array(kept)
+        kept.append(nxt)
+
+
+def remove_close_points(x, y, min_distance=MIN_POINT_DISTANCE):
+    """
+    Indices kept by the app's removeClosePoints: the first and last point, and every point at
+    least min_distance from all points kept before it. A grid of min_distance cells limits each
+    check to the 3x3 neighbouring cells instead of every kept point.
+    """
+    n = len(x)
+    if n <= 2 or min_distance <= 0:
+        return np.arange(n)
+    cells = {}
+    kept = [0]
+    min_sq = min_distance * min_distance
+    cell_x = np.floor(x / min_distance).astype(np.int64).tolist()
+    cell_y = np.floor(y / min_distance).astype(np.int64).tolist()
+    xs, ys = x.tolist(), y.tolist()
+    cells.setdefault((cell_x[0], cell_y[0]), []).append(0)
+    for i in range(1, n - 1):
+        cx, cy = cell_x[i], cell_y[i]
+        far_enough = True
+        for dx in (-1, 0, 1):
+            for dy in (-1, 0, 1):
+                for j in cells.get((cx + dx, cy + dy), ()):
+                    if (xs[i] - xs[j]) ** 2 + (ys[i] - ys[j]) ** 2 < min_sq:
+                        far_enough = False
+                        break
+                if not far_enough:
+                    break
+            if not far_enough:
+                break
+        if far_enough:
+            kept.append(i)
+            cells.setdefault((cx, cy), []).append(i)
+    kept.append(n - 1)
+    return np.array(kept)
+
+
+def normalize_activity(activity, z_scale, interval=SAMPLE_INTERVAL, min_distance=MIN_POINT_DISTANCE):
+    """
+    Turns raw activity columns into a normalized run.
+
+    Parameters:
+        activity (ActivityColumns): Records from read_activity.
+        z_scale (float): Multiplier applied to altitudeFromZero for the point z value.
+        interval (float): Seconds per sample, 300 like the app. 0 or None keeps every record,
+                          with pace and distance measured from the previous record.
+        min_distance (float): Drop points closer than this (metres) to a kept point. 0 keeps all.
+
+    Returns:
+        dict: The structure process_run_file returns, plus zero_altitude.
+    """
+    columns = activity.arrays()
+    order = np.argsort(columns["time"], kind="stable")
+    if not np.all(order == np.arange(len(order))):
+        columns = {name: values[order] for name, values in columns.items()}
+    if len(columns["time"]) == 0:
+        raise ValueError("The activity has no located records.")
+    times = columns["time"]
+    steps = _segment_distances(columns)
+    hr = columns["hr"]
+    if not np.isfinite(hr).any():
+        print("No heart rate in the activity, every point gets the lowest HR width")
+        hr = np.full_like(hr, HR_RANGE[0])
+
+    if interval:
+        if not np.isfinite(times).all():
+            raise ValueError("Sampling by time needs a timestamp on every record, use interval=0.")
+        locations = _location_samples(times, interval)
+
+        # HR: discrete average per clock-aligned bucket, only buckets with samples (HealthKit).
+        valid_hr = np.isfinite(hr)
+        hr_bucket = np.floor(times[valid_hr] / interval).astype(np.int64)
+        hr_keys, hr_inverse = np.unique(hr_bucket, return_inverse=True)
+        hr_samples = np.bincount(hr_inverse, weights=hr[valid_hr]) / np.bincount(hr_inverse)
+
+        # Distance: cumulative sum per bucket anchored at the start; pace over the whole bucket.
+        distance_bucket = np.floor((times - times[0]) / interval).astype(np.int64)
+        distance_keys, distance_inverse = np.unique(distance_bucket, return_inverse=True)
+        distances = np.bincount(distance_inverse, weights=steps) / 1000
+        paces = distances / (interval / 60)
+
+        count = min(len(locations), len(hr_samples), len(distances))
+        locations = locations[:count]
+        hr_values, distances, paces = hr_samples[:count], distances[:count], paces[:count]
+    else:
+        locations = np.arange(len(times))
+        hr_values = np.interp(times, times[np.isfinite(hr)], hr[np.isfinite(hr)]) \
+            if np.isfinite(times).all() else np.nan_to_num(hr, nan=HR_RANGE[0])
+        distances = steps / 1000
+        elapsed = np.diff(times, prepend=times[0]) / 60
+        paces = np.divide(distances, elapsed, out=np.zeros_like(distances), where=elapsed > 0)
+
+    latitudes = columns["latitude"][locations]
+    longitudes = columns["longitude"][locations]
+    ttl_distance = float(distances.sum())
+
+    # The app keeps altitudes as Float and subtracts Int(minimum) from Int(altitude).
+    altitudes = np.trunc(_fill_altitudes(columns)[locations].astype(np.float32)).astype(np.int64)
+    zero_altitude = int(altitudes.min())
+    x, y = gcs_to_cartesian(latitudes[0], longitudes[0], latitudes, longitudes)
+    keep = remove_close_points(x, y, min_distance)
+    altitudes = (altitudes[keep] - zero_altitude).astype(np.float64)
+
+    return {
+        "starting_coordinates": (float(latitudes[0]), float(longitudes[0])),
+        "ttl_distance": ttl_distance,
+        "points": PointColumns(x[keep] / 100, y[keep] / 100, altitudes, z_scale),
+        # creatRawData truncates the average HR to Int before it is clamped and mapped.
+        "hr_widths": array(HR_TYPECODE, normalize_hr(np.trunc(hr_values[keep])).tobytes()),
+        "real_distances": distances[keep],
+        "paces": paces[keep],
+        "altitudes": altitudes,
+        "zero_altitude": zero_altitude,
+    }
+
+
+def load_activity(path, z_scale, **kwargs):
+    """read_activity + normalize_activity: an activity file in the process_run_file structure."""
+    return normalize_activity(read_activity(path), z_scale, **kwargs)
+
+
+def write_run_json(path, run):
+    """Writes a normalized run in the app's JSON layout (the layout of testRun.json)."""
+    points = run["points"]
+    latitude, longitude = run["starting_coordinates"]
+    with open(path, "w") as file:
+        file.write(f'{{\n "startingCoordinates" : {json.dumps({"longitude": longitude, "latitude": latitude})},\n'
+                   f' "ttlDistance" : {run["ttl_distance"]!r},\n "zeroAltitude" : {run["zero_altitude"]},\n'
+                   f' "normPoints" : [\n')
+        for i in range(len(points)):
+            entry = {
+                "altitudeFromZero": int(run["altitudes"][i]),
+                "pace": float(run["paces"][i]),
+                "HR": int(run["hr_widths"][i]),
+                "coordinates": {"y": float(points.ys[i]) * 100, "x": float(points.xs[i]) * 100},
+                "realDistance": float(run["real_distances"][i]),
+            }
+            file.write(json.dumps(entry))
+            file.write(",\n" if i < len(points) - 1 else "\n")
+        file.write(" ]\n}\n")
+
+
+def write_run(path, run):
+    """Writes a normalized run as JSON or as a binary .svrun file, picked by the extension."""
+    if path.endswith(run_binary.BINARY_SUFFIX):
+        points = run["points"]
+        run_binary.write_run_binary(path, run["starting_coordinates"], run["ttl_distance"], run["zero_altitude"], {
+            "xs": points.xs, "ys": points.ys, "altitudes": run["altitudes"], "paces": run["paces"],
+            "real_distances": run["real_distances"], "hr_widths": run["hr_widths"],
+        })
+    else:
+        write_run_json(path, run)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Import GPX, TCX and FIT files as StraViz runs.")
+    parser.add_argument("inputs", nargs="+", help="Activity files.")
+    parser.add_argument("-o", "--output-dir", required=True, help="Directory for the run files.")
+    parser.add_argument("--format", choices=("json", "svrun"), default="json", help="Output format.")
+    parser.add_argument("--interval", type=float, default=SAMPLE_INTERVAL,
+                        help="Seconds per sample like the app (0 keeps every record).")
+    parser.add_argument("--min-distance", type=float, default=MIN_POINT_DISTANCE,
+                        help="Drop points closer than this many metres to a kept point (0 keeps all).")
+    args = parser.parse_args(argv)
+
+    os.makedirs(args.output_dir, exist_ok=True)
+    failures = 0
+    for path in args.inputs:
+        name = os.path.splitext(os.path.basename(path))[0]
+        output_path = os.path.join(args.output_dir, f"{name}.{args.format}")
+        try:
+            run = load_activity(path, 1.0, interval=args.interval, min_distance=args.min_distance)
+        except (ValueError, OSError, ElementTree.ParseError) as error:
+            print(f"FAILED {path}: {error}")
+            failures += 1
+            continue
+        write_run(output_path, run)
+        print(f"{path} -> {output_path}: {len(run['points'])} points, {run['ttl_distance']:.2f} km")
+    return 1 if failures else 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,238 @@
+# Live runs: points arriving while the run is still happening.
+#
+# A live run is a JSON-lines file that grows one line per point. Every line is a normPoints
+# entry of the run JSON ({"coordinates": {"x", "y"}, "altitudeFromZero", "HR", "pace",
+# "realDistance"}). An optional first line {"startingCoordinates": {...}} sets the header, and
+# a line {"done": true} ends the run.
+#
+# Replay a finished run into a live file to try the live mode (see StraViz.main_live):
+#   python run_live.py testRun.json live.jsonl --interval 1
+#
+# NumPy only, no bpy.
+
+import argparse
+import json
+import os
+import time
+
+import numpy as np
+
+import run_binary
+import run_filters
+from run_track import RunTrack
+
+
+class JsonLinesTail:
+    """
+    Reads the lines appended to a file since the last read.
+
+    Only complete lines are parsed; a half-written last line waits for the next read. Lines
+    that are not a JSON object are skipped with a message and counted in `skipped`, so one
+    garbled write does not stop the live run. If the file shrinks (a new race started in the
+    same file), reading starts over and `restarted` is set until cleared by the caller.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self.offset = 0
+        self.partial = b""
+        self.restarted = False
+        self.skipped = 0
+
+    def read(self):
+        """Returns the objects on the lines completed since the last call (empty if none or no file)."""
+        try:
+            size = os.path.getsize(self.path)
+        except OSError:
+            return []
+        if size < self.offset:
+            self.offset, self.partial, self.restarted = 0, b"", True
+        if size == self.offset:
+            return []
+        with open(self.path, "rb") as file:
+            file.seek(self.offset)
+            data = file.read(size - self.offset)
+        self.offset += len(data)
+        lines = (self.partial + data).split(b"\n")
+        self.partial = lines.pop()
+        records = []
+        for line in lines:
+            if not line.strip():
+                continue
+            try:
+                record = json.loads(line)
+            except ValueError:  # JSONDecodeError, or bytes that are not UTF-8
+                record = None
+            if isinstance(record, dict):
+                records.append(record)
+            else:
+                self.skipped += 1
+                print(f"Skipping a line of {self.path} that is not a JSON object: {line[:80]!r}")
+        return records
+
+
+class LiveRun:
+    """
+    Growing run columns with running statistics.
+
+    Appending k points costs O(k): the columns grow by doubling, and total distance, elevation
+    gain, highest point and the pace sum are updated from the new points only. `track()` gives
+    a RunTrack view of the points so far for the full rebuilds. With a gain_threshold, the gain
+    is counted with run_filters.HysteresisGain instead of summing every rise.
+    """
+
+    def __init__(self, z_scale, capacity=1024, gain_threshold=None):
+        self.z_scale = z_scale
+        self.gain = run_filters.HysteresisGain(gain_threshold) if gain_threshold is not None else None
+        self.starting_coordinates = (0.0, 0.0)
+        self.done = False
+        self.n = 0
+        self.points = np.empty((capacity, 3), dtype=np.float64)
+        self.hr = np.empty(capacity, dtype=np.int8)
+        self.pace = np.empty(capacity, dtype=np.float64)
+        self.altitude = np.empty(capacity, dtype=np.float64)
+        self.real_distance = np.empty(capacity, dtype=np.float64)
+        self.ttl_distance = 0.0
+        self.total_gain = 0.0
+        self.highest_point = float("-inf")
+        self.pace_sum = 0.0
+
+    def __len__(self):
+        return self.n
+
+    def __repr__(self):
+        return f"LiveRun({self.n} points, {self.ttl_distance:.2f}km)"
+
+    @property
+    def avg_pace(self):
+        """Average pace in min/km, the same reciprocal mean as RunTrack.avg_pace."""
+        return self.n / self.pace_sum if self.pace_sum else 0.0
+
+    def _reserve(self, n):
+        capacity = len(self.pace)
+        if n <= capacity:
+            return
+        while capacity < n:
+            capacity *= 2
+        for name in ("points", "hr", "pace", "altitude", "real_distance"):
+            old = getattr(self, name)
+            new = np.empty((capacity,) + old.shape[1:], dtype=old.dtype)
+            new[:self.n] = old[:self.n]
+            setattr(self, name, new)
+
+    def extend(self, records):
+        """
+        Appends the point records of a JSON-lines read and applies header and end lines.
+
+        Returns:
+            tuple: (start, stop) index range of the new points.
+        """
+        start = self.n
+        entries = []
+        for record in records:
+            if "coordinates" in record:
+                entries.append(record)
+            elif "startingCoordinates" in record:
+                coordinates = record["startingCoordinates"]
+                self.starting_coordinates = (coordinates["latitude"], coordinates["longitude"])
+            elif record.get("done"):
+                self.done = True
+        if not entries:
+            return start, start
+
+        stop = start + len(entries)
+        self._reserve(stop)
+        altitude = np.array([entry["altitudeFromZero"] for entry in entries], dtype=np.float64)
+        points = self.points[start:stop]
+        points[:, 0] = [entry["coordinates"]["x"] / 100 for entry in entries]
+        points[:, 1] = altitude * self.z_scale
+        points[:, 2] = [entry["coordinates"]["y"] / 100 for entry in entries]
+        self.hr[start:stop] = [entry["HR"] for entry in entries]
+        self.pace[start:stop] = [entry["pace"] for entry in entries]
+        self.altitude[start:stop] = altitude
+        self.real_distance[start:stop] = [entry["realDistance"] for entry in entries]
+
+        # Running statistics from the new points, plus the step from the last old point.
+        if self.gain is not None:
+            self.total_gain = self.gain.extend(altitude)
+        else:
+            previous = self.altitude[start - 1:start]
+            self.total_gain += float(np.clip(np.diff(np.concatenate((previous, altitude))), 0, None).sum())
+        self.highest_point = max(self.highest_point, float(points[:, 1].max()))
+        self.ttl_distance += float(self.real_distance[start:stop].sum())
+        self.pace_sum += float(self.pace[start:stop].sum())
+        self.n = stop
+        return start, stop
+
+    def track(self):
+        """RunTrack over the points so far (the columns are views, not copies)."""
+        n = self.n
+        return RunTrack(self.points[:n], self.hr[:n], self.pace[:n], self.altitude[:n], self.real_distance[:n],
+                        starting_coordinates=self.starting_coordinates, ttl_distance=self.ttl_distance,
+                        z_scale=self.z_scale)
+
+
+class Throttle:
+    """
+    Decides when the expensive rebuild is due: at most once every `interval` seconds, and only
+    when at least `min_points` points arrived since the last one (any number once the run is done).
+    """
+
+    def __init__(self, interval, min_points=1, clock=time.monotonic):
+        self.interval = interval
+        self.min_points = min_points
+        self.clock = clock
+        self.last_time = None
+        self.last_count = 0
+
+    def due(self, count, done=False):
+        new_points = count - self.last_count
+        if new_points <= 0 or (new_points < self.min_points and not done):
+            return False
+        if done or self.last_time is None:
+            return True
+        return self.clock() - self.last_time >= self.interval
+
+    def mark(self, count):
+        self.last_time = self.clock()
+        self.last_count = count
+
+
+def replay(run_path, live_path, interval=1.0, batch=1):
+    """
+    Writes a finished run to a JSON-lines live file, `batch` points every `interval` seconds,
+    then the end line. The file is truncated first.
+    """
+    run = run_binary.load_run(run_path, 1.0)
+    xs, ys = run["points"].xs, run["points"].ys
+    n = len(xs)
+    latitude, longitude = run["starting_coordinates"]
+    with open(live_path, "w") as file:
+        file.write(json.dumps({"startingCoordinates": {"latitude": latitude, "longitude": longitude}}) + "\n")
+        for start in range(0, n, batch):
+            for i in range(start, min(start + batch, n)):
+                file.write(json.dumps({
+                    "coordinates": {"x": float(xs[i]) * 100, "y": float(ys[i]) * 100},
+                    "altitudeFromZero": float(run["altitudes"][i]),
+                    "HR": int(run["hr_widths"][i]),
+                    "pace": float(run["paces"][i]),
+                    "realDistance": float(run["real_distances"][i]),
+                }) + "\n")
+            file.flush()
+            print(f"{min(start + batch, n)}/{n} points")
+            time.sleep(interval)
+        file.write(json.dumps({"done": True}) + "\n")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Replay a run file into a growing JSON-lines live file.")
+    parser.add_argument("run", help="Run file (JSON or .svrun).")
+    parser.add_argument("live", help="JSON-lines file to write.")
+    parser.add_argument("--interval", type=float, default=1.0, help="Seconds between writes.")
+    parser.add_argument("--batch", type=int, default=1, help="Points per write.")
+    args = parser.parse_args(argv)
+    replay(args.run, args.live, args.interval, args.batch)
+
+
+if __name__ == "__main__":
+    main()
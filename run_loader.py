@@ -0,0 +1,326 @@
+# Run file loaders for the StraViz script.
+# Nothing in here needs Blender, so it can be imported and profiled from plain Python.
+
+import json
+import os
+import re
+from array import array
+
+# Characters JSON allows between tokens.
+_WHITESPACE = " \t\n\r"
+# What may follow an array element: a comma to the next one, or the closing bracket.
+_ELEMENT_END = re.compile(r"[ \t\n\r]*([,\]])[ \t\n\r]*")
+# Characters that could still continue a number at the end of the buffer.
+_NUMBER_TAIL = re.compile(r"[0-9.eE+-]*")
+
+# Column typecodes: float64 for everything measured, int8 for the 0-10 HR bucket.
+FLOAT_TYPECODE = 'd'
+HR_TYPECODE = 'b'
+# load_run_columns streams files from this size up; below it json.load is faster and its
+# peak (about 3.3x the file size) is still small.
+STREAMING_MIN_BYTES = 16 << 20
+
+
+class PointColumns:
+    """
+    Read-only sequence of (x, z, y) tuples backed by separate x, y and altitude columns.
+
+    It behaves like the list of tuples `process_run_file` used to return, but a tuple is only
+    built when a point is actually accessed, so the run is stored as three flat columns.
+    """
+    __slots__ = ("xs", "ys", "altitudes", "z_scale")
+
+    def __init__(self, xs, ys, altitudes, z_scale):
+        if not (len(xs) == len(ys) == len(altitudes)):
+            raise ValueError("The x, y and altitude columns must have the same length.")
+        self.xs = xs
+        self.ys = ys
+        self.altitudes = altitudes
+        self.z_scale = z_scale
+
+    def __len__(self):
+        return len(self.xs)
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return [self[i] for i in range(*index.indices(len(self)))]
+        return (self.xs[index], self.altitudes[index] * self.z_scale, self.ys[index])
+
+    def __iter__(self):
+        z_scale = self.z_scale
+        for x, y, altitude in zip(self.xs, self.ys, self.altitudes):
+            yield (x, altitude * z_scale, y)
+
+    def __repr__(self):
+        return f"PointColumns({len(self)} points)"
+
+
+class _JSONStream:
+    """
+    Minimal pull tokenizer over a text file, just enough to walk the run file layout.
+
+    Values are decoded with the C scanner behind `json.JSONDecoder.raw_decode` straight out of
+    a sliding buffer, so only the current chunk and the value being decoded are ever held in
+    memory.
+    """
+
+    def __init__(self, file, chunk_size):
+        self.file = file
+        self.chunk_size = chunk_size
+        self.decoder = json.JSONDecoder()
+        self.buf = ""
+        self.pos = 0
+        self.eof = False
+
+    def _fill(self):
+        """Read the next chunk, dropping whatever has already been consumed. Returns False at EOF."""
+        if self.eof:
+            return False
+        chunk = self.file.read(self.chunk_size)
+        if not chunk:
+            self.eof = True
+            return False
+        self.buf = self.buf[self.pos:] + chunk
+        self.pos = 0
+        return True
+
+    def peek(self):
+        """Return the next non-whitespace character without consuming it ('' at EOF)."""
+        while True:
+            while self.pos < len(self.buf) and self.buf[self.pos] in _WHITESPACE:
+                self.pos += 1
+            if self.pos < len(self.buf):
+                return self.buf[self.pos]
+            if not self._fill():
+                return ""
+
+    def expect(self, char):
+        found = self.peek()
+        if found != char:
+            raise ValueError(f"Malformed run file: expected '{char}' but found '{found or 'EOF'}'.")
+        self.pos += 1
+
+    def accept(self, char):
+        """Consume `char` if it is the next token. Returns whether it was consumed."""
+        if self.peek() == char:
+            self.pos += 1
+            return True
+        return False
+
+    def value(self):
+        """Decode the next complete JSON value."""
+        self.peek()
+        while True:
+            try:
+                obj, end = self.decoder.raw_decode(self.buf, self.pos)
+            except json.JSONDecodeError:
+                if not self._fill():
+                    raise
+                continue
+            # A bare number at the end of the buffer may still be cut off mid-digit, or just
+            # after its '.' or exponent sign, where the decoder stops early.
+            if _NUMBER_TAIL.fullmatch(self.buf, end) and self._fill():
+                continue
+            self.pos = end
+            return obj
+
+    def elements(self):
+        """
+        Yield the elements of the array whose '[' was just consumed, then consume its ']'.
+
+        Runs of elements already in the buffer are decoded back to back with the C scanner
+        and one regex match per separator; the character-level peek/expect path is only
+        taken where an element or separator straddles a chunk boundary.
+        """
+        if self.accept("]"):
+            return
+        scan = self.decoder.scan_once
+        match_end = _ELEMENT_END.match
+        while True:
+            self.peek()
+            buf, pos = self.buf, self.pos
+            while True:
+                try:
+                    obj, end = scan(buf, pos)
+                except (StopIteration, json.JSONDecodeError):
+                    break   # Cut off by the buffer end (or malformed, which value() reports)
+                separator = match_end(buf, end)
+                # Stop at the buffer end: a number may be cut off, or more whitespace may follow.
+                if separator is None or separator.end() == len(buf):
+                    break
+                yield obj
+                pos = separator.end()
+                if separator.group(1) == "]":
+                    self.pos = pos
+                    return
+            self.pos = pos
+            yield self.value()
+            if self.accept("]"):
+                return
+            self.expect(",")
+
+
+def iter_run_file(json_file_path, chunk_size=1 << 16):
+    """
+    Walks a run file incrementally.
+
+    Yields ("header", key, value) for every top-level entry other than normPoints, and
+    ("point", index, entry) for each normPoints entry, one at a time and in file order.
+    Key order in the file does not matter.
+
+    Parameters:
+        json_file_path (str): Path to the run JSON file.
+        chunk_size (int): Number of characters to read per chunk.
+    """
+    with open(json_file_path, 'r') as file:
+        stream = _JSONStream(file, chunk_size)
+        stream.expect("{")
+        if stream.accept("}"):
+            return
+        while True:
+            key = stream.value()
+            stream.expect(":")
+            if key == "normPoints":
+                stream.expect("[")
+                for index, entry in enumerate(stream.elements()):
+                    yield "point", index, entry
+            else:
+                yield "header", key, stream.value()
+            if stream.accept("}"):
+                return
+            stream.expect(",")
+
+
+def load_run_json(json_file_path, z_scale):
+    """
+    Eager loader: parses the whole file with `json.load` and builds plain Python lists.
+
+    This is the original `process_run_file` implementation, kept as the reference the
+    streaming loader is compared against.
+    """
+    with open(json_file_path, 'r') as file:
+        data = json.load(file)
+
+    # Extract top-level variables
+    starting_coordinates = data["startingCoordinates"]
+    starting_latitude = starting_coordinates["latitude"]
+    starting_longitude = starting_coordinates["longitude"]
+    ttl_distance = data["ttlDistance"]
+
+    # Extract normalized points data
+    norm_points = data["normPoints"]
+    points = []
+    hr_widths = []
+    real_distances = []
+    paces = []
+    altitudes = []
+
+    for entry in norm_points:
+        x = entry["coordinates"]["x"] / 100
+        y = entry["coordinates"]["y"] / 100
+        z = entry["altitudeFromZero"] * z_scale
+
+        points.append((x, z, y))  # (x, z, y) format
+        hr_widths.append(entry["HR"])
+        real_distances.append(entry["realDistance"])
+        paces.append(entry["pace"])
+        altitudes.append(entry["altitudeFromZero"])
+
+    return {
+        "starting_coordinates": (starting_latitude, starting_longitude),
+        "ttl_distance": ttl_distance,
+        "points": points,
+        "hr_widths": hr_widths,
+        "real_distances": real_distances,
+        "paces": paces,
+        "altitudes": altitudes
+    }
+
+
+def _fill_columns(entries, header, json_file_path, z_scale):
+    """
+    Appends normPoints entries (any iterable of dicts) to typed columns and returns the
+    columnar run dict shared by load_run_columns and load_run_streaming. The header is read
+    after the entries, so a streamed file can put its header keys on either side of normPoints.
+    """
+    xs = array(FLOAT_TYPECODE)
+    ys = array(FLOAT_TYPECODE)
+    altitudes = array(FLOAT_TYPECODE)
+    paces = array(FLOAT_TYPECODE)
+    real_distances = array(FLOAT_TYPECODE)
+    hr_widths = array(HR_TYPECODE)
+    # Bound once: this loop runs once per point.
+    add_x, add_y, add_altitude = xs.append, ys.append, altitudes.append
+    add_pace, add_distance, add_hr = paces.append, real_distances.append, hr_widths.append
+
+    for entry in entries:
+        coordinates = entry["coordinates"]
+        add_x(coordinates["x"] / 100)
+        add_y(coordinates["y"] / 100)
+        add_altitude(entry["altitudeFromZero"])
+        add_pace(entry["pace"])
+        add_distance(entry["realDistance"])
+        add_hr(entry["HR"])
+
+    try:
+        starting_coordinates = header["startingCoordinates"]
+        ttl_distance = header["ttlDistance"]
+    except KeyError as missing:
+        raise ValueError(f"Run file {json_file_path} is missing {missing}.") from None
+
+    return {
+        "starting_coordinates": (starting_coordinates["latitude"], starting_coordinates["longitude"]),
+        "ttl_distance": ttl_distance,
+        "points": PointColumns(xs, ys, altitudes, z_scale),
+        "hr_widths": hr_widths,
+        "real_distances": real_distances,
+        "paces": paces,
+        "altitudes": altitudes,
+        "zero_altitude": header.get("zeroAltitude", float("nan"))
+    }
+
+
+def load_run_streaming(json_file_path, z_scale, chunk_size=1 << 16):
+    """
+    Streaming loader: reads normPoints one entry at a time into typed, growable columns.
+
+    Returns the same keys as `load_run_json` plus "zero_altitude" (NaN when the file has no
+    zeroAltitude). The per-point values are `array.array` columns (float64, HR as int8) and
+    "points" is a `PointColumns` view over them, so no per-point dict or tuple outlives the parse.
+
+    It trades some speed for memory: peak memory stays around a quarter of the file size
+    instead of the 3-4x json.load needs. It is not free: on a 200k point run (40 MB) it takes
+    about 1.0-1.2x as long as json.load, and on small files up to about 1.4x
+    (benchmarks/compare_loaders.py). load_run_columns therefore only streams files of
+    STREAMING_MIN_BYTES or more.
+
+    Parameters:
+        json_file_path (str): Path to the run JSON file.
+        z_scale (float): Multiplier applied to altitudeFromZero for the point z value.
+        chunk_size (int): Number of characters to read per chunk.
+    """
+    header = {}
+
+    def entries():
+        for kind, key, value in iter_run_file(json_file_path, chunk_size):
+            if kind == "header":
+                header[key] = value
+            else:
+                yield value
+
+    return _fill_columns(entries(), header, json_file_path, z_scale)
+
+
+def load_run_columns(json_file_path, z_scale, streaming_min_bytes=STREAMING_MIN_BYTES):
+    """
+    Columnar loader: the typed columns of load_run_streaming, parsed whichever way is cheaper.
+
+    Files smaller than streaming_min_bytes are parsed with json.load, which is faster and
+    whose temporary dict tree is small at that size; larger files are streamed so peak
+    memory does not grow with the number of points.
+    """
+    if os.path.getsize(json_file_path) >= streaming_min_bytes:
+        return load_run_streaming(json_file_path, z_scale)
+    with open(json_file_path, 'r') as file:
+        data = json.load(file)
+    return _fill_columns(data.get("normPoints", ()), data, json_file_path, z_scale)
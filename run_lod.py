@@ -0,0 +1,161 @@
+# Level-of-detail meshes for run objects: decimated proxies for the viewport, the full mesh
+# for rendering.
+#
+# Every level is its own mesh data-block, built once and kept with a fake user so it is saved
+# with the .blend file. Switching levels only swaps object.data, so nothing is recomputed when
+# the view changes. Render handlers swap the full meshes in when a render starts and put the
+# proxies back when it ends.
+#
+# Handlers are not saved in the .blend, so the file itself is always saved with the full meshes
+# as object data: a Blender process that opens it without this module (turntable.py, a plain
+# `blender -b model.blend -f 1`) renders the full run. Where the module is loaded, the save
+# handlers put the proxies back after saving and the load handler shows them again when a file
+# is opened.
+
+import bpy
+import numpy as np
+
+RENDER_KEY = "lod_render"    # Object property: name of the full mesh
+PROXIES_KEY = "lod_proxies"  # Object property: names of the proxy meshes, largest budget last
+LEVEL_KEY = "lod_level"      # Object property: proxy level the viewport shows, -1 for the full mesh
+
+
+def triangle_count(mesh):
+    """Number of triangles the mesh's polygons triangulate into."""
+    face_sizes = np.empty(len(mesh.polygons), dtype=np.int32)
+    mesh.polygons.foreach_get("loop_total", face_sizes)
+    return int((face_sizes - 2).sum())
+
+
+def decimated_mesh(obj, budget, name=None):
+    """
+    Returns a new mesh with the object's mesh collapsed to at most about `budget` triangles,
+    using a temporary Decimate modifier. Attributes (like the pace) and materials are kept.
+
+    Parameters:
+        obj (bpy.types.Object): A mesh object linked to the scene.
+        budget (int): Triangle budget of the new mesh.
+        name (str): Name of the new mesh. Defaults to <mesh name>_LOD<budget>.
+    """
+    triangles = triangle_count(obj.data)
+    modifier = obj.modifiers.new(name="LOD_Decimate", type='DECIMATE')
+    modifier.decimate_type = 'COLLAPSE'
+    modifier.ratio = min(1.0, budget / triangles) if triangles else 1.0
+    try:
+        depsgraph = bpy.context.evaluated_depsgraph_get()
+        mesh = bpy.data.meshes.new_from_object(obj.evaluated_get(depsgraph), preserve_all_data_layers=True,
+                                               depsgraph=depsgraph)
+    finally:
+        obj.modifiers.remove(modifier)
+    mesh.name = name or f"{obj.data.name}_LOD{budget}"
+    print(f"Decimated {obj.name}: {triangles} -> {triangle_count(mesh)} triangles (budget {budget})")
+    return mesh
+
+
+def attach_lods(obj, proxies, level=0):
+    """
+    Registers proxy meshes as the object's viewport levels and shows `level`.
+
+    Parameters:
+        obj (bpy.types.Object): The run object, holding its full mesh.
+        proxies (list of bpy.types.Mesh): Proxy meshes, smallest first.
+        level (int): Proxy the viewport shows. -1 keeps the full mesh.
+    """
+    full = obj.data
+    for mesh in (full, *proxies):
+        mesh.use_fake_user = True  # Keep the meshes that are not shown when the file is saved
+    for proxy in proxies:
+        if not proxy.materials:
+            for material in full.materials:
+                proxy.materials.append(material)
+    obj[RENDER_KEY] = full.name
+    obj[PROXIES_KEY] = [proxy.name for proxy in proxies]
+    set_lod(obj, level)
+
+
+def set_lod(obj, level):
+    """Shows proxy `level` (clamped to the levels there are), or the full mesh for -1."""
+    proxies = list(obj.get(PROXIES_KEY, []))
+    if level < 0 or not proxies:
+        name, level = obj[RENDER_KEY], -1
+    else:
+        level = min(level, len(proxies) - 1)
+        name = proxies[level]
+    mesh = bpy.data.meshes.get(name)
+    if mesh is None:
+        print(f"LOD mesh '{name}' of {obj.name} is missing")
+        return
+    obj.data = mesh
+    obj[LEVEL_KEY] = level
+
+
+def lod_objects():
+    """Every object with LOD meshes."""
+    return [obj for obj in bpy.data.objects if RENDER_KEY in obj]
+
+
+def show_render_meshes():
+    """Swaps the full mesh into every LOD object, keeping the viewport level for afterwards."""
+    for obj in lod_objects():
+        level = obj.get(LEVEL_KEY, -1)
+        set_lod(obj, -1)
+        obj[LEVEL_KEY] = level
+
+
+def show_viewport_meshes():
+    """Swaps every LOD object back to the proxy level it showed before the render."""
+    for obj in lod_objects():
+        set_lod(obj, obj.get(LEVEL_KEY, -1))
+
+
+@bpy.app.handlers.persistent
+def _render_pre(scene, depsgraph=None):
+    show_render_meshes()
+
+
+@bpy.app.handlers.persistent
+def _render_post(scene, depsgraph=None):
+    show_viewport_meshes()
+
+
+@bpy.app.handlers.persistent
+def _save_pre(*args):
+    show_render_meshes()
+
+
+@bpy.app.handlers.persistent
+def _save_post(*args):
+    show_viewport_meshes()
+
+
+@bpy.app.handlers.persistent
+def _load_post(*args):
+    show_viewport_meshes()
+
+
+_HANDLERS = (
+    (bpy.app.handlers.render_pre, _render_pre),
+    (bpy.app.handlers.render_post, _render_post),
+    (bpy.app.handlers.render_cancel, _render_post),
+    (bpy.app.handlers.save_pre, _save_pre),
+    (bpy.app.handlers.save_post, _save_post),
+    (bpy.app.handlers.load_post, _load_post),
+)
+
+
+def register_handlers():
+    """
+    Installs the render, save and load handlers (once, also when this module is reloaded). They
+    stay installed when another file is opened, so saved LOD scenes get their proxies back.
+    """
+    unregister_handlers()
+    for handlers, function in _HANDLERS:
+        handlers.append(function)
+
+
+def unregister_handlers():
+    for handlers, function in _HANDLERS:
+        for handler in list(handlers):
+            # Compare by name: after importlib.reload the old functions are different objects.
+            if getattr(handler, "__module__", None) == __name__ and handler.__name__ == function.__name__:
+                handlers.remove(handler)
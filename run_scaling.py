@@ -0,0 +1,121 @@
+# Fitting a run onto the platform, computed from coordinates instead of a finished object.
+#
+# Each strategy maps the footprint's two horizontal extents (world x and y) to the extents
+# they should have on the platform, like the helpers functions that rescale a finished
+# object through obj.dimensions:
+#   'linear'  helpers.resize_object               1 + (d - 1) / (obj_max - 1) * (scale_max - 1)
+#   'log1p'   helpers.log_scale_run_object        max_size * log1p(d) / log1p(max(d))
+#   'power'   helpers.scale_object_xz_non_linear  min_size + (d / max(d)) ** exponent * (max_size - min_size)
+# fit() turns that into a Fit: the bounding-box centre and the per-axis factors, which are
+# applied to vertex arrays while the geometry is built (or set once as an object transform),
+# so the finished mesh never needs another pass. NumPy only, no bpy.
+
+import numpy as np
+
+
+def linear(dimensions, obj_max=300, scale_max=100):
+    """Maps an extent of obj_max to scale_max, and 1 to 1 (helpers.resize_object)."""
+    dimensions = np.asarray(dimensions, dtype=np.float64)
+    return 1 + (dimensions - 1) / (obj_max - 1) * (scale_max - 1)
+
+
+def log1p(dimensions, max_size=100):
+    """The larger extent becomes max_size, the other shrinks logarithmically (helpers.log_scale_run_object)."""
+    dimensions = np.asarray(dimensions, dtype=np.float64)
+    largest = dimensions.max()
+    if largest <= 0:
+        return dimensions.copy()
+    return max_size * np.log1p(dimensions) / np.log1p(largest)
+
+
+def power(dimensions, max_size=100, min_size=1, exponent=0.92):
+    """
+    The larger extent becomes max_size, the other min_size + ratio ** exponent of the range
+    (helpers.scale_object_xz_non_linear). Exponents below 1 enlarge the smaller extent.
+    """
+    dimensions = np.asarray(dimensions, dtype=np.float64)
+    largest = dimensions.max()
+    if largest <= 0:
+        return dimensions.copy()
+    return min_size + (dimensions / largest) ** exponent * (max_size - min_size)
+
+
+STRATEGIES = {"linear": linear, "log1p": log1p, "power": power}
+
+
+def strategy_params(strategy, obj_max=300, scale_max=100, min_size=1, exponent=0.92):
+    """
+    The keyword arguments `strategy` takes, from StraViz's settings: obj_max is the largest
+    extent a run could have, scale_max the largest it may get on the platform.
+    """
+    if strategy == "linear":
+        return {"obj_max": obj_max, "scale_max": scale_max}
+    if strategy == "log1p":
+        return {"max_size": scale_max}
+    if strategy == "power":
+        return {"max_size": scale_max, "min_size": min_size, "exponent": exponent}
+    raise ValueError(f"Unknown scaling strategy '{strategy}', use one of {', '.join(STRATEGIES)}.")
+
+
+class Fit:
+    """
+    Centre-and-scale of a run's footprint: world x/y become (xy - center) * factors.
+    Heights are not changed.
+    """
+    __slots__ = ("center", "factors")
+
+    def __init__(self, center, factors):
+        self.center = np.asarray(center, dtype=np.float64)
+        self.factors = np.asarray(factors, dtype=np.float64)
+
+    def __repr__(self):
+        return (f"Fit(center=({self.center[0]:.3f}, {self.center[1]:.3f}), "
+                f"factors=({self.factors[0]:.4f}, {self.factors[1]:.4f}))")
+
+    def apply(self, vertices):
+        """Returns world-space (N, 3) vertices fitted to the platform (a new array)."""
+        vertices = np.array(vertices, dtype=np.float64, copy=True)
+        vertices[:, :2] = (vertices[:, :2] - self.center) * self.factors
+        return vertices
+
+    def apply_points(self, points):
+        """Returns (N, 3) track points in (x, z, y) order fitted to the platform (a new array)."""
+        points = np.array(points, dtype=np.float64, copy=True)
+        # Curve-local y is world -y (see run_geometry.track_to_world).
+        points[:, 0] = (points[:, 0] - self.center[0]) * self.factors[0]
+        points[:, 2] = (points[:, 2] + self.center[1]) * self.factors[1]
+        return points
+
+    @property
+    def offset(self):
+        """World x/y translation of the fit when it is used as an object transform with scale factors."""
+        return -self.center * self.factors
+
+
+def fit(xy, strategy="linear", margin=0.0, **params):
+    """
+    Fits a footprint to the platform.
+
+    Parameters:
+        xy (np.ndarray): (N, 2+) world coordinates; only the first two columns are read.
+        strategy (str): A key of STRATEGIES.
+        margin (float or np.ndarray): Added around the bounding box before scaling, or (N,)
+                        per point, e.g. the wall half-widths when xy holds centre-line points
+                        rather than the finished outline.
+        **params: Arguments of the strategy (see strategy_params).
+
+    Returns:
+        Fit: Centre of the bounding box and per-axis scale factors.
+    """
+    if strategy not in STRATEGIES:
+        raise ValueError(f"Unknown scaling strategy '{strategy}', use one of {', '.join(STRATEGIES)}.")
+    xy = np.asarray(xy, dtype=np.float64)[:, :2]
+    if len(xy) == 0:
+        return Fit(np.zeros(2), np.ones(2))
+    margin = np.asarray(margin, dtype=np.float64).reshape(-1, 1)
+    low = (xy - margin).min(axis=0)
+    high = (xy + margin).max(axis=0)
+    dimensions = high - low
+    scaled = STRATEGIES[strategy](dimensions, **params)
+    factors = np.divide(scaled, dimensions, out=np.ones(2), where=dimensions != 0)
+    return Fit((low + high) / 2, factors)
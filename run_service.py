@@ -0,0 +1,378 @@
+# Local HTTP service that takes run uploads and builds them on background Blender workers.
+#
+#   python run_service.py -o models/ -j 2
+#   python run_service.py -o models/ --worker-cmd "python benchmarks/stub_worker.py {runs} -o {output_dir}"
+#
+#   curl --data-binary @testRun.json http://127.0.0.1:8765/runs     -> 202 {"id": ..., "url": "/jobs/<id>"}
+#   curl http://127.0.0.1:8765/jobs/<id>                            -> status, progress and timings
+#   curl http://127.0.0.1:8765/status                               -> queue and worker totals
+#
+# Uploads are checked against the run JSON layout (startingCoordinates, ttlDistance, normPoints)
+# and saved to <output dir>/uploads. Build jobs wait in a bounded queue; when it is full the
+# upload is refused with 429 and a Retry-After header, before its body is even parsed. Parsing
+# and validation run in a small process pool (json.loads holds the GIL, so a thread would not
+# help) and the upload is saved from a thread, so a large upload never stalls the event loop
+# serving the other connections. Workers are the same commands batch_scheduler.py runs, one run
+# per process. The service only listens on 127.0.0.1. Standard library only, no bpy.
+
+import argparse
+import asyncio
+import json
+import multiprocessing
+import os
+import signal
+import sys
+import time
+import uuid
+from collections import OrderedDict, deque
+from concurrent.futures import ProcessPoolExecutor
+
+from batch_scheduler import DEFAULT_WORKER_CMD, build_command
+
+HOST = "127.0.0.1"
+MAX_ERRORS = 20        # Schema errors reported per upload
+LOG_LINES = 20         # Worker output lines kept per job
+REASONS = {200: "OK", 202: "Accepted", 400: "Bad Request", 404: "Not Found", 405: "Method Not Allowed",
+           411: "Length Required", 413: "Payload Too Large", 429: "Too Many Requests",
+           500: "Internal Server Error"}
+
+
+def _is_number(value):
+    return isinstance(value, (int, float)) and not isinstance(value, bool)
+
+
+def validate_run(data):
+    """
+    Checks a parsed upload against the run JSON layout the app prints.
+
+    Returns:
+        list of str: Problems found, at most MAX_ERRORS; empty when the run is valid.
+    """
+    if not isinstance(data, dict):
+        return ["The run must be a JSON object."]
+    errors = []
+    coordinates = data.get("startingCoordinates")
+    if not isinstance(coordinates, dict) or not all(_is_number(coordinates.get(key))
+                                                    for key in ("latitude", "longitude")):
+        errors.append("startingCoordinates must have numeric latitude and longitude.")
+    if not _is_number(data.get("ttlDistance")):
+        errors.append("ttlDistance must be a number.")
+
+    points = data.get("normPoints")
+    if not isinstance(points, list) or len(points) < 2:
+        errors.append("normPoints must be a list of at least two points.")
+        return errors
+    for i, entry in enumerate(points):
+        if len(errors) >= MAX_ERRORS:
+            errors.append("...")
+            break
+        if not isinstance(entry, dict):
+            errors.append(f"normPoints[{i}] must be an object.")
+            continue
+        point = entry.get("coordinates")
+        if not isinstance(point, dict) or not (_is_number(point.get("x")) and _is_number(point.get("y"))):
+            errors.append(f"normPoints[{i}].coordinates must have numeric x and y.")
+        for key in ("altitudeFromZero", "pace", "realDistance"):
+            if not _is_number(entry.get(key)):
+                errors.append(f"normPoints[{i}].{key} must be a number.")
+        hr = entry.get("HR")
+        if not (isinstance(hr, int) and not isinstance(hr, bool) and 0 <= hr <= 127):
+            errors.append(f"normPoints[{i}].HR must be an integer from 0 to 127.")
+    return errors
+
+
+def check_upload(body):
+    """
+    Parses and validates an upload. Runs in RunService's parser processes, so only the verdict
+    travels back, not the parsed points.
+
+    Returns:
+        tuple: (error message or None, list of schema problems or None, number of points)
+    """
+    try:
+        data = json.loads(body)
+    except (UnicodeDecodeError, json.JSONDecodeError) as error:
+        return f"Not valid JSON: {error}", None, 0
+    errors = validate_run(data)
+    if errors:
+        return "The run does not match the normPoints layout.", errors, 0
+    return None, None, len(data["normPoints"])
+
+
+def _write_upload(path, body):
+    with open(path, "wb") as file:
+        file.write(body)
+
+
+class BuildJob:
+    """One uploaded run and the progress of its build."""
+
+    def __init__(self, job_id, run_path, points):
+        self.id = job_id
+        self.run_path = run_path
+        self.points = points
+        self.status = "queued"
+        self.received = time.time()
+        self.started = None
+        self.finished = None
+        self.returncode = None
+        self.output = None
+        self.log = deque(maxlen=LOG_LINES)
+
+    def to_dict(self):
+        def elapsed(start, end):
+            if start is None:
+                return None
+            return round((end or time.time()) - start, 3)
+        return {
+            "id": self.id,
+            "status": self.status,
+            "points": self.points,
+            "received": self.received,
+            "queued_seconds": elapsed(self.received, self.started),
+            "build_seconds": elapsed(self.started, self.finished),
+            "returncode": self.returncode,
+            "output": self.output,
+            "progress": self.log[-1] if self.log else None,
+            "log": list(self.log),
+        }
+
+
+class RunService:
+    """
+    The upload endpoint, the bounded build queue and the worker tasks.
+
+    Parameters:
+        output_dir (str): Directory for the built models; uploads go to output_dir/uploads.
+        template (str): Worker command template (see batch_scheduler.build_command).
+        workers (int): Builds running at once.
+        queue_size (int): Jobs that may wait for a worker before uploads get 429.
+        timeout (float): Seconds before a build is killed. None waits forever.
+        max_upload (int): Largest accepted upload in bytes.
+        history (int): Finished jobs kept for the status endpoints.
+        blender (str): Blender executable for the default template.
+        parsers (int): Processes parsing and validating uploads.
+    """
+
+    def __init__(self, output_dir, template=DEFAULT_WORKER_CMD, workers=1, queue_size=16, timeout=None,
+                 max_upload=64 * 2 ** 20, history=1000, blender="blender", parsers=1):
+        self.output_dir = output_dir
+        self.upload_dir = os.path.join(output_dir, "uploads")
+        self.template = template
+        self.workers = workers
+        self.queue = asyncio.Queue(maxsize=queue_size)
+        self.timeout = timeout
+        self.max_upload = max_upload
+        self.history = history
+        self.blender = blender
+        self.jobs = OrderedDict()
+        self.counts = {"accepted": 0, "rejected": 0, "invalid": 0, "done": 0, "failed": 0}
+        self.running = 0
+        self.started = time.time()
+        # Spawned, not forked: a forked parser would inherit the open client sockets and keep
+        # connections from closing.
+        self.parsers = ProcessPoolExecutor(max_workers=parsers, mp_context=multiprocessing.get_context("spawn"))
+        os.makedirs(self.upload_dir, exist_ok=True)
+
+    def close(self):
+        """Stops the parser processes."""
+        self.parsers.shutdown(cancel_futures=True)
+
+    # Upload and status endpoints
+
+    def _reject(self):
+        self.counts["rejected"] += 1
+        return 429, {"error": "The build queue is full, try again later.", "queue": self.queue.qsize()}
+
+    async def submit(self, body):
+        """Validates an upload and queues its build. Returns (HTTP status, JSON response)."""
+        if self.queue.full():
+            return self._reject()  # Refused before any parsing, so overload costs next to nothing
+        loop = asyncio.get_running_loop()
+        error, details, points = await loop.run_in_executor(self.parsers, check_upload, body)
+        if error:
+            self.counts["invalid"] += 1
+            return 400, {"error": error, "details": details} if details else {"error": error}
+
+        job_id = uuid.uuid4().hex[:12]
+        run_path = os.path.join(self.upload_dir, f"{job_id}.json")
+        await asyncio.to_thread(_write_upload, run_path, body)
+        if self.queue.full():
+            # Other uploads filled the queue while this one was parsed.
+            os.remove(run_path)
+            return self._reject()
+        job = BuildJob(job_id, run_path, points)
+        self.jobs[job_id] = job
+        self.queue.put_nowait(job)
+        self.counts["accepted"] += 1
+        self._trim_history()
+        return 202, {"id": job_id, "status": job.status, "url": f"/jobs/{job_id}", "queue": self.queue.qsize()}
+
+    def _trim_history(self):
+        finished = [job_id for job_id, job in self.jobs.items() if job.status in ("done", "failed")]
+        for job_id in finished[:max(0, len(finished) - self.history)]:
+            del self.jobs[job_id]
+
+    def status(self):
+        return {
+            "uptime_seconds": round(time.time() - self.started, 1),
+            "queue": self.queue.qsize(),
+            "queue_size": self.queue.maxsize,
+            "workers": self.workers,
+            "running": self.running,
+            **self.counts,
+        }
+
+    async def route(self, method, path, body):
+        """Returns (HTTP status, JSON response, extra headers) for a request."""
+        path = path.split("?", 1)[0].rstrip("/") or "/"
+        if path == "/runs":
+            if method != "POST":
+                return 405, {"error": "POST a run JSON to /runs."}, {}
+            status, response = await self.submit(body)
+            return status, response, {"Retry-After": "5"} if status == 429 else {}
+        if method != "GET":
+            return 405, {"error": f"{method} is not supported on {path}."}, {}
+        if path == "/status":
+            return 200, self.status(), {}
+        if path == "/jobs":
+            return 200, {"jobs": [{"id": job.id, "status": job.status} for job in self.jobs.values()]}, {}
+        if path.startswith("/jobs/"):
+            job = self.jobs.get(path[len("/jobs/"):])
+            if job is None:
+                return 404, {"error": "No such job."}, {}
+            return 200, job.to_dict(), {}
+        return 404, {"error": f"Unknown path {path}."}, {}
+
+    # HTTP
+
+    async def handle(self, reader, writer):
+        """Serves one HTTP/1.1 request per connection."""
+        try:
+            status, response, headers = await self._read_request(reader)
+        except (asyncio.IncompleteReadError, ConnectionError, ValueError):
+            status, response, headers = 400, {"error": "Malformed request."}, {}
+        except Exception as error:  # Keep the service up; report the problem to the client
+            status, response, headers = 500, {"error": repr(error)}, {}
+        payload = json.dumps(response, indent=1).encode()
+        head = [f"HTTP/1.1 {status} {REASONS.get(status, '')}", "Content-Type: application/json",
+                f"Content-Length: {len(payload)}", "Connection: close"]
+        head += [f"{name}: {value}" for name, value in headers.items()]
+        try:
+            writer.write(("\r\n".join(head) + "\r\n\r\n").encode() + payload)
+            await writer.drain()
+        except ConnectionError:
+            pass
+        finally:
+            writer.close()
+
+    async def _read_request(self, reader):
+        request_line = (await reader.readline()).decode("latin-1").split()
+        if len(request_line) != 3:
+            raise ValueError("Bad request line")
+        method, path, _ = request_line
+        headers = {}
+        while True:
+            line = (await reader.readline()).decode("latin-1").strip()
+            if not line:
+                break
+            name, _, value = line.partition(":")
+            headers[name.strip().lower()] = value.strip()
+
+        body = b""
+        if method == "POST":
+            if "content-length" not in headers:
+                return 411, {"error": "Send the upload with a Content-Length."}, {}
+            length = int(headers["content-length"])
+            if length > self.max_upload:
+                return 413, {"error": f"Uploads are limited to {self.max_upload} bytes."}, {}
+            body = await reader.readexactly(length)
+        return await self.route(method, path, body)
+
+    # Workers
+
+    async def _build(self, job):
+        argv = build_command(self.template, [job.run_path], self.output_dir, job.id, self.blender)
+        process = await asyncio.create_subprocess_exec(*argv, stdout=asyncio.subprocess.PIPE,
+                                                       stderr=asyncio.subprocess.STDOUT,
+                                                       start_new_session=(os.name == "posix"))
+
+        async def read_output():
+            async for line in process.stdout:
+                job.log.append(line.decode(errors="replace").rstrip())
+
+        try:
+            await asyncio.wait_for(asyncio.gather(read_output(), process.wait()), self.timeout)
+        except asyncio.TimeoutError:
+            if os.name == "posix":
+                os.killpg(process.pid, signal.SIGKILL)
+            else:
+                process.kill()
+            await process.wait()
+            job.log.append(f"Killed after {self.timeout}s")
+        return process.returncode
+
+    async def worker(self):
+        while True:
+            job = await self.queue.get()
+            job.status, job.started = "running", time.time()
+            self.running += 1
+            try:
+                job.returncode = await self._build(job)
+            except OSError as error:
+                job.log.append(f"Could not start worker: {error}")
+                job.returncode = -1
+            finally:
+                self.running -= 1
+                self.queue.task_done()
+            job.finished = time.time()
+            output = os.path.join(self.output_dir, f"{job.id}.blend")
+            job.output = output if os.path.exists(output) else None
+            job.status = "done" if job.returncode == 0 else "failed"
+            self.counts[job.status] += 1
+            print(f"Job {job.id} {job.status} in {job.finished - job.started:.1f}s ({job.points} points)")
+
+    async def serve(self, port):
+        """Starts the workers and serves on 127.0.0.1:port until cancelled."""
+        tasks = [asyncio.create_task(self.worker()) for _ in range(self.workers)]
+        server = await asyncio.start_server(self.handle, HOST, port)
+        print(f"Accepting runs on http://{HOST}:{port}/runs ({self.workers} workers, "
+              f"queue of {self.queue.maxsize})")
+        try:
+            async with server:
+                await server.serve_forever()
+        finally:
+            for task in tasks:
+                task.cancel()
+            self.close()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Accept run uploads on localhost and build them on background workers.")
+    parser.add_argument("-o", "--output-dir", required=True, help="Directory for uploads and built models.")
+    parser.add_argument("--port", type=int, default=8765, help="Port on 127.0.0.1.")
+    parser.add_argument("-j", "--workers", type=int, default=1, help="Builds running at once.")
+    parser.add_argument("--queue-size", type=int, default=16, help="Waiting builds before uploads get 429.")
+    parser.add_argument("--timeout", type=float, default=None, help="Seconds before a build is killed.")
+    parser.add_argument("--max-upload-mb", type=float, default=64, help="Largest accepted upload.")
+    parser.add_argument("--parsers", type=int, default=1, help="Processes parsing and validating uploads.")
+    parser.add_argument("--blender", default="blender", help="Blender executable.")
+    parser.add_argument("--worker-cmd", default=DEFAULT_WORKER_CMD,
+                        help="Worker command template with {runs}, {output_dir}, {job}, {blender}, {script}.")
+    args = parser.parse_args(argv)
+
+    async def run():
+        # The queue must be created inside the running event loop.
+        service = RunService(args.output_dir, args.worker_cmd, args.workers, args.queue_size, args.timeout,
+                             int(args.max_upload_mb * 2 ** 20), blender=args.blender, parsers=args.parsers)
+        await service.serve(args.port)
+
+    try:
+        asyncio.run(run())
+    except KeyboardInterrupt:
+        pass
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
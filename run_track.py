@@ -0,0 +1,174 @@
+# NumPy representation of a parsed run, shared by the StraViz pipeline stages.
+# Needs NumPy (bundled with Blender) but not bpy.
+
+import numpy as np
+
+import run_binary
+import run_loader as loader
+
+
+def as_point_array(points):
+    """
+    Returns points as an (N, 3) float64 array in (x, z, y) order.
+
+    Accepts a PointColumns view (filled column by column, no per-point tuples), an array,
+    or a list of tuples.
+    """
+    if isinstance(points, loader.PointColumns):
+        xyz = np.empty((len(points), 3), dtype=np.float64)
+        xyz[:, 0] = points.xs
+        xyz[:, 1] = np.asarray(points.altitudes, dtype=np.float64) * points.z_scale
+        xyz[:, 2] = points.ys
+        return xyz
+    return np.asarray(points, dtype=np.float64).reshape(-1, 3)
+
+
+class RunTrack:
+    """
+    A parsed run held as contiguous arrays.
+
+    points is an (N, 3) float64 array in the (x, z, y) order the curve code uses, with z the
+    scaled altitude. hr, pace, altitude and real_distance are 1-D arrays of length N.
+
+    Statistics are computed with vectorized reductions the first time they are read and then
+    cached. The arrays are treated as read-only once the track is built; stages that change the
+    points return a new RunTrack rather than editing this one.
+    """
+    __slots__ = ("points", "hr", "pace", "altitude", "real_distance",
+                 "starting_coordinates", "ttl_distance", "z_scale", "_cache")
+
+    def __init__(self, points, hr, pace, altitude, real_distance,
+                 starting_coordinates=(0.0, 0.0), ttl_distance=0.0, z_scale=1.0):
+        points = np.ascontiguousarray(points, dtype=np.float64).reshape(-1, 3)
+        n = len(points)
+        columns = {
+            "hr": np.ascontiguousarray(hr, dtype=np.int8),
+            "pace": np.ascontiguousarray(pace, dtype=np.float64),
+            "altitude": np.ascontiguousarray(altitude, dtype=np.float64),
+            "real_distance": np.ascontiguousarray(real_distance, dtype=np.float64),
+        }
+        for name, column in columns.items():
+            if column.shape != (n,):
+                raise ValueError(f"The {name} column has {column.size} values but there are {n} points.")
+
+        self.points = points
+        self.hr = columns["hr"]
+        self.pace = columns["pace"]
+        self.altitude = columns["altitude"]
+        self.real_distance = columns["real_distance"]
+        self.starting_coordinates = tuple(starting_coordinates)
+        self.ttl_distance = ttl_distance
+        self.z_scale = z_scale
+        self._cache = {}
+
+    @classmethod
+    def from_run(cls, result, z_scale=None):
+        """
+        Builds a RunTrack from the dict returned by `process_run_file`.
+
+        Typed columns from the streaming loader are wrapped without copying element by element.
+        z_scale is only needed when the points are a plain list and the original scale matters
+        to later stages; it defaults to the scale stored on a PointColumns view.
+        """
+        points = result["points"]
+        if isinstance(points, loader.PointColumns) and z_scale is None:
+            z_scale = points.z_scale
+
+        return cls(points=as_point_array(points),
+                   hr=result["hr_widths"],
+                   pace=result["paces"],
+                   altitude=result["altitudes"],
+                   real_distance=result["real_distances"],
+                   starting_coordinates=result["starting_coordinates"],
+                   ttl_distance=result["ttl_distance"],
+                   z_scale=1.0 if z_scale is None else z_scale)
+
+    @classmethod
+    def from_file(cls, json_file_path, z_scale):
+        """Loads a run file (JSON or binary, see run_binary.load_run) straight into a RunTrack."""
+        return cls.from_run(run_binary.load_run(json_file_path, z_scale))
+
+    def __len__(self):
+        return len(self.points)
+
+    def __repr__(self):
+        return f"RunTrack({len(self)} points, {self.ttl_distance:.2f}km)"
+
+    def take(self, indices):
+        """
+        Returns a new RunTrack holding only the given point indices (or boolean mask),
+        keeping every column aligned with the points.
+        """
+        return RunTrack(points=self.points[indices],
+                        hr=self.hr[indices],
+                        pace=self.pace[indices],
+                        altitude=self.altitude[indices],
+                        real_distance=self.real_distance[indices],
+                        starting_coordinates=self.starting_coordinates,
+                        ttl_distance=self.ttl_distance,
+                        z_scale=self.z_scale)
+
+    def to_run(self):
+        """Returns the track in the dict layout of `process_run_file`, with arrays as values."""
+        return {
+            "starting_coordinates": self.starting_coordinates,
+            "ttl_distance": self.ttl_distance,
+            "points": self.points,
+            "hr_widths": self.hr,
+            "real_distances": self.real_distance,
+            "paces": self.pace,
+            "altitudes": self.altitude
+        }
+
+    def _cached(self, name, compute):
+        try:
+            return self._cache[name]
+        except KeyError:
+            value = self._cache[name] = compute()
+            return value
+
+    def _require_points(self):
+        if len(self.points) == 0:
+            raise ValueError("The track has no points.")
+
+    @property
+    def highest_point(self):
+        """Maximum point z (scaled altitude), used for the extrusion distance."""
+        def compute():
+            self._require_points()
+            return float(self.points[:, 1].max())
+        return self._cached("highest_point", compute)
+
+    @property
+    def total_gain(self):
+        """Sum of all positive altitude steps, in metres."""
+        return self._cached("total_gain", lambda: float(np.clip(np.diff(self.altitude), 0, None).sum()))
+
+    @property
+    def avg_pace(self):
+        """Average pace in min/km, i.e. the reciprocal of the mean of the per-point pace values."""
+        def compute():
+            self._require_points()
+            return float(1 / self.pace.mean())
+        return self._cached("avg_pace", compute)
+
+    @property
+    def bounding_box(self):
+        """(min, max) corners of the points as two length-3 arrays in (x, z, y) order."""
+        def compute():
+            self._require_points()
+            return self.points.min(axis=0), self.points.max(axis=0)
+        return self._cached("bounding_box", compute)
+
+    @property
+    def cumulative_distance(self):
+        """Running total of real_distance, one value per point."""
+        return self._cached("cumulative_distance", lambda: np.cumsum(self.real_distance))
+
+    @property
+    def arc_length(self):
+        """Cumulative 3-D path length through the points in model units, starting at 0."""
+        def compute():
+            steps = np.linalg.norm(np.diff(self.points, axis=0), axis=1)
+            return np.concatenate(([0.0], np.cumsum(steps)))
+        return self._cached("arc_length", compute)
@@ -0,0 +1,158 @@
+# Context-free scene building for StraViz: bpy.data and bmesh instead of bpy.ops.
+#
+# Operators act on the selection and the active object and update the view layer on every
+# call, which makes them slow in loops and fragile in background mode. Everything here takes
+# and returns explicit object references and never reads the selection, the active object or
+# a window, so it behaves the same in `blender -b` as in the UI (see StraViz.main_data).
+
+import bpy
+import numpy as np
+
+# bpy.data collection of each object type's data, for removing data left without users.
+DATA_COLLECTIONS = {'MESH': "meshes", 'CURVE': "curves", 'FONT': "curves", 'LIGHT': "lights"}
+
+
+def link(obj, collection=None):
+    """Links obj into `collection` (default: the scene's master collection) and returns it."""
+    (collection or bpy.context.scene.collection).objects.link(obj)
+    return obj
+
+
+def add_cube(name, scale=(1.0, 1.0, 1.0), location=(0.0, 0.0, 0.0), collection=None):
+    """
+    Adds a 2 x 2 x 2 cube like primitive_cube_add (with its UV map), sized by the object scale.
+
+    Returns:
+        bpy.types.Object: The new cube object.
+    """
+    import bmesh
+
+    mesh = bpy.data.meshes.new(name)
+    bm = bmesh.new()
+    bm.loops.layers.uv.new("UVMap")
+    bmesh.ops.create_cube(bm, size=2.0, calc_uvs=True)
+    bm.to_mesh(mesh)
+    bm.free()
+    cube = bpy.data.objects.new(name=name, object_data=mesh)
+    cube.location = location
+    cube.scale = scale
+    return link(cube, collection)
+
+
+def add_text(body, name="Text", location=(0.0, 0.0, 0.0), scale=(1.0, 1.0, 1.0), extrude=0.0,
+             align_x='LEFT', collection=None):
+    """
+    Adds a text object like text_add, with its body, extrusion and alignment already set.
+
+    Returns:
+        bpy.types.Object: The new text object.
+    """
+    text_data = bpy.data.curves.new(name=name, type='FONT')
+    text_data.body = body
+    text_data.extrude = extrude
+    text_data.align_x = align_x
+    text_obj = bpy.data.objects.new(name=name, object_data=text_data)
+    text_obj.location = location
+    text_obj.scale = scale
+    return link(text_obj, collection)
+
+
+def add_point_light(name, location, energy, parent=None, collection=None):
+    """
+    Adds a point light like light_add. With a parent, the location is in the parent's space and
+    the light goes into the parent's first collection.
+
+    Returns:
+        bpy.types.Object: The new light object.
+    """
+    light_data = bpy.data.lights.new(name=name, type='POINT')
+    light_data.energy = energy
+    light = bpy.data.objects.new(name=name, object_data=light_data)
+    light.location = location
+    light.parent = parent
+    if collection is None and parent is not None:
+        collection = parent.users_collection[0]
+    return link(light, collection)
+
+
+def remove_object(obj, remove_data=True):
+    """Deletes obj from every collection, and its data when nothing else uses it."""
+    data, data_kind = obj.data, DATA_COLLECTIONS.get(obj.type)
+    bpy.data.objects.remove(obj, do_unlink=True)
+    if remove_data and data is not None and data_kind and data.users == 0:
+        getattr(bpy.data, data_kind).remove(data)
+
+
+def evaluated_mesh(obj, depsgraph=None):
+    """
+    A new mesh of obj as evaluated (modifiers applied, curves meshed), with every attribute.
+    """
+    depsgraph = depsgraph or bpy.context.evaluated_depsgraph_get()
+    return bpy.data.meshes.new_from_object(obj.evaluated_get(depsgraph), preserve_all_data_layers=True,
+                                           depsgraph=depsgraph)
+
+
+def curve_to_mesh(curve_object, depsgraph=None):
+    """
+    Replaces a curve object by a mesh object with the same name, transform, collections and
+    children, like convert(target='MESH'). The curve data is removed when no longer used.
+
+    Returns:
+        bpy.types.Object: The new mesh object.
+    """
+    name = curve_object.name
+    mesh = evaluated_mesh(curve_object, depsgraph)
+    mesh_object = bpy.data.objects.new(name=f"{name}_mesh", object_data=mesh)
+    mesh_object.location = curve_object.location
+    mesh_object.rotation_euler = curve_object.rotation_euler
+    mesh_object.scale = curve_object.scale
+    for collection in curve_object.users_collection:
+        collection.objects.link(mesh_object)
+    for child in curve_object.children:
+        child.parent = mesh_object
+    remove_object(curve_object)
+    mesh_object.name = name
+    return mesh_object
+
+
+def shade_flat(mesh):
+    """Marks every face of the mesh flat, like shade_flat."""
+    mesh.polygons.foreach_set("use_smooth", np.zeros(len(mesh.polygons), dtype=bool))
+
+
+def local_direction(obj, direction):
+    """The object-space vector of a world-space direction, for an object without a parent."""
+    import mathutils
+
+    return obj.matrix_basis.to_3x3().inverted() @ mathutils.Vector(direction)
+
+
+def extrude_region(mesh, offset):
+    """
+    Extrudes all of the mesh by `offset` (object space), like selecting everything in edit mode
+    and running extrude_region_move. Vertex attributes are carried to the new vertices.
+    """
+    import bmesh
+
+    bm = bmesh.new()
+    bm.from_mesh(mesh)
+    extruded = bmesh.ops.extrude_face_region(bm, geom=bm.verts[:] + bm.edges[:] + bm.faces[:])
+    moved = [element for element in extruded["geom"] if isinstance(element, bmesh.types.BMVert)]
+    bmesh.ops.translate(bm, vec=offset, verts=moved)
+    bm.to_mesh(mesh)
+    bm.free()
+    mesh.update()
+
+
+def apply_modifier(obj, modifier, depsgraph=None):
+    """
+    Makes a modifier permanent like modifier_apply: the object's data becomes its evaluated
+    mesh and the modifier is removed. Only modifiers above `modifier` in the stack should exist.
+    """
+    mesh = evaluated_mesh(obj, depsgraph)
+    old_mesh, name = obj.data, obj.data.name
+    obj.modifiers.remove(modifier)
+    obj.data = mesh
+    if old_mesh.users == 0:
+        bpy.data.meshes.remove(old_mesh)
+    mesh.name = name
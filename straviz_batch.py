@@ -0,0 +1,175 @@
+# Headless batch entry point for StraViz.
+#
+# Builds one model per run file with the demo delays and redraws turned off and saves
+# each one to its own .blend file:
+#
+#   blender -b -P straviz_batch.py -- runs/ more/*.json single.json -o models/
+#
+# With --composite NAME, all runs are merged onto one platform instead (see
+# StraViz.main_composite) and saved as <output dir>/NAME.blend.
+#
+# Inputs can be run files, directories (every .json, .svrun, .gpx, .tcx and .fit file inside)
+# or glob patterns.
+
+import argparse
+import glob
+import os
+import sys
+import time
+
+import bpy
+
+script_dir = os.path.dirname(os.path.abspath(__file__))
+if script_dir not in sys.path:
+    sys.path.append(script_dir)
+
+import StraViz as sv
+import batch_scheduler
+import run_lod
+
+
+def expand_inputs(inputs):
+    """
+    Expands files, directories and glob patterns into a sorted, de-duplicated list of run files.
+    """
+    paths = []
+    for item in inputs:
+        if os.path.isdir(item):
+            matches = batch_scheduler.run_files_in(item)
+        elif glob.has_magic(item):
+            matches = glob.glob(item)
+        else:
+            matches = [item]
+        if not matches:
+            print(f"No run files match '{item}'")
+        paths.extend(matches)
+    return sorted(set(os.path.abspath(path) for path in paths))
+
+
+def save_blend(output_path):
+    """
+    Saves the scene with the full run meshes as object data, so renders of the file use them
+    even in a Blender without the run_lod handlers (see run_lod.py).
+    """
+    run_lod.show_render_meshes()
+    bpy.ops.wm.save_as_mainfile(filepath=output_path)
+
+
+def build_run(run_path, output_dir, trace_dir=None):
+    """
+    Builds one run in a fresh empty file and saves it as <output_dir>/<run name>.blend.
+    With trace_dir, the stage timings go to <trace_dir>/<run name>.json and .trace.json.
+
+    Returns:
+        tuple: (output path, build seconds, save seconds)
+    """
+    bpy.ops.wm.read_factory_settings(use_empty=True)
+    name = os.path.splitext(os.path.basename(run_path))[0]
+    sv.trace_path = os.path.join(trace_dir, name) if trace_dir else None
+
+    start = time.perf_counter()
+    sv.main_data(run_path)
+    built = time.perf_counter()
+
+    output_path = os.path.join(output_dir, f"{name}.blend")
+    save_blend(output_path)
+    saved = time.perf_counter()
+    return output_path, built - start, saved - built
+
+
+def build_composite(run_paths, output_dir, name, trace_dir=None):
+    """
+    Builds all runs onto one platform in a fresh empty file and saves it as <output_dir>/<name>.blend.
+
+    Returns:
+        tuple: (output path, build seconds, save seconds)
+    """
+    bpy.ops.wm.read_factory_settings(use_empty=True)
+    sv.trace_path = os.path.join(trace_dir, name) if trace_dir else None
+
+    start = time.perf_counter()
+    sv.main_composite(run_paths)
+    built = time.perf_counter()
+
+    output_path = os.path.join(output_dir, f"{name}.blend")
+    save_blend(output_path)
+    saved = time.perf_counter()
+    return output_path, built - start, saved - built
+
+
+def parse_args(argv):
+    parser = argparse.ArgumentParser(prog="blender -b -P straviz_batch.py --",
+                                     description="Build StraViz models for many run files.")
+    parser.add_argument("inputs", nargs="+", help="Run files, directories or glob patterns.")
+    parser.add_argument("-o", "--output-dir", required=True, help="Directory for the .blend files.")
+    parser.add_argument("--name", default=None, help="Text shown on the platform (defaults to txt_name).")
+    parser.add_argument("--trace", default=None, metavar="DIR",
+                        help="Write per-stage timings for every run to DIR (JSON and Chrome trace events).")
+    parser.add_argument("--materials", default=None, metavar="BLEND",
+                        help="Append the materials from this library .blend (see material_library.py).")
+    parser.add_argument("--composite", default=None, metavar="NAME",
+                        help="Merge all runs onto one platform and save it as NAME.blend.")
+    parser.add_argument("--layout", default=None, choices=("overlay", "grid"),
+                        help="Composite layout (defaults to composite_layout).")
+    parser.add_argument("--density", default=None, type=float, metavar="RADIUS",
+                        help="Composite wall widths from how many runs passed within RADIUS (see route_density.py).")
+    return parser.parse_args(argv)
+
+
+def main(argv):
+    args = parse_args(argv)
+    run_paths = expand_inputs(args.inputs)
+    if not run_paths:
+        print("Nothing to build.")
+        return 1
+    os.makedirs(args.output_dir, exist_ok=True)
+    if args.trace:
+        os.makedirs(args.trace, exist_ok=True)
+
+    # No demo delays or viewport redraws in batch mode.
+    sv.t = 0
+    if args.name is not None:
+        sv.txt_name = args.name
+    if args.materials is not None:
+        sv.material_library_path = os.path.abspath(args.materials)
+
+    if args.composite:
+        if args.layout is not None:
+            sv.composite_layout = args.layout
+        if args.density is not None:
+            sv.density_radius = args.density
+        output_path, build_seconds, save_seconds = build_composite(run_paths, args.output_dir,
+                                                                   args.composite, args.trace)
+        print(f"{len(run_paths)} runs -> {output_path}: build {build_seconds:.2f}s, save {save_seconds:.2f}s")
+        return 0
+
+    results = []
+    batch_start = time.perf_counter()
+    for i, run_path in enumerate(run_paths, start=1):
+        print(f"[{i}/{len(run_paths)}] Building {run_path}")
+        try:
+            output_path, build_seconds, save_seconds = build_run(run_path, args.output_dir, args.trace)
+        except Exception as error:
+            print(f"[{i}/{len(run_paths)}] FAILED {run_path}: {error!r}")
+            results.append((run_path, None, None, None))
+            continue
+        results.append((run_path, output_path, build_seconds, save_seconds))
+
+    total = time.perf_counter() - batch_start
+    failures = sum(1 for _, output_path, _, _ in results if output_path is None)
+
+    print("\nRun                                      Build (s)   Save (s)")
+    for run_path, output_path, build_seconds, save_seconds in results:
+        name = os.path.basename(run_path)
+        if output_path is None:
+            print(f"{name:<40} {'failed':>9}")
+        else:
+            print(f"{name:<40} {build_seconds:9.2f} {save_seconds:10.2f}")
+    print(f"{len(results) - failures} built, {failures} failed, {total:.2f}s total")
+    return 1 if failures else 0
+
+
+if __name__ == "__main__":
+    # Blender passes its own arguments first; ours follow "--".
+    argv = sys.argv[sys.argv.index("--") + 1:] if "--" in sys.argv else []
+    sys.exit(main(argv))
@@ -0,0 +1,25 @@
+# Shared fixtures for the Blender-free modules. Run from the repository root:
+#   python -m pytest tests
+# Nothing here imports bpy; the StraViz.py and helpers.py code that needs Blender is covered by
+# benchmarks/bench_pipeline.py with fake_bpy instead.
+
+import os
+import sys
+
+import pytest
+
+tests_dir = os.path.dirname(os.path.abspath(__file__))
+repo_dir = os.path.dirname(tests_dir)
+sys.path.insert(0, repo_dir)
+sys.path.insert(0, os.path.join(repo_dir, "benchmarks"))
+
+from run_track import RunTrack
+
+TEST_RUN = os.path.join(repo_dir, "testRun.json")
+Z_SCALE = 0.02   # StraViz.z_scale
+
+
+@pytest.fixture(scope="session")
+def test_track():
+    """testRun.json as a RunTrack, with StraViz's z scale."""
+    return RunTrack.from_file(TEST_RUN, Z_SCALE)
@@ -0,0 +1,69 @@
+import io
+import os
+import shlex
+import sys
+
+import batch_scheduler
+import render_farm
+from conftest import repo_dir
+
+STUB = os.path.join(repo_dir, "benchmarks", "stub_worker.py")
+
+
+def stub_template(*options):
+    return " ".join([shlex.quote(sys.executable), shlex.quote(STUB), "{runs}", "-o", "{output_dir}", *options])
+
+
+def run_jobs(tmp_path, names, options=(), chunk_size=1, **kwargs):
+    runs = [str(tmp_path / f"{name}.json") for name in names]
+    out = io.StringIO()
+    scheduler = batch_scheduler.Scheduler(stub_template(*options), str(tmp_path), workers=2, out=out, **kwargs)
+    return scheduler.run(batch_scheduler.make_jobs(runs, chunk_size)), out.getvalue()
+
+
+def test_build_command_expands_runs():
+    argv = batch_scheduler.build_command("blender -b -P {script} -- {runs} -o {output_dir} --job {job}",
+                                         ["a.json", "b c.json"], "out", 3)
+    assert argv[:3] == ["blender", "-b", "-P"]
+    assert argv[4:] == ["--", "a.json", "b c.json", "-o", "out", "--job", "3"]
+
+
+def test_default_workers_fail_on_script_errors():
+    """Blender exits 0 after an uncaught Python error unless --python-exit-code is set."""
+    argv = batch_scheduler.build_command(batch_scheduler.DEFAULT_WORKER_CMD, ["a.json"], "out", 1)
+    assert argv.index("--python-exit-code") < argv.index("-P")
+    assert "--python-exit-code 1 -P" in render_farm.DEFAULT_WORKER_CMD
+
+
+def test_all_jobs_succeed(tmp_path):
+    jobs, log = run_jobs(tmp_path, ["a", "b", "c"], ("--seconds", "0"), chunk_size=2)
+    assert [len(job.runs) for job in jobs] == [2, 1]
+    assert all(job.ok and job.attempts == 1 for job in jobs)
+    assert all((tmp_path / f"{name}.blend").exists() for name in "abc")
+    assert "[job 1 try 1] [1/2] Building" in log
+
+
+def test_crash_is_retried(tmp_path):
+    jobs, log = run_jobs(tmp_path, ["a", "b"], ("--seconds", "0", "--crash-once"), retries=1)
+    assert all(job.ok and job.attempts == 2 for job in jobs)
+    assert "retrying" in log
+
+
+def test_crash_without_retries_fails(tmp_path):
+    jobs, _ = run_jobs(tmp_path, ["a"], ("--seconds", "0", "--crash-once"), retries=0)
+    assert not jobs[0].ok and jobs[0].attempts == 1
+
+
+def test_hanging_job_times_out(tmp_path):
+    jobs, log = run_jobs(tmp_path, ["fine", "stuck"], ("--seconds", "0", "--hang", "stuck"), timeout=1, retries=1)
+    fine, stuck = jobs
+    assert fine.ok
+    assert not stuck.ok and stuck.timed_out and stuck.attempts == 2
+    assert "timed out" in log
+
+
+def test_missing_worker_is_reported(tmp_path):
+    scheduler = batch_scheduler.Scheduler("/nonexistent/blender {runs}", str(tmp_path), 1, retries=0,
+                                          out=io.StringIO())
+    job, = scheduler.run(batch_scheduler.make_jobs(["a.json"], 1))
+    assert not job.ok and "could not start worker" in scheduler.out.getvalue()
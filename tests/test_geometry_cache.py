@@ -0,0 +1,68 @@
+import numpy as np
+import pytest
+
+import fake_bpy
+from conftest import TEST_RUN
+from geometry_cache import GeometryCache
+
+
+@pytest.fixture(scope="module")
+def straviz():
+    fake_bpy.install()
+    import StraViz
+    return StraViz
+
+
+def test_round_trip(tmp_path):
+    cache = GeometryCache(str(tmp_path))
+    key = cache.key(TEST_RUN, {"z_scale": 0.02})
+    assert cache.get(key) is None
+    vertices = np.arange(12, dtype=np.float32).reshape(4, 3)
+    cache.put(key, vertices, [0, 1, 2, 3], [4], attributes={"pace_glow": np.ones(4)}, stats={"gain": 12.0})
+    entry = cache.get(key)
+    np.testing.assert_array_equal(entry["vertices"], vertices)
+    np.testing.assert_array_equal(entry["attributes"]["pace_glow"], np.ones(4))
+    assert entry["stats"]["gain"] == 12.0
+
+
+def test_key_follows_every_geometry_setting(straviz, monkeypatch):
+    base = GeometryCache.key(TEST_RUN, straviz.geometry_parameters())
+    for name, value in (("pace_attribute", "pace_other"), ("z_scale", 0.05), ("scaling_strategy", "log1p"),
+                        ("simplify_tolerance", 0.1)):
+        with monkeypatch.context() as patch:
+            patch.setattr(straviz, name, value)
+            assert GeometryCache.key(TEST_RUN, straviz.geometry_parameters()) != base, name
+    assert GeometryCache.key(TEST_RUN, straviz.geometry_parameters()) == base
+
+
+@pytest.mark.parametrize("damage", [lambda data: data[:len(data) // 2], lambda data: b"", lambda data: b"not a zip"])
+def test_damaged_entry_is_a_miss(tmp_path, damage):
+    cache = GeometryCache(str(tmp_path))
+    key = cache.key(TEST_RUN, {})
+    cache.put(key, np.zeros((3, 3)), [0, 1, 2], [3])
+    path = tmp_path / f"{key}.npz"
+    path.write_bytes(damage(path.read_bytes()))
+    assert cache.get(key) is None
+    assert (cache.hits, cache.misses) == (0, 1)
+    assert not path.exists()
+
+
+def test_entry_evicted_during_a_hit(tmp_path, monkeypatch):
+    cache = GeometryCache(str(tmp_path))
+    key = cache.key(TEST_RUN, {})
+    cache.put(key, np.zeros((3, 3)), [0, 1, 2], [3])
+
+    def evicted(path, *args, **kwargs):
+        raise FileNotFoundError(path)
+
+    monkeypatch.setattr("geometry_cache.os.utime", evicted)
+    assert cache.get(key) is None and cache.misses == 1
+
+
+def test_one_cache_per_directory(straviz, tmp_path, monkeypatch):
+    first = straviz.geometry_cache_for(str(tmp_path))
+    first.hits = 3
+    monkeypatch.setattr(straviz, "cache_max_mb", 8)
+    again = straviz.geometry_cache_for(str(tmp_path))
+    assert again is first and again.hits == 3 and again.max_bytes == 8 * 2 ** 20
+    assert straviz.geometry_cache_for(str(tmp_path / "other")) is not first
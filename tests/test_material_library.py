@@ -0,0 +1,50 @@
+import pytest
+
+import fake_bpy
+
+fake_bpy.install()
+
+import material_library as materials
+
+
+def glass_name(**params):
+    return materials.variant_name("Glass_Material", materials.variant_params("Glass_Material", params))
+
+
+def test_default_pipeline_glass_keeps_its_name():
+    assert glass_name(ior=1.45, roughness=0.01, pace_attribute="pace_glow") == "Glass_Material"
+
+
+def test_variant_names_are_readable():
+    assert glass_name(pace_attribute=None) == "Glass_Material[no_pace_attribute]"
+    assert glass_name(ior=1.5) == "Glass_Material[ior=1.5]"
+    assert glass_name(pace_attribute="speed") == "Glass_Material[pace_attribute=speed]"
+
+
+def test_long_names_are_hashed():
+    name = glass_name(pace_attribute="a_very_long_attribute_name_for_the_normalized_pace_values")
+    assert len(name) <= 63 and name.startswith("Glass_Material[")
+
+
+def test_helper_defaults_match_the_spec():
+    import inspect
+
+    import helpers
+    signature = inspect.signature(helpers.assign_glass_material)
+    helper_defaults = {name: signature.parameters[name].default
+                       for name in materials.SPECS["Glass_Material"]["defaults"]}
+    assert helper_defaults == materials.SPECS["Glass_Material"]["defaults"]
+
+
+def test_missing_pace_attribute_does_not_glow():
+    """The Attribute node reads 0 where the mesh has no attribute; that must map to min_emission."""
+    nodes = {node["name"]: node for node in materials.SPECS["Glass_Material"]["nodes"]}
+    inputs = nodes["Pace Strength"]["inputs"]
+    assert (inputs["From Min"], inputs["To Min"]) == (0.0, "min_emission")
+    assert (inputs["From Max"], inputs["To Max"]) == (1.0, "max_emission")
+
+
+def test_slowest_points_glow_most():
+    import StraViz
+    glow = StraViz.pace_glow(StraViz.normalize_paces([0.2, 0.1, 0.3]))   # Pace is speed-like: 0.1 is slowest
+    assert list(glow) == pytest.approx([0.5, 1.0, 0.0])
@@ -0,0 +1,139 @@
+import json
+import tracemalloc
+
+import pytest
+
+import pipeline_trace
+
+
+class Counter:
+    """Stands in for the Blender object counter: returns whatever counts it holds now."""
+
+    def __init__(self):
+        self.counts = {"objects": 0, "vertices": 0}
+
+    def __call__(self):
+        return dict(self.counts)
+
+
+@pytest.fixture
+def counter():
+    return Counter()
+
+
+@pytest.fixture
+def tracer(counter):
+    tracer = pipeline_trace.Tracer(counter)
+    yield tracer
+    tracer.close()
+
+
+def traced_pipeline(tracer, counter):
+    with tracer.stage("build", runs=2):
+        with tracer.stage("load"):
+            data = bytearray(4 << 20)   # Freed before the stage ends: only the peak sees it
+            del data
+        with tracer.stage("mesh", vertices=400):
+            counter.counts = {"objects": 1, "vertices": 400}
+    return {record["name"]: record for record in tracer.records}
+
+
+def test_nested_stages(tracer, counter):
+    stages = traced_pipeline(tracer, counter)
+    # Records are added as stages finish, inner ones first.
+    assert [record["name"] for record in tracer.records] == ["load", "mesh", "build"]
+    assert [stages[name]["depth"] for name in ("build", "load", "mesh")] == [0, 1, 1]
+    build, load, mesh = stages["build"], stages["load"], stages["mesh"]
+    assert build["start"] <= load["start"] <= load["start"] + load["wall"] <= mesh["start"]
+    assert mesh["start"] + mesh["wall"] <= build["start"] + build["wall"]
+    assert build["details"] == {"runs": 2} and mesh["details"] == {"vertices": 400}
+    assert mesh["counts_before"] == {"objects": 0, "vertices": 0}
+    assert mesh["counts_after"] == build["counts_after"] == {"objects": 1, "vertices": 400}
+
+    # The inner stage resets the traced peak, but the outer stage still sees it.
+    assert load["memory"]["peak"] >= 4 << 20
+    assert build["memory"]["peak"] >= load["memory"]["peak"]
+    assert mesh["memory"]["peak"] < 4 << 20
+
+    lines = tracer.summary().splitlines()
+    assert [line.split()[0] for line in lines] == ["build", "load", "mesh"]
+    assert lines[1].startswith("  load") and "vertices 0->400" in lines[2]
+
+
+def test_failing_stage_is_recorded(tracer):
+    with pytest.raises(RuntimeError):
+        with tracer.stage("outer"):
+            with tracer.stage("inner"):
+                raise RuntimeError("boolean failed")
+    assert [(record["name"], record["depth"]) for record in tracer.records] == [("inner", 1), ("outer", 0)]
+    with tracer.stage("after"):
+        pass
+    assert tracer.records[-1]["depth"] == 0
+
+
+def test_json_and_chrome_trace(tmp_path, tracer, counter):
+    traced_pipeline(tracer, counter)
+    tracer.metadata = {"name": "testRun", "runs": ["testRun.json"]}
+    base = str(tmp_path / "trace")
+    tracer.write(base)
+
+    with open(base + ".json") as file:
+        written = json.load(file)
+    assert written["metadata"] == tracer.metadata
+    assert [stage["name"] for stage in written["stages"]] == ["load", "mesh", "build"]
+    assert set(written["stages"][0]) == {"name", "depth", "start", "wall", "cpu", "memory",
+                                         "counts_before", "counts_after", "details"}
+
+    with open(base + ".trace.json") as file:
+        trace = json.load(file)
+    assert trace["displayTimeUnit"] == "ms"
+    events = trace["traceEvents"]
+    assert events[0]["ph"] == "M" and events[0]["args"] == {"name": "testRun"}
+    complete = {event["name"]: event for event in events if event["ph"] == "X"}
+    assert set(complete) == {"build", "load", "mesh"}
+    for record in tracer.records:
+        event = complete[record["name"]]
+        assert event["ts"] == pytest.approx(record["start"] * 1e6)
+        assert event["dur"] == pytest.approx(record["wall"] * 1e6)
+        assert event["args"]["counts"] == record["counts_after"]
+    assert complete["build"]["args"]["runs"] == 2
+    counters = [event for event in events if event["ph"] == "C"]
+    # Counts at both ends of every stage, Python memory at the end.
+    assert sum(event["name"] == "counts" for event in counters) == 6
+    assert sum(event["name"] == "python memory" for event in counters) == 3
+
+
+def test_without_memory_or_counter():
+    tracer = pipeline_trace.Tracer(trace_memory=False)
+    with tracer.stage("load"):
+        pass
+    record, = tracer.records
+    assert record["memory"] is None and record["counts_before"] == record["counts_after"] == {}
+    assert not tracemalloc.is_tracing()
+    tracer.close()
+
+
+def test_close_stops_only_its_own_tracemalloc():
+    tracer = pipeline_trace.Tracer()
+    assert tracemalloc.is_tracing()
+    tracer.close()
+    assert not tracemalloc.is_tracing()
+
+    tracemalloc.start()
+    try:
+        tracer = pipeline_trace.Tracer()
+        tracer.close()
+        assert tracemalloc.is_tracing()
+    finally:
+        tracemalloc.stop()
+
+
+def test_null_tracer():
+    tracer = pipeline_trace.NULL_TRACER
+    with tracer.stage("load", runs=1):
+        value = 42
+    assert value == 42 and tracer.records == ()
+    with pytest.raises(RuntimeError):
+        with tracer.stage("mesh"):
+            raise RuntimeError
+    tracer.close()
@@ -0,0 +1,104 @@
+import math
+
+import numpy as np
+import pytest
+
+import route_density
+from run_track import RunTrack
+
+
+def club_runs(count=12, n=300, seed=6):
+    """Runs that share parts of one loop, with a few wandering off on their own."""
+    rng = np.random.default_rng(seed)
+    runs = []
+    for i in range(count):
+        t = np.sort(rng.uniform(0, 2 * np.pi, n))
+        loop = np.column_stack((5 * np.cos(t), 3 * np.sin(t))) + rng.normal(0, 0.15, (n, 2))
+        if i % 4 == 3:
+            loop += (8.0, -6.0)
+        runs.append(loop)
+    return runs
+
+
+def brute_counts(runs, queries, radius, distinct_runs=True):
+    counts = []
+    for point in queries:
+        near = [np.linalg.norm(run - point, axis=1) <= radius for run in runs]
+        counts.append(sum(bool(close.any()) for close in near) if distinct_runs
+                      else sum(int(close.sum()) for close in near))
+    return np.array(counts)
+
+
+def indexed(runs, cell_size):
+    index = route_density.GridIndex(cell_size)
+    for run in runs:
+        index.insert(run)
+    return index
+
+
+@pytest.mark.parametrize("cell_size", [0.2, 0.5, 1.3])
+@pytest.mark.parametrize("distinct_runs", [True, False])
+def test_count_within_matches_brute_force(cell_size, distinct_runs):
+    runs = club_runs()
+    index = indexed(runs, cell_size)
+    queries = np.concatenate((runs[0][::7], np.random.default_rng(1).uniform(-9, 12, (40, 2))))
+    np.testing.assert_array_equal(index.count_within(queries, 0.5, distinct_runs),
+                                  brute_counts(runs, queries, 0.5, distinct_runs))
+    assert len(index) == sum(len(run) for run in runs) and index.run_count == len(runs)
+
+
+def test_count_within_in_chunks(monkeypatch):
+    runs = club_runs(count=4, n=100)
+    index = indexed(runs, 0.25)
+    expected = index.count_within(runs[1], 0.5)
+    monkeypatch.setattr(route_density, "QUERY_CHUNK", 7)
+    np.testing.assert_array_equal(index.count_within(runs[1], 0.5), expected)
+
+
+def test_run_counts_bounds():
+    runs = club_runs()
+    radius, cell_size = 0.5, 0.25
+    index = indexed(runs, cell_size)
+    queries = np.concatenate(runs)
+    counts = index.run_counts(queries, radius)
+    # Never fewer than the exact count; never more than the runs within the cells searched.
+    assert (counts >= index.count_within(queries, radius)).all()
+    reach = math.sqrt(2) * (math.ceil(radius / cell_size) + 1) * cell_size
+    assert (counts[::25] <= brute_counts(runs, queries[::25], reach)).all()
+    assert counts.max() <= len(runs) and counts.min() >= 1
+
+
+def test_empty_index():
+    index = route_density.GridIndex(1.0)
+    queries = np.zeros((3, 2))
+    np.testing.assert_array_equal(index.count_within(queries, 1.0), [0, 0, 0])
+    np.testing.assert_array_equal(index.run_counts(queries, 1.0), [0, 0, 0])
+    with pytest.raises(ValueError):
+        route_density.GridIndex(0)
+
+
+def test_run_densities():
+    runs = club_runs(count=8, n=200)
+    tracks = [RunTrack(np.column_stack((run[:, 0], np.zeros(len(run)), run[:, 1])), np.zeros(len(run)),
+                       np.zeros(len(run)), np.zeros(len(run)), np.zeros(len(run))) for run in runs]
+    densities = route_density.run_densities(tracks, 0.5)
+    index = indexed(runs, 0.25)
+    assert len(densities) == len(tracks)
+    for run, density in zip(runs, densities):
+        np.testing.assert_array_equal(density, index.run_counts(run, 0.5))
+    # The runs moved off the shared loop (every fourth) see fewer neighbours.
+    assert densities[3].mean() < densities[0].mean()
+
+
+def test_density_widths():
+    counts = np.array([1, 3, 5])
+    np.testing.assert_allclose(route_density.density_widths(counts, 5), [0, 5, 10])
+    np.testing.assert_allclose(route_density.density_widths(counts, 5, max_width=4), [0, 2, 4])
+    np.testing.assert_allclose(route_density.density_widths(counts, 5, hr_widths=[10, 10, 2], mode="modulate"),
+                               [2, 6, 2])
+    # A single run on its own is not divided by zero.
+    np.testing.assert_allclose(route_density.density_widths([1, 1], 1), [0, 0])
+    with pytest.raises(ValueError, match="needs the HR widths"):
+        route_density.density_widths(counts, 5, mode="modulate")
+    with pytest.raises(ValueError, match="Unknown density mode"):
+        route_density.density_widths(counts, 5, mode="log")
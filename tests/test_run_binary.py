@@ -0,0 +1,82 @@
+import json
+import math
+import struct
+
+import numpy as np
+import pytest
+
+import run_binary
+import run_loader as loader
+from conftest import TEST_RUN, Z_SCALE
+
+
+def assert_same_run(binary, reference):
+    assert binary["starting_coordinates"] == reference["starting_coordinates"]
+    assert binary["ttl_distance"] == reference["ttl_distance"]
+    assert list(binary["points"]) == list(reference["points"])
+    for key in ("hr_widths", "real_distances", "paces", "altitudes"):
+        np.testing.assert_array_equal(binary[key], reference[key])
+
+
+@pytest.fixture
+def converted(tmp_path):
+    return run_binary.convert_json_run(TEST_RUN, str(tmp_path / "run.svrun"))
+
+
+def test_round_trip_matches_json(converted):
+    binary = run_binary.load_run_binary(converted, Z_SCALE)
+    reference = loader.load_run_columns(TEST_RUN, Z_SCALE)
+    assert_same_run(binary, reference)
+    assert binary["zero_altitude"] == reference["zero_altitude"]
+    with open(TEST_RUN) as file:
+        assert binary["zero_altitude"] == json.load(file)["zeroAltitude"]
+    assert run_binary.is_binary_run(converted) and not run_binary.is_binary_run(TEST_RUN)
+    assert_same_run(run_binary.load_run(converted, Z_SCALE), reference)
+
+
+def test_zero_altitude_after_the_points(tmp_path):
+    with open(TEST_RUN) as file:
+        data = json.load(file)
+    zero_altitude = data.pop("zeroAltitude")
+    reordered = tmp_path / "reordered.json"
+    reordered.write_text(json.dumps({**data, "zeroAltitude": zero_altitude}))
+    missing = tmp_path / "missing.json"
+    missing.write_text(json.dumps(data))
+
+    header = run_binary.read_header(run_binary.convert_json_run(str(reordered)))
+    assert header["zero_altitude"] == zero_altitude
+    assert math.isnan(run_binary.read_header(run_binary.convert_json_run(str(missing)))["zero_altitude"])
+
+
+def test_empty_run(tmp_path):
+    path = tmp_path / "empty.json"
+    path.write_text('{"startingCoordinates": {"latitude": 1, "longitude": 2}, "ttlDistance": 0, "normPoints": []}')
+    binary = run_binary.load_run_binary(run_binary.convert_json_run(str(path)), Z_SCALE)
+    assert len(binary["points"]) == 0 and binary["starting_coordinates"] == (1, 2)
+
+
+@pytest.mark.parametrize("change", [-1, 1])
+def test_wrong_size_is_rejected(converted, change):
+    with open(converted, "rb") as file:
+        data = file.read()
+    with open(converted, "wb") as file:
+        file.write(data[:change] if change < 0 else data + b"\0")
+    with pytest.raises(ValueError, match="should be"):
+        run_binary.load_run_binary(converted, Z_SCALE)
+
+
+def test_wrong_version_is_rejected(converted):
+    with open(converted, "r+b") as file:
+        file.seek(len(run_binary.MAGIC))
+        file.write(struct.pack("<I", run_binary.VERSION + 1))
+    with pytest.raises(ValueError, match="version"):
+        run_binary.load_run_binary(converted, Z_SCALE)
+
+
+def test_not_a_binary_run(tmp_path):
+    with pytest.raises(ValueError, match="not a binary run"):
+        run_binary.read_header(TEST_RUN)
+    short = tmp_path / "short.svrun"
+    short.write_bytes(run_binary.MAGIC)
+    with pytest.raises(ValueError, match="too short"):
+        run_binary.read_header(str(short))
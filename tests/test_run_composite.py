@@ -0,0 +1,142 @@
+import json
+import math
+
+import numpy as np
+import pytest
+
+import run_binary
+import run_composite
+from conftest import TEST_RUN, Z_SCALE
+from run_track import RunTrack
+from synthetic_runs import write_synthetic_run
+
+PLATFORM_SIZE, MARGIN = 100.0, 2.0
+USABLE = PLATFORM_SIZE - 2 * MARGIN
+
+
+def load(path):
+    return run_binary.load_run(path, Z_SCALE)
+
+
+@pytest.fixture(scope="module")
+def run_paths(tmp_path_factory):
+    """Four good runs with three bad files between them."""
+    directory = tmp_path_factory.mktemp("runs")
+    single = directory / "single.json"
+    single.write_text(json.dumps({"startingCoordinates": {"latitude": 1, "longitude": 2}, "ttlDistance": 0.1,
+                                  "normPoints": [{"coordinates": {"x": 0, "y": 0}, "altitudeFromZero": 0,
+                                                  "pace": 1, "realDistance": 0.1, "HR": 3}]}))
+    broken = directory / "broken.json"
+    broken.write_text('{"normPoints": [')
+    return [write_synthetic_run(str(directory / "a.json"), 300, seed=1), str(directory / "missing.json"),
+            TEST_RUN, str(single),
+            write_synthetic_run(str(directory / "b.json"), 120, seed=2), str(broken),
+            write_synthetic_run(str(directory / "c.json"), 500, seed=3)]
+
+
+GOOD = [0, 2, 4, 6]   # The run_paths that load
+
+
+def build(run_paths, layout, **options):
+    return run_composite.build_composite(run_paths, load, layout=layout, platform_size=PLATFORM_SIZE,
+                                         margin=MARGIN, **options)
+
+
+def run_vertices(composite, run):
+    return composite.vertices[run.vertex_start:run.vertex_stop]
+
+
+def check_merged(composite, run_paths):
+    assert [run.path for run in composite.runs] == [run_paths[i] for i in GOOD]
+    assert composite.runs[0].vertex_start == 0 and composite.runs[-1].vertex_stop == len(composite.vertices)
+    assert composite.runs[-1].face_stop == len(composite.faces)
+    for i, run in enumerate(composite.runs):
+        if i:
+            assert run.vertex_start == composite.runs[i - 1].vertex_stop
+            assert run.face_start == composite.runs[i - 1].face_stop
+        assert (composite.run_index[run.vertex_start:run.vertex_stop] == i).all()
+        faces = composite.faces[run.face_start:run.face_stop]
+        assert faces.min() >= run.vertex_start and faces.max() < run.vertex_stop
+        # Each run's own pace, normalized to 0-1 and the same on the four corners of a ring.
+        pace = composite.pace[run.vertex_start:run.vertex_stop].reshape(-1, 4)
+        assert (pace == pace[:, :1]).all()
+        assert pace.min() == 0 and pace.max() == pytest.approx(1)
+    assert composite.vertices.dtype == np.float32 and composite.faces.dtype == np.int32
+
+
+@pytest.mark.parametrize("layout", run_composite.LAYOUTS)
+def test_runs_are_merged_in_order(run_paths, layout, capsys):
+    composite = build(run_paths, layout)
+    check_merged(composite, run_paths)
+    skipped = capsys.readouterr().out
+    for i in set(range(len(run_paths))) - set(GOOD):
+        assert f"Skipping {run_paths[i]}" in skipped
+    assert "fewer than two points" in skipped
+
+    tracks = [RunTrack.from_run(load(run_paths[i])) for i in GOOD]
+    assert composite.ttl_distance == pytest.approx(sum(track.ttl_distance for track in tracks))
+    assert composite.ttl_gain == pytest.approx(sum(track.total_gain for track in tracks))
+    assert composite.avg_pace == pytest.approx(sum(track.ttl_distance * track.avg_pace for track in tracks)
+                                               / composite.ttl_distance)
+
+
+def test_overlay_shares_one_frame(run_paths):
+    composite = build(run_paths, "overlay")
+    footprint = composite.vertices[:, :2]
+    np.testing.assert_allclose(footprint.min(axis=0), -footprint.max(axis=0), atol=1e-4)
+    assert np.ptp(footprint, axis=0).max() <= USABLE + 1e-4
+    # Every run starts at its own origin, so the first rings all land on the same spot.
+    starts = [run_vertices(composite, run)[:4, :2].mean(axis=0) for run in composite.runs]
+    np.testing.assert_allclose(starts, [starts[0]] * len(starts), atol=1e-3)
+
+
+def test_grid_gives_each_run_a_cell(run_paths):
+    composite = build(run_paths, "grid")
+    columns = math.ceil(math.sqrt(len(run_paths)))
+    cell = USABLE / columns
+    for i, run in enumerate(composite.runs):
+        row, column = divmod(i, columns)
+        centre = (-USABLE / 2 + (column + 0.5) * cell, USABLE / 2 - (row + 0.5) * cell)
+        footprint = run_vertices(composite, run)[:, :2]
+        np.testing.assert_allclose((footprint.min(axis=0) + footprint.max(axis=0)) / 2, centre, atol=1e-3)
+        assert np.ptp(footprint, axis=0).max() <= 0.9 * cell + 1e-3
+
+
+def test_max_points_bounds_each_run(run_paths):
+    composite = build(run_paths, "overlay", max_points=100)
+    check_merged(composite, run_paths)
+    for run in composite.runs:
+        assert run.vertex_stop - run.vertex_start <= 4 * 100
+
+
+@pytest.mark.parametrize("max_vertices", [1, 1500, 2500, 10 ** 9])
+def test_chunks_split_at_run_boundaries(run_paths, max_vertices):
+    composite = build(run_paths, "overlay")
+    chunks = list(composite.chunks(max_vertices))
+    assert [run for chunk in chunks for run in chunk.runs] == composite.runs
+    np.testing.assert_array_equal(np.concatenate([chunk.vertices for chunk in chunks]), composite.vertices)
+    np.testing.assert_array_equal(np.concatenate([chunk.run_index for chunk in chunks]), composite.run_index)
+    np.testing.assert_array_equal(np.concatenate([chunk.pace for chunk in chunks]), composite.pace)
+    offset = 0
+    for chunk in chunks:
+        # Faces index the chunk's own vertices.
+        assert chunk.faces.min() >= 0 and chunk.faces.max() < len(chunk.vertices)
+        np.testing.assert_array_equal(chunk.faces + offset,
+                                      composite.faces[chunk.runs[0].face_start:chunk.runs[-1].face_stop])
+        offset += len(chunk.vertices)
+        # Under the limit unless it is a single bigger run, and as full as the next run allows.
+        assert len(chunk.vertices) <= max_vertices or len(chunk) == 1
+        following = composite.runs.index(chunk.runs[-1]) + 1
+        if following < len(composite.runs):
+            assert composite.runs[following].vertex_stop - chunk.runs[0].vertex_start > max_vertices
+    if max_vertices == 10 ** 9:
+        assert len(chunks) == 1
+    elif max_vertices == 1:
+        assert len(chunks) == len(composite.runs)
+
+
+def test_bad_layout_and_no_runs(run_paths):
+    with pytest.raises(ValueError, match="Unknown composite layout"):
+        build(run_paths, "stack")
+    with pytest.raises(ValueError, match="None of the runs"):
+        build([run_paths[i] for i in range(len(run_paths)) if i not in GOOD], "overlay")
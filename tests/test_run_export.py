@@ -0,0 +1,50 @@
+import struct
+import xml.etree.ElementTree as ElementTree
+import zipfile
+
+import numpy as np
+
+import run_export
+import run_geometry as geom
+from conftest import TEST_RUN
+
+
+def read_stl(path):
+    with open(path, "rb") as file:
+        file.seek(run_export.STL_HEADER_SIZE)
+        count = struct.unpack("<I", file.read(4))[0]
+        return np.fromfile(file, dtype=run_export.STL_TRIANGLE, count=count)
+
+
+def expected_triangles(path):
+    meshes = run_export.print_meshes(run_export.run_binary.load_run(path, run_export.Z_SCALE))
+    return sum(2 * len(faces) for mesh in meshes for faces in mesh.face_ranges())
+
+
+def test_stl_is_scaled_and_complete(tmp_path):
+    path = str(tmp_path / "run.stl")
+    count = run_export.export_run(TEST_RUN, path, scale=10.0)
+    records = read_stl(path)
+    assert count == len(records) == expected_triangles(TEST_RUN)
+    corners = records["vertices"].reshape(-1, 3)
+    # The platform is 100 x 100 x 5 model units, so 1000 x 1000 x 50 mm.
+    np.testing.assert_allclose(corners[:, :2].min(axis=0), [-500, -500])
+    assert corners[:, 2].min() == -25
+
+
+def test_face_ranges_cover_the_run_once(tmp_path):
+    run = run_export.run_binary.load_run(TEST_RUN, run_export.Z_SCALE)
+    mesh = run_export.run_print_mesh(run, chunk_rings=7)
+    faces = np.vstack(list(mesh.face_ranges()))
+    np.testing.assert_array_equal(faces, geom.wall_faces(len(mesh.vertices) // 4))
+
+
+def test_3mf_matches_stl(tmp_path):
+    path = str(tmp_path / "run.3mf")
+    count = run_export.export_run(TEST_RUN, path, scale=2.0)
+    with zipfile.ZipFile(path) as archive:
+        root = ElementTree.fromstring(archive.read("3D/3dmodel.model"))
+    namespace = {"m": run_export._3MF_NAMESPACE}
+    assert len(root.findall(".//m:triangle", namespace)) == count == expected_triangles(TEST_RUN)
+    z = [float(vertex.get("z")) for vertex in root.findall(".//m:vertex", namespace)]
+    assert min(z) == -5
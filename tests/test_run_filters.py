@@ -0,0 +1,173 @@
+import numpy as np
+import pytest
+
+import run_filters
+from run_track import RunTrack
+
+
+def wiggly_path(n=2000, seed=1):
+    rng = np.random.default_rng(seed)
+    heading = np.cumsum(rng.normal(0, 0.3, n))
+    xy = np.cumsum(np.column_stack((np.cos(heading), np.sin(heading))), axis=0)
+    height = np.cumsum(rng.normal(0, 0.05, n))
+    return np.column_stack((xy[:, 0], height, xy[:, 1]))
+
+
+def track_of(points):
+    n = len(points)
+    return RunTrack(points, np.arange(n) % 11, np.linspace(0.1, 0.3, n), points[:, 1] * 50, np.ones(n))
+
+
+def brute_max_deviation(points, kept):
+    """Distance from every dropped point to its kept segment, one point at a time."""
+    worst = 0.0
+    for a, b in zip(kept[:-1], kept[1:]):
+        start, segment = points[a], points[b] - points[a]
+        for point in points[a + 1:b]:
+            t = 0.0 if not segment.any() else np.clip((point - start) @ segment / (segment @ segment), 0, 1)
+            worst = max(worst, np.linalg.norm(point - start - t * segment))
+    return worst
+
+
+@pytest.mark.parametrize("method", ["rdp", "visvalingam"])
+@pytest.mark.parametrize("tolerance", [0.05, 0.5, 3.0])
+def test_simplify_error_bound(method, tolerance):
+    points = wiggly_path()
+    simplified, report = run_filters.simplify_track(track_of(points), tolerance, method=method)
+    kept = np.flatnonzero(np.isin(points[:, 0], simplified.points[:, 0]))
+    assert kept[0] == 0 and kept[-1] == len(points) - 1
+    assert report.points_after == len(simplified) < len(points)
+    assert report.max_deviation <= tolerance
+    assert brute_max_deviation(points, kept) == pytest.approx(report.max_deviation)
+
+
+def test_same_tolerance_means_similar_counts():
+    """Both methods read the tolerance as the same distance, so they keep a similar number of points."""
+    points = wiggly_path()
+    rdp = len(run_filters.rdp_indices(points, 0.5))
+    visvalingam = len(run_filters.visvalingam_indices(points, 0.5))
+    assert 0.5 < visvalingam / rdp < 2
+
+
+def test_visvalingam_budget_overrides_tolerance():
+    points = wiggly_path()
+    kept = run_filters.visvalingam_indices(points, tolerance=0.01, max_points=100)
+    assert len(kept) == 100
+    assert kept[0] == 0 and kept[-1] == len(points) - 1
+
+
+def test_straight_line_collapses_to_ends():
+    points = np.column_stack((np.arange(50.0), np.zeros(50), 2 * np.arange(50.0)))
+    np.testing.assert_array_equal(run_filters.rdp_indices(points, 1e-9), [0, 49])
+    np.testing.assert_array_equal(run_filters.visvalingam_indices(points, 1e-9), [0, 49])
+
+
+def test_simplify_keeps_columns_aligned():
+    points = wiggly_path(300)
+    track = track_of(points)
+    simplified, _ = run_filters.simplify_track(track, 0.5)
+    kept = np.flatnonzero(np.isin(points[:, 0], simplified.points[:, 0]))
+    np.testing.assert_array_equal(simplified.hr, track.hr[kept])
+    np.testing.assert_array_equal(simplified.pace, track.pace[kept])
+
+
+@pytest.mark.parametrize("method", ["linear", "cubic"])
+def test_resample_spacing(method):
+    track = track_of(wiggly_path(500))
+    resampled = run_filters.resample_track(track, spacing=0.5, method=method)
+    steps = np.diff(resampled.arc_length)
+    np.testing.assert_allclose(resampled.points[[0, -1]], track.points[[0, -1]])
+    if method == "linear":
+        # Chords of a polyline are never longer than the arc between them.
+        assert steps.max() <= track.arc_length[-1] / (len(resampled) - 1) + 1e-9
+    assert np.median(steps) == pytest.approx(0.5, rel=0.05)
+    assert len(resampled) == int(track.arc_length[-1] / 0.5) + 1
+
+
+def test_resample_count_and_columns():
+    track = track_of(wiggly_path(500))
+    resampled = run_filters.resample_track(track, n_points=123, method="cubic")
+    assert len(resampled) == 123
+    assert set(np.unique(resampled.hr)) <= set(np.unique(track.hr))
+    assert track.pace.min() <= resampled.pace.min() and resampled.pace.max() <= track.pace.max()
+
+
+def test_resample_stationary_track_keeps_two_points():
+    points = np.tile([1.0, 2.0, 3.0], (20, 1))
+    resampled = run_filters.resample_track(track_of(points), n_points=50)
+    assert len(resampled) == 2
+    single = track_of(points[:1])
+    assert run_filters.resample_track(single, n_points=50) is single
+
+
+def test_resample_needs_one_target():
+    track = track_of(wiggly_path(10))
+    with pytest.raises(ValueError):
+        run_filters.resample_track(track)
+    with pytest.raises(ValueError):
+        run_filters.resample_track(track, n_points=5, spacing=1.0)
+
+
+@pytest.mark.parametrize("window, degree", [(5, 2), (9, 2), (9, 3), (4, 0)])
+def test_savgol_matches_scipy(window, degree):
+    signal = pytest.importorskip("scipy.signal")
+    np.testing.assert_allclose(run_filters.savgol_coefficients(window, degree),
+                               signal.savgol_coeffs(window, degree, pos=window - 1, use="dot"), atol=1e-12)
+
+
+def test_savgol_is_last_sample_of_the_fit():
+    rng = np.random.default_rng(4)
+    values = rng.normal(size=40)
+    smoothed = run_filters.causal_savgol(values, window=9, degree=2)
+    for end in (3, 9, 25, 40):
+        start = max(0, end - 9)
+        offsets = np.arange(start - end + 1, 1)
+        fit = np.polyfit(offsets, values[start:end], min(2, end - start - 1))
+        assert smoothed[end - 1] == pytest.approx(np.polyval(fit, 0))
+
+
+def test_savgol_passes_polynomials_unchanged():
+    t = np.linspace(0, 5, 60)
+    values = np.column_stack((3 * t - 1, 0.5 * t ** 2 - t))
+    np.testing.assert_allclose(run_filters.causal_savgol(values, window=7, degree=2), values, atol=1e-9)
+
+
+def test_savgol_streaming_matches_batch():
+    values = wiggly_path(100)
+    stream = run_filters.CausalSavgol(window=9, degree=2)
+    streamed = np.array([stream.push(point) for point in values])
+    np.testing.assert_allclose(streamed, run_filters.causal_savgol(values, window=9, degree=2), atol=1e-9)
+    with pytest.raises(ValueError):
+        run_filters.causal_savgol(values, window=0)
+
+
+def noisy_staircase(steps=5, step=10.0, noise=0.8, length=50, seed=2):
+    """Climbs of `step` metres with flat stretches in between, plus jitter smaller than the threshold."""
+    rng = np.random.default_rng(seed)
+    levels = np.repeat(np.arange(steps + 1) * step, length)
+    return levels + rng.uniform(-noise, noise, len(levels)), levels
+
+
+def test_hysteresis_ignores_noise():
+    altitudes, levels = noisy_staircase()
+    assert run_filters.hysteresis_gain(levels, threshold=2.0) == pytest.approx(50)
+    gain = run_filters.hysteresis_gain(altitudes, threshold=2.0)
+    # Each real climb counts in full, from the lowest to the highest jittered point around it.
+    assert 50 - 2 * 0.8 <= gain <= 50 + 2 * 0.8
+    assert run_filters.hysteresis_gain(altitudes, threshold=0) > 2 * gain
+
+
+def test_hysteresis_threshold_zero_sums_every_rise():
+    altitudes, _ = noisy_staircase()
+    rises = np.diff(altitudes)
+    assert run_filters.hysteresis_gain(altitudes, threshold=0) == pytest.approx(rises[rises > 0].sum())
+
+
+def test_hysteresis_streaming_matches_extend():
+    altitudes, _ = noisy_staircase()
+    gain = run_filters.HysteresisGain(threshold=2.0)
+    totals = [gain.update(altitude) for altitude in altitudes]
+    assert totals == sorted(totals)
+    assert totals[-1] == run_filters.hysteresis_gain(altitudes, threshold=2.0)
+    # A descent that goes down and back up within the threshold adds nothing.
+    assert run_filters.hysteresis_gain([0, 5, 3.5, 5, 3.5, 5], threshold=2.0) == pytest.approx(5)
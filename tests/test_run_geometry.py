@@ -0,0 +1,101 @@
+import numpy as np
+import pytest
+
+import run_geometry as geom
+
+
+def operator_z_bounds(points, base_z=2.5, lift=geom.LIFT, extrusion_scale=2.0):
+    """
+    Height range of the solid main() builds with operators: the curve's heights are extruded
+    down by extrusion_scale times the highest point, adjust_object_position moves the geometry
+    up by `lift` (origin_set only moves the origin), and the boolean cuts at base_z.
+    """
+    heights = geom.track_to_world(points)[:, 2]
+    top = heights + lift
+    bottom = top - extrusion_scale * heights.max()
+    return max(bottom.min(), base_z), max(top.max(), base_z)
+
+
+def staircase(n=50):
+    t = np.linspace(0, 4 * np.pi, n)
+    return np.column_stack((30 * np.cos(t), 0.5 + 0.02 * np.arange(n), 30 * np.sin(t)))
+
+
+def test_vertex_and_face_counts():
+    points = staircase()
+    vertices, faces, params = geom.build_run_solid(points, np.zeros(len(points)), resolution=1)
+    assert vertices.shape == (4 * len(points), 3)
+    assert faces.shape == (4 * (len(points) - 1) + 2, 4)
+    assert len(params) == len(points)
+    assert faces.min() == 0 and faces.max() == len(vertices) - 1
+
+    vertices, faces, params = geom.build_run_solid(points, np.zeros(len(points)), resolution=4)
+    rings = 4 * (len(points) - 1) + 1
+    assert vertices.shape == (4 * rings, 3)
+    assert faces.shape == (4 * (rings - 1) + 2, 4)
+
+
+def test_solid_is_closed():
+    """Every edge of a closed, consistently wound solid is used once in each direction."""
+    points = staircase()
+    _, faces, _ = geom.build_run_solid(points, np.full(len(points), 3))
+    edges = np.stack((faces, np.roll(faces, -1, axis=1)), axis=2).reshape(-1, 2)
+    forward = set(map(tuple, edges))
+    assert len(forward) == len(edges)
+    assert forward == set(map(tuple, edges[:, ::-1]))
+
+
+def test_box_matches_default_cube():
+    vertices, faces = geom.box((100, 100, 5))
+    np.testing.assert_allclose(vertices.min(axis=0), [-50, -50, -2.5])
+    np.testing.assert_allclose(vertices.max(axis=0), [50, 50, 2.5])
+    assert faces.shape == (6, 4)
+    # Outward winding: every face normal points away from the centre.
+    corners = vertices[faces]
+    normals = np.cross(corners[:, 1] - corners[:, 0], corners[:, 2] - corners[:, 0])
+    assert np.all(np.einsum("ij,ij->i", normals, corners.mean(axis=1)) > 0)
+
+
+def test_kernel_bounds_match_operator_placement(test_track):
+    points = test_track.points
+    vertices, _, _ = geom.build_run_solid(points, test_track.hr)
+    np.testing.assert_allclose((vertices[:, 2].min(), vertices[:, 2].max()), operator_z_bounds(points))
+    # The geometry moves up by exactly the lift, whatever the run's height range.
+    assert vertices[:, 2].max() == pytest.approx(test_track.highest_point + geom.LIFT)
+
+
+def test_shallow_run_stops_above_the_base():
+    """Extruded by twice a tiny highest point, the wall does not reach the platform."""
+    points = staircase() * [1, 0.05, 1]
+    vertices, _, _ = geom.build_run_solid(points, np.zeros(len(points)))
+    np.testing.assert_allclose((vertices[:, 2].min(), vertices[:, 2].max()), operator_z_bounds(points))
+    assert vertices[:, 2].min() > 2.5
+
+
+def test_centered_footprint():
+    points = staircase()
+    vertices, _, _ = geom.build_run_solid(points, np.zeros(len(points)))
+    np.testing.assert_allclose(vertices[:, :2].min(axis=0), -vertices[:, :2].max(axis=0))
+
+
+def test_build_run_vertices_matches_solid():
+    points = staircase()
+    widths = np.arange(len(points)) % 10
+    solid, _, params = geom.build_run_solid(points, widths, resolution=3, center=False)
+    vertices, vertex_params = geom.build_run_vertices(points, widths, resolution=3, center=False)
+    np.testing.assert_array_equal(solid, vertices)
+    np.testing.assert_array_equal(params, vertex_params)
+
+
+def test_wall_face_ranges_tile_the_wall():
+    n = 37
+    whole = geom.wall_faces(n)
+    parts = np.vstack([geom.wall_faces(n, start, start + 5) for start in range(0, n - 1, 5)])
+    assert sorted(map(tuple, parts)) == sorted(map(tuple, whole))
+
+
+def test_sample_bezier_passes_through_control_points():
+    points = staircase(10)
+    samples, params = geom.sample_bezier(points, 6)
+    on_points = np.isclose(params, np.round(params))
+    np.testing.assert_allclose(samples[on_points], points)
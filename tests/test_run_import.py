@@ -0,0 +1,164 @@
+import math
+import struct
+from datetime import datetime, timezone
+
+import numpy as np
+import pytest
+
+import batch_scheduler
+import run_import
+
+START = datetime(2024, 5, 1, 8, 0, tzinfo=timezone.utc).timestamp()   # On a 5-minute boundary
+LATITUDE, LONGITUDE = 47.0, 8.0
+STEP = 40.0                                                           # Metres north per record
+DEGREES_PER_METRE = 180 / (math.pi * run_import.EARTH_RADIUS)
+
+
+def records(minutes=30, hr=lambda i: 120 if i < 5 else 150 if i < 10 else 200, missing_altitude=()):
+    """One record a minute, walking north STEP metres each time and climbing 1 m."""
+    return [{"time": START + 60 * i, "latitude": LATITUDE + i * STEP * DEGREES_PER_METRE, "longitude": LONGITUDE,
+             "altitude": None if i in missing_altitude else 100.0 + i, "hr": hr(i), "distance": i * STEP}
+            for i in range(minutes + 1)]
+
+
+def iso(seconds):
+    return datetime.fromtimestamp(seconds, timezone.utc).strftime("%Y-%m-%dT%H:%M:%SZ")
+
+
+def write_gpx(path, points):
+    lines = ['<?xml version="1.0"?>',
+             '<gpx version="1.1" xmlns="http://www.topografix.com/GPX/1/1" '
+             'xmlns:gpxtpx="http://www.garmin.com/xmlschemas/TrackPointExtension/v1"><trk><trkseg>']
+    for point in points:
+        ele = "" if point["altitude"] is None else f"<ele>{point['altitude']}</ele>"
+        lines.append(f'<trkpt lat="{point["latitude"]!r}" lon="{point["longitude"]!r}">{ele}'
+                     f'<time>{iso(point["time"])}</time><extensions><gpxtpx:TrackPointExtension>'
+                     f'<gpxtpx:hr>{point["hr"]}</gpxtpx:hr></gpxtpx:TrackPointExtension></extensions></trkpt>')
+    lines.append("</trkseg></trk></gpx>")
+    path.write_text("\n".join(lines))
+    return str(path)
+
+
+def write_tcx(path, points):
+    lines = ['<?xml version="1.0"?>',
+             '<TrainingCenterDatabase xmlns="http://www.garmin.com/xmlschemas/TrainingCenterDatabase/v2">'
+             '<Activities><Activity Sport="Running"><Lap><Track>']
+    for point in points:
+        ele = "" if point["altitude"] is None else f"<AltitudeMeters>{point['altitude']}</AltitudeMeters>"
+        lines.append(f'<Trackpoint><Time>{iso(point["time"])}</Time><Position>'
+                     f'<LatitudeDegrees>{point["latitude"]!r}</LatitudeDegrees>'
+                     f'<LongitudeDegrees>{point["longitude"]!r}</LongitudeDegrees></Position>{ele}'
+                     f'<DistanceMeters>{point["distance"]}</DistanceMeters>'
+                     f'<HeartRateBpm><Value>{point["hr"]}</Value></HeartRateBpm></Trackpoint>')
+    lines.append("</Track></Lap></Activity></Activities></TrainingCenterDatabase>")
+    path.write_text("\n".join(lines))
+    return str(path)
+
+
+def fit_bytes(points):
+    """A minimal FIT file: one definition of the record message (20) and one data message per point."""
+    fields = [(253, "I"), (0, "i"), (1, "i"), (2, "H"), (3, "B"), (5, "I")]
+    definition = struct.pack("<BBBHB", 0x40, 0, 0, 20, len(fields))
+    definition += b"".join(struct.pack("<BBB", number, struct.calcsize(code), 0) for number, code in fields)
+    data = [definition]
+    for point in points:
+        altitude = 0xFFFF if point["altitude"] is None else round((point["altitude"] + 500) * 5)
+        data.append(struct.pack("<B" + "".join(code for _, code in fields), 0,
+                                int(point["time"] - run_import.FIT_EPOCH),
+                                round(point["latitude"] * 2 ** 31 / 180), round(point["longitude"] * 2 ** 31 / 180),
+                                altitude, point["hr"], round(point["distance"] * 100)))
+    body = b"".join(data)
+    header = struct.pack("<BBHI4sH", 14, 0x20, 2132, len(body), b".FIT", 0)
+    return header + body + b"\0\0"
+
+
+def write_fit(path, points):
+    path.write_bytes(fit_bytes(points))
+    return str(path)
+
+
+WRITERS = {"gpx": write_gpx, "tcx": write_tcx, "fit": write_fit}
+
+
+@pytest.mark.parametrize("kind", sorted(WRITERS))
+def test_read_columns(tmp_path, kind):
+    points = records()
+    columns = run_import.read_activity(WRITERS[kind](tmp_path / f"run.{kind}", points)).arrays()
+    np.testing.assert_allclose(columns["time"], [point["time"] for point in points])
+    np.testing.assert_allclose(columns["latitude"], [point["latitude"] for point in points], atol=1e-6)
+    np.testing.assert_allclose(columns["altitude"], [point["altitude"] for point in points])
+    np.testing.assert_array_equal(columns["hr"], [point["hr"] for point in points])
+
+
+@pytest.mark.parametrize("kind", sorted(WRITERS))
+def test_five_minute_samples(tmp_path, kind):
+    run = run_import.load_activity(WRITERS[kind](tmp_path / f"run.{kind}", records()), 1.0)
+    # Minutes 0, 5, ..., 30: seven samples 200 m apart, all further than 100 m from each other.
+    assert len(run["points"]) == 7
+    np.testing.assert_allclose(np.asarray(run["points"].ys) * 100, np.arange(7) * 5 * STEP, atol=0.5)
+    np.testing.assert_allclose(run["points"].xs, 0, atol=1e-6)
+    np.testing.assert_array_equal(run["altitudes"], np.arange(7) * 5)
+    assert run["zero_altitude"] == 100
+    assert run["ttl_distance"] == pytest.approx(30 * STEP / 1000, rel=1e-3)
+    # 5 records of 40 m per bucket (the first has no distance yet): km per minute.
+    assert run["paces"][1] == pytest.approx(5 * STEP / 1000 / 5, rel=1e-3)
+
+
+def test_hr_average_clamp_and_buckets(tmp_path):
+    run = run_import.load_activity(write_gpx(tmp_path / "run.gpx", records()), 1.0)
+    # Bucket averages 120 (clamped to 130 -> 0), 150 (20 / 45 * 10 = 4.4 -> 4), then 200 (clamped -> 10).
+    assert list(run["hr_widths"]) == [0, 4, 10, 10, 10, 10, 10]
+    assert list(run_import.normalize_hr(np.array([129.0, 130.0, 152.5, 175.0, 250.0]))) == [0, 0, 5, 10, 10]
+
+
+def test_close_points_are_removed(tmp_path):
+    path = write_gpx(tmp_path / "run.gpx", records())
+    every_record = run_import.load_activity(path, 1.0, interval=0, min_distance=0)
+    assert len(every_record["points"]) == 31
+    # 40 m steps: the kept points are 120 m apart (every third record), plus the last one.
+    thinned = run_import.load_activity(path, 1.0, interval=0)
+    np.testing.assert_allclose(np.asarray(thinned["points"].ys) * 100, [0, 120, 240, 360, 480, 600, 720,
+                                                                        840, 960, 1080, 1200], atol=0.5)
+
+
+def test_remove_close_points_matches_pairwise_rule():
+    rng = np.random.default_rng(3)
+    x, y = rng.uniform(0, 1000, (2, 400))
+    kept = run_import.remove_close_points(x, y)
+    expected = [0]
+    for i in range(1, len(x) - 1):
+        if all((x[i] - x[j]) ** 2 + (y[i] - y[j]) ** 2 >= 100 ** 2 for j in expected):
+            expected.append(i)
+    assert list(kept) == expected + [len(x) - 1]
+
+
+@pytest.mark.parametrize("kind", sorted(WRITERS))
+def test_missing_altitudes_are_interpolated(tmp_path, kind):
+    run = run_import.load_activity(WRITERS[kind](tmp_path / f"run.{kind}", records(missing_altitude={0, 10, 11})),
+                                   1.0)
+    assert run["zero_altitude"] == 101   # The first record's gap takes the next known altitude
+    np.testing.assert_array_equal(run["altitudes"], [0, 4, 9, 14, 19, 24, 29])
+
+
+@pytest.mark.parametrize("cut", [1, 13, 15, 20, 30, 60, -3])
+def test_truncated_fit_is_a_value_error(tmp_path, cut):
+    path = tmp_path / "run.fit"
+    path.write_bytes(fit_bytes(records())[:cut])
+    with pytest.raises(ValueError):
+        run_import.read_fit(str(path))
+
+
+def test_bad_file_does_not_stop_the_import(tmp_path, capsys):
+    bad = tmp_path / "bad.fit"
+    bad.write_bytes(fit_bytes(records())[:100])
+    good = write_gpx(tmp_path / "good.gpx", records())
+    assert run_import.main([str(bad), good, "-o", str(tmp_path / "out")]) == 1
+    assert (tmp_path / "out" / "good.json").exists()
+    assert "FAILED" in capsys.readouterr().out
+
+
+def test_directories_include_activity_files(tmp_path):
+    for name in ("a.json", "b.svrun", "c.gpx", "d.tcx", "E.FIT", "notes.txt"):
+        (tmp_path / name).write_text("")
+    found = [path.rsplit("/", 1)[1] for path in batch_scheduler.expand_runs([str(tmp_path)])]
+    assert found == ["E.FIT", "a.json", "b.svrun", "c.gpx", "d.tcx"]
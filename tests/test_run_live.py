@@ -0,0 +1,106 @@
+import json
+
+import pytest
+
+import run_live
+from conftest import TEST_RUN, Z_SCALE
+
+
+def live_lines(path):
+    """The lines run_live.replay writes for path: header, one line per point, end."""
+    return path.read_text().splitlines(keepends=True)
+
+
+@pytest.fixture
+def replayed(tmp_path):
+    source = tmp_path / "replayed.jsonl"
+    run_live.replay(TEST_RUN, str(source), interval=0, batch=100)
+    return live_lines(source)
+
+
+def test_partial_line_waits(tmp_path, replayed):
+    path = tmp_path / "live.jsonl"
+    tail = run_live.JsonLinesTail(str(path))
+    assert tail.read() == []   # No file yet
+
+    header, first, second = replayed[:3]
+    with open(path, "w") as file:
+        file.write(header + first[:10])
+        file.flush()
+        assert tail.read() == [json.loads(header)]
+        file.write(first[10:] + second[:-1])   # Second line still misses its newline
+        file.flush()
+        assert tail.read() == [json.loads(first)]
+        assert tail.read() == []
+        file.write("\n")
+        file.flush()
+        assert tail.read() == [json.loads(second)]
+    assert not tail.restarted
+
+
+def test_restarts_when_the_file_shrinks(tmp_path, replayed):
+    path = tmp_path / "live.jsonl"
+    path.write_text("".join(replayed[:6]))
+    tail = run_live.JsonLinesTail(str(path))
+    assert len(tail.read()) == 6
+    path.write_text("".join(replayed[:2]))
+    assert tail.read() == [json.loads(line) for line in replayed[:2]]
+    assert tail.restarted
+
+
+def test_lines_that_are_not_json_are_skipped(tmp_path, replayed, capsys):
+    path = tmp_path / "live.jsonl"
+    path.write_bytes("".join(replayed[:2]).encode() + b'{"coordinates": \n42\n\xff\n' + replayed[2].encode())
+    tail = run_live.JsonLinesTail(str(path))
+    assert tail.read() == [json.loads(line) for line in replayed[:3]]
+    assert tail.skipped == 3
+    assert "not a JSON object" in capsys.readouterr().out
+
+
+@pytest.mark.parametrize("pieces", [1, 4, 15])
+def test_live_statistics_match_run_track(test_track, replayed, pieces):
+    records = [json.loads(line) for line in replayed]
+    live = run_live.LiveRun(Z_SCALE, capacity=2)
+    for i in range(pieces):
+        live.extend(records[i * len(records) // pieces:(i + 1) * len(records) // pieces])
+    assert live.done and len(live) == len(test_track)
+    assert live.starting_coordinates == pytest.approx(test_track.starting_coordinates)
+    assert live.total_gain == pytest.approx(test_track.total_gain)
+    assert live.highest_point == pytest.approx(test_track.highest_point)
+    assert live.ttl_distance == pytest.approx(test_track.ttl_distance)
+    assert live.avg_pace == pytest.approx(test_track.avg_pace)
+    track = live.track()
+    assert track.points == pytest.approx(test_track.points)
+    assert list(track.hr) == list(test_track.hr)
+
+
+def test_hysteresis_gain_option(test_track, replayed):
+    live = run_live.LiveRun(Z_SCALE, gain_threshold=0)
+    live.extend(json.loads(line) for line in replayed)
+    assert live.total_gain == pytest.approx(test_track.total_gain)
+
+
+class Clock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+def test_throttle_interval_and_min_points():
+    clock = Clock()
+    throttle = run_live.Throttle(interval=30, min_points=5, clock=clock)
+    assert not throttle.due(0)
+    assert not throttle.due(4)          # Too few points
+    assert throttle.due(5)              # The first rebuild does not wait for the interval
+    throttle.mark(5)
+    clock.now = 10
+    assert not throttle.due(20)         # Enough points, but only 10 s since the last rebuild
+    clock.now = 30
+    assert throttle.due(20)
+    throttle.mark(20)
+    clock.now = 100
+    assert not throttle.due(22)         # Interval passed, too few new points
+    assert throttle.due(22, done=True)  # The end of the run always rebuilds
+    assert not throttle.due(20, done=True)
@@ -0,0 +1,56 @@
+import json
+
+import pytest
+
+import run_loader as loader
+from conftest import TEST_RUN, Z_SCALE
+from synthetic_runs import write_synthetic_run
+
+
+def assert_same_run(columns, reference):
+    assert columns["starting_coordinates"] == reference["starting_coordinates"]
+    assert columns["ttl_distance"] == reference["ttl_distance"]
+    assert list(columns["points"]) == reference["points"]
+    for key in ("hr_widths", "real_distances", "paces", "altitudes"):
+        assert list(columns[key]) == reference[key]
+
+
+@pytest.mark.parametrize("chunk_size", [1, 7, 64, 1 << 16])
+def test_streaming_matches_json_load(chunk_size):
+    """Tiny chunks cut every element, separator and number at some point."""
+    assert_same_run(loader.load_run_streaming(TEST_RUN, Z_SCALE, chunk_size),
+                    loader.load_run_json(TEST_RUN, Z_SCALE))
+
+
+def test_compact_and_reordered_file(tmp_path):
+    with open(TEST_RUN) as file:
+        data = json.load(file)
+    path = tmp_path / "compact.json"
+    # normPoints first and no whitespace at all.
+    path.write_text(json.dumps({"normPoints": data["normPoints"], **data}, separators=(",", ":")))
+    for chunk_size in (5, 4096):
+        assert_same_run(loader.load_run_streaming(str(path), Z_SCALE, chunk_size),
+                        loader.load_run_json(TEST_RUN, Z_SCALE))
+
+
+def test_empty_points(tmp_path):
+    path = tmp_path / "empty.json"
+    path.write_text('{"startingCoordinates": {"latitude": 1, "longitude": 2}, "ttlDistance": 0, "normPoints": [ ]}')
+    result = loader.load_run_streaming(str(path), Z_SCALE, chunk_size=3)
+    assert len(result["points"]) == 0
+    assert result["starting_coordinates"] == (1, 2)
+
+
+def test_malformed_file(tmp_path):
+    path = tmp_path / "broken.json"
+    path.write_text('{"ttlDistance": 1, "normPoints": [{"HR" 2}]}')
+    with pytest.raises(ValueError):
+        loader.load_run_streaming(str(path), Z_SCALE)
+
+
+def test_columns_switch_to_streaming_by_size(tmp_path):
+    path = str(tmp_path / "run.json")
+    write_synthetic_run(path, 2000)
+    reference = loader.load_run_json(path, Z_SCALE)
+    assert_same_run(loader.load_run_columns(path, Z_SCALE), reference)
+    assert_same_run(loader.load_run_columns(path, Z_SCALE, streaming_min_bytes=0), reference)
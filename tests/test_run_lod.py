@@ -0,0 +1,64 @@
+import pytest
+
+import fake_bpy
+
+bpy = fake_bpy.install()
+
+import run_lod
+
+
+@pytest.fixture
+def lod_object():
+    fake_bpy.reset()
+    meshes = [bpy.data.meshes.new(name) for name in ("Run", "Run_LOD20000", "Run_LOD100000")]
+    for mesh in meshes:
+        mesh.materials = []
+    obj = bpy.data.objects.new("MyRun", meshes[0])
+    run_lod.attach_lods(obj, meshes[1:], level=1)
+    run_lod.register_handlers()
+    yield obj, meshes
+    run_lod.unregister_handlers()
+
+
+def fire(name, *args):
+    for handler in getattr(bpy.app.handlers, name):
+        handler(*args)
+
+
+def test_attach_shows_the_viewport_level(lod_object):
+    obj, (full, small, large) = lod_object
+    assert obj.data is large and obj[run_lod.LEVEL_KEY] == 1
+    assert all(mesh.use_fake_user for mesh in (full, small, large))
+    run_lod.set_lod(obj, 5)   # Clamped to the largest proxy
+    assert obj.data is large
+    run_lod.set_lod(obj, -1)
+    assert obj.data is full and obj[run_lod.LEVEL_KEY] == -1
+
+
+@pytest.mark.parametrize("end", ["render_post", "render_cancel"])
+def test_render_handlers_swap_the_full_mesh_in_and_back(lod_object, end):
+    obj, (full, _, large) = lod_object
+    fire("render_pre", None)
+    assert obj.data is full and obj[run_lod.LEVEL_KEY] == 1
+    fire(end, None)
+    assert obj.data is large
+
+
+def test_file_is_saved_with_the_full_mesh(lod_object):
+    obj, (full, _, large) = lod_object
+    fire("save_pre", "model.blend")
+    assert obj.data is full
+    fire("save_post", "model.blend")
+    assert obj.data is large
+
+    # Opening the saved file (full mesh as data) shows the proxy again.
+    obj.data = full
+    fire("load_post", "model.blend")
+    assert obj.data is large
+
+
+def test_handlers_are_installed_once(lod_object):
+    run_lod.register_handlers()
+    run_lod.register_handlers()
+    assert [handler.__name__ for handler in bpy.app.handlers.render_pre] == ["_render_pre"]
+    assert len(bpy.app.handlers.load_post) == 1
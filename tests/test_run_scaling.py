@@ -0,0 +1,97 @@
+import numpy as np
+import pytest
+
+import run_geometry as geom
+import run_scaling
+
+
+def footprint(n=200, seed=3):
+    """World-space vertices of a wandering track, off-centre and wider than it is deep."""
+    rng = np.random.default_rng(seed)
+    xy = np.cumsum(rng.normal(size=(n, 2)) * (2.0, 0.7), axis=0) + (40.0, -15.0)
+    return np.column_stack((xy, rng.uniform(2.5, 6.0, n)))
+
+
+def extents(vertices):
+    return vertices[:, :2].max(axis=0) - vertices[:, :2].min(axis=0)
+
+
+def test_linear_matches_resize_object():
+    """helpers.resize_object: each extent d becomes 1 + (d - 1) / (obj_max - 1) * (scale_max - 1)."""
+    vertices = footprint()
+    fitted = run_scaling.fit(vertices, "linear", obj_max=300, scale_max=100).apply(vertices)
+    expected = 1 + (extents(vertices) - 1) / 299 * 99
+    np.testing.assert_allclose(extents(fitted), expected)
+    np.testing.assert_allclose(fitted[:, 2], vertices[:, 2])
+
+
+def test_linear_matches_run_geometry():
+    vertices = footprint()
+    center, factors = geom.footprint_transform(vertices, obj_max=300, scale_max=100)
+    centred = vertices.copy()
+    centred[:, :2] -= (vertices[:, :2].min(axis=0) + vertices[:, :2].max(axis=0)) / 2
+    np.testing.assert_allclose((vertices[:, :2] - center) * factors,
+                               geom.resize_xy(centred, obj_max=300, scale_max=100)[:, :2])
+
+
+def test_fit_centres_the_footprint():
+    vertices = footprint()
+    for strategy in run_scaling.STRATEGIES:
+        fitted = run_scaling.fit(vertices, strategy).apply(vertices)
+        np.testing.assert_allclose(fitted[:, :2].min(axis=0), -fitted[:, :2].max(axis=0), atol=1e-9)
+
+
+@pytest.mark.parametrize("strategy", ["log1p", "power"])
+def test_longer_side_becomes_max_size(strategy):
+    vertices = footprint()
+    fitted = run_scaling.fit(vertices, strategy, max_size=100).apply(vertices)
+    sizes = extents(fitted)
+    assert sizes.max() == pytest.approx(100)
+    # Both shrink the shorter side less than proportionally, keeping short runs readable.
+    original = extents(vertices)
+    assert sizes.min() / sizes.max() > original.min() / original.max()
+
+
+def test_log1p_and_power_formulas():
+    dimensions = np.array([20.0, 80.0])
+    np.testing.assert_allclose(run_scaling.log1p(dimensions), 100 * np.log1p(dimensions) / np.log1p(80))
+    np.testing.assert_allclose(run_scaling.power(dimensions, exponent=0.5), 1 + np.sqrt(dimensions / 80) * 99)
+    np.testing.assert_allclose(run_scaling.power(np.zeros(2)), np.zeros(2))
+
+
+def test_margin_is_inside_the_fit():
+    vertices = footprint()
+    margin = 1.5
+    fitted = run_scaling.fit(vertices, "log1p", margin=margin, max_size=100)
+    # The outline margin away from the points is what becomes max_size.
+    padded = (extents(vertices) + 2 * margin) * fitted.factors
+    assert padded.max() == pytest.approx(100)
+    assert extents(fitted.apply(vertices)).max() < 100
+
+    per_point = np.full(len(vertices), margin)
+    np.testing.assert_allclose(run_scaling.fit(vertices, "log1p", margin=per_point, max_size=100).factors,
+                               fitted.factors)
+
+
+def test_apply_points_matches_apply():
+    rng = np.random.default_rng(5)
+    points = rng.normal(size=(50, 3)) * (30, 1, 12) + (10, 3, -4)   # (x, z, y) curve-local
+    world = geom.track_to_world(points)
+    fitted = run_scaling.fit(world, "power")
+    np.testing.assert_allclose(geom.track_to_world(fitted.apply_points(points)), fitted.apply(world))
+    np.testing.assert_allclose(fitted.offset, -fitted.center * fitted.factors)
+
+
+def test_empty_and_degenerate_input():
+    fitted = run_scaling.fit(np.empty((0, 3)), "linear")
+    np.testing.assert_array_equal(fitted.center, [0, 0])
+    np.testing.assert_array_equal(fitted.factors, [1, 1])
+    # A single point has no extent to scale.
+    np.testing.assert_array_equal(run_scaling.fit([[4.0, 2.0, 1.0]], "log1p").factors, [1, 1])
+
+
+def test_unknown_strategy():
+    with pytest.raises(ValueError, match="Unknown scaling strategy"):
+        run_scaling.fit(footprint(), "cubic")
+    with pytest.raises(ValueError, match="Unknown scaling strategy"):
+        run_scaling.strategy_params("cubic")
@@ -0,0 +1,106 @@
+import asyncio
+import json
+import shlex
+import sys
+
+import run_service
+from conftest import TEST_RUN
+from test_batch_scheduler import STUB
+
+with open(TEST_RUN, "rb") as run_file:
+    VALID = run_file.read()
+
+
+def with_service(tmp_path, test, **kwargs):
+    """Runs the coroutine test(service) inside an event loop, with the parser pool shut down after."""
+    async def main():
+        service = run_service.RunService(str(tmp_path), **kwargs)
+        try:
+            return await test(service)
+        finally:
+            service.close()
+    return asyncio.run(main())
+
+
+def test_validate_run():
+    assert run_service.validate_run(json.loads(VALID)) == []
+    data = json.loads(VALID)
+    data["normPoints"][3]["HR"] = "high"
+    del data["normPoints"][5]["coordinates"]
+    assert run_service.validate_run(data) == ["normPoints[3].HR must be an integer from 0 to 127.",
+                                              "normPoints[5].coordinates must have numeric x and y."]
+    assert run_service.validate_run([]) == ["The run must be a JSON object."]
+
+
+def test_upload_statuses(tmp_path):
+    async def test(service):
+        invalid_json = await service.route("POST", "/runs", b"{not json")
+        schema = await service.route("POST", "/runs", b'{"normPoints": []}')
+        accepted = await service.route("POST", "/runs", VALID)
+        # The queue (size 1, no workers running) is now full: refused before parsing, even garbage.
+        full = await service.route("POST", "/runs", b"{not json")
+        return invalid_json, schema, accepted, full, service
+
+    invalid_json, schema, accepted, full, service = with_service(tmp_path, test, queue_size=1)
+    assert invalid_json[0] == 400 and invalid_json[1]["error"].startswith("Not valid JSON")
+    assert schema[0] == 400 and "details" in schema[1]
+    status, response, _ = accepted
+    assert status == 202 and response["url"] == f"/jobs/{response['id']}"
+    assert (tmp_path / "uploads" / f"{response['id']}.json").read_bytes() == VALID
+    assert full[0] == 429 and full[2] == {"Retry-After": "5"}
+    assert service.counts == {"accepted": 1, "rejected": 1, "invalid": 2, "done": 0, "failed": 0}
+
+
+def test_queue_filled_while_parsing(tmp_path):
+    async def test(service):
+        # Both uploads pass the first check, then race for the one queue slot after parsing.
+        return await asyncio.gather(service.submit(VALID), service.submit(VALID))
+
+    statuses = sorted(status for status, _ in with_service(tmp_path, test, queue_size=1))
+    assert statuses == [202, 429]
+    assert len(list((tmp_path / "uploads").iterdir())) == 1
+
+
+def test_other_routes(tmp_path):
+    async def test(service):
+        return [await service.route(method, path, b"") for method, path in
+                (("GET", "/runs"), ("GET", "/status"), ("GET", "/jobs/nope"), ("GET", "/other"))]
+
+    statuses = [status for status, _, _ in with_service(tmp_path, test)]
+    assert statuses == [405, 200, 404, 404]
+
+
+async def http(port, method, path, body=b""):
+    reader, writer = await asyncio.open_connection(run_service.HOST, port)
+    writer.write(f"{method} {path} HTTP/1.1\r\nHost: localhost\r\nContent-Length: {len(body)}\r\n\r\n".encode()
+                 + body)
+    await writer.drain()
+    response = await reader.read()
+    writer.close()
+    head, _, payload = response.partition(b"\r\n\r\n")
+    return int(head.split()[1]), json.loads(payload)
+
+
+def test_build_over_http(tmp_path):
+    template = f"{shlex.quote(sys.executable)} {shlex.quote(STUB)} {{runs}} -o {{output_dir}} --seconds 0"
+
+    async def test(service):
+        worker = asyncio.create_task(service.worker())
+        server = await asyncio.start_server(service.handle, run_service.HOST, 0)
+        port = server.sockets[0].getsockname()[1]
+        try:
+            status, response = await http(port, "POST", "/runs", VALID)
+            assert status == 202
+            for _ in range(200):
+                _, job = await http(port, "GET", response["url"])
+                if job["status"] in ("done", "failed"):
+                    return job
+                await asyncio.sleep(0.05)
+        finally:
+            worker.cancel()
+            server.close()
+
+    job = with_service(tmp_path, test, template=template)
+    assert job["status"] == "done" and job["returncode"] == 0
+    assert job["output"] == str(tmp_path / f"{job['id']}.blend")
+    assert job["points"] == len(json.loads(VALID)["normPoints"])
@@ -0,0 +1,57 @@
+import numpy as np
+import pytest
+
+import run_loader as loader
+from conftest import TEST_RUN, Z_SCALE
+from run_track import RunTrack, as_point_array
+
+
+@pytest.fixture(scope="module")
+def reference():
+    """The original json.load lists, for the per-point loops the statistics replaced."""
+    return loader.load_run_json(TEST_RUN, Z_SCALE)
+
+
+def test_columns_match_lists(test_track, reference):
+    np.testing.assert_array_equal(test_track.points, np.array(reference["points"]))
+    np.testing.assert_array_equal(test_track.hr, reference["hr_widths"])
+    np.testing.assert_array_equal(test_track.pace, reference["paces"])
+    assert as_point_array(loader.load_run_streaming(TEST_RUN, Z_SCALE)["points"]).tolist() == \
+        [list(point) for point in reference["points"]]
+
+
+def test_statistics_match_loops(test_track, reference):
+    altitudes = reference["altitudes"]
+    gain = sum(max(b - a, 0) for a, b in zip(altitudes, altitudes[1:]))
+    assert test_track.total_gain == pytest.approx(gain)
+    assert test_track.highest_point == max(point[1] for point in reference["points"])
+    assert test_track.avg_pace == pytest.approx(1 / (sum(reference["paces"]) / len(reference["paces"])))
+    low, high = test_track.bounding_box
+    np.testing.assert_array_equal(low, np.min(reference["points"], axis=0))
+    np.testing.assert_array_equal(high, np.max(reference["points"], axis=0))
+
+
+def test_arc_length():
+    points = np.array([[0, 0, 0], [3, 0, 4], [3, 0, 4], [3, 2, 4]], dtype=float)
+    track = RunTrack(points, np.zeros(4), np.ones(4), np.zeros(4), np.ones(4))
+    np.testing.assert_allclose(track.arc_length, [0, 5, 5, 7])
+    np.testing.assert_allclose(track.cumulative_distance, [1, 2, 3, 4])
+
+
+def test_take_keeps_columns_aligned(test_track):
+    subset = test_track.take(np.arange(0, len(test_track), 3))
+    np.testing.assert_array_equal(subset.points, test_track.points[::3])
+    np.testing.assert_array_equal(subset.pace, test_track.pace[::3])
+    assert subset.z_scale == test_track.z_scale
+
+
+def test_rejects_misaligned_columns():
+    with pytest.raises(ValueError):
+        RunTrack(np.zeros((3, 3)), np.zeros(2), np.zeros(3), np.zeros(3), np.zeros(3))
+
+
+def test_empty_track_statistics():
+    track = RunTrack(np.empty((0, 3)), [], [], [], [])
+    with pytest.raises(ValueError):
+        track.highest_point
+    assert track.total_gain == 0
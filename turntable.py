@@ -0,0 +1,176 @@
+# Turntable renders of a built StraViz model, run inside Blender.
+#
+# Render frames 1-30 of a 120-frame orbit with the preview preset:
+#   blender -b models/myRun.blend -t 4 -P turntable.py -- --preset preview --frames 120 --start 1 --end 30 -o renders/myRun
+# Encode rendered frames into a video (when ffmpeg is not available):
+#   blender -b -P turntable.py -- --encode renders/myRun -o renders/myRun.mp4 --fps 24
+#
+# The camera orbit is driven by the frame number rather than keyframes, so any process that
+# opens the same file renders exactly the same camera for a frame. That lets render_farm.py
+# split one video's frame range across several Blender processes.
+
+import argparse
+import os
+import sys
+
+import bpy
+
+script_dir = os.path.dirname(os.path.abspath(__file__))
+if script_dir not in sys.path:
+    sys.path.append(script_dir)
+
+import run_lod
+import scene_data
+
+PIVOT_NAME = "TurntablePivot"
+CAMERA_NAME = "TurntableCamera"
+FRAME_PATTERN = "frame_####"   # Blender replaces #### with the zero-padded frame number
+FRAME_FORMAT = "frame_{:04d}.png"
+
+# Eevee was renamed while it was rewritten (4.2 - 4.4).
+EEVEE = 'BLENDER_EEVEE_NEXT' if (4, 2, 0) <= bpy.app.version < (5, 0, 0) else 'BLENDER_EEVEE'
+
+PRESETS = {
+    # Fast look at the orbit and the glass: few samples, cleaned up by the denoiser.
+    "preview": {"engine": 'CYCLES', "samples": 16, "denoise": True, "resolution_percentage": 50},
+    # Rasterized, fastest, but the glass refraction is only approximated.
+    "eevee": {"engine": EEVEE, "samples": 16, "denoise": False, "resolution_percentage": 50},
+    # Full quality Cycles for the published video.
+    "final": {"engine": 'CYCLES', "samples": 512, "denoise": True, "resolution_percentage": 100},
+}
+
+
+def apply_preset(scene, name):
+    """Sets the render engine, samples, denoising and resolution of a preset on the scene."""
+    if name not in PRESETS:
+        raise ValueError(f"Unknown render preset '{name}', use one of {', '.join(PRESETS)}.")
+    preset = PRESETS[name]
+    render = scene.render
+    render.engine = preset["engine"]
+    render.resolution_x, render.resolution_y = 1920, 1080
+    render.resolution_percentage = preset["resolution_percentage"]
+    if preset["engine"] == 'CYCLES':
+        scene.cycles.samples = preset["samples"]
+        scene.cycles.use_denoising = preset["denoise"]
+        # Only the camera moves between frames, so the scene is synced and its BVH built once.
+        render.use_persistent_data = True
+    else:
+        scene.eevee.taa_render_samples = preset["samples"]
+    print(f"Render preset '{name}': {preset}")
+
+
+def setup_turntable(scene, frames=120, radius=140.0, height=90.0, lens=50.0):
+    """
+    Adds a camera orbiting the platform centre once every `frames` frames, looking at it, and
+    makes it the scene camera. Frames 1..frames make a seamless loop. Data API only; an existing
+    turntable in the file is reused.
+
+    Returns:
+        bpy.types.Object: The camera.
+    """
+    camera = bpy.data.objects.get(CAMERA_NAME)
+    pivot = bpy.data.objects.get(PIVOT_NAME)
+    if pivot is None:
+        pivot = scene_data.link(bpy.data.objects.new(name=PIVOT_NAME, object_data=None), scene.collection)
+    if camera is None:
+        camera_data = bpy.data.cameras.new(name=CAMERA_NAME)
+        camera = scene_data.link(bpy.data.objects.new(name=CAMERA_NAME, object_data=camera_data), scene.collection)
+    camera.data.lens = lens
+    camera.parent = pivot
+    camera.location = (0.0, -radius, height)
+    if not camera.constraints:
+        track = camera.constraints.new(type='TRACK_TO')
+        track.target = pivot
+        track.track_axis = 'TRACK_NEGATIVE_Z'
+        track.up_axis = 'UP_Y'
+
+    # A driver on the frame number: every frame's angle is known without evaluating keyframes.
+    pivot.driver_remove("rotation_euler", 2)
+    driver = pivot.driver_add("rotation_euler", 2).driver
+    driver.type = 'SCRIPTED'
+    driver.expression = f"2 * pi * (frame - 1) / {frames}"
+
+    if scene.world is None:
+        # Something for the glass to refract when the file has no world yet.
+        scene.world = bpy.data.worlds.new(name="TurntableWorld")
+        scene.world.color = (0.05, 0.05, 0.06)
+    scene.camera = camera
+    scene.frame_start, scene.frame_end = 1, frames
+    print(f"Turntable: {frames} frames, radius {radius}, height {height}")
+    return camera
+
+
+def render_frames(scene, start, end, output_dir):
+    """
+    Renders frames start..end as PNGs in output_dir (frame_0001.png, ...). Frames already on
+    disk are skipped, so a retried worker only renders what is missing. Run objects with LOD
+    proxies (run_lod.py) render their full mesh.
+    """
+    # The run_lod render handlers are not saved in the file, so swap the full meshes in here.
+    run_lod.show_render_meshes()
+    scene.frame_start, scene.frame_end = start, end
+    render = scene.render
+    render.filepath = os.path.join(os.path.abspath(output_dir), FRAME_PATTERN)
+    render.image_settings.file_format = 'PNG'
+    render.use_file_extension = True
+    render.use_overwrite = False
+    # Rendering has no data-API equivalent; in background mode the operator needs no window.
+    bpy.ops.render.render(animation=True, scene=scene.name)
+
+
+def encode_video(frames_dir, output_path, fps=24):
+    """Encodes the frame_*.png files of frames_dir into an H.264 video with the sequencer."""
+    files = sorted(name for name in os.listdir(frames_dir) if name.startswith("frame_") and name.endswith(".png"))
+    if not files:
+        raise ValueError(f"No frames in {frames_dir}.")
+    scene = bpy.data.scenes.new(name="TurntableVideo")
+    editor = scene.sequence_editor_create()
+    # Blender 5 renamed sequences to strips.
+    strips = editor.strips if hasattr(editor, "strips") else editor.sequences
+    strip = strips.new_image(name="Frames", filepath=os.path.join(frames_dir, files[0]), channel=1, frame_start=1)
+    for name in files[1:]:
+        strip.elements.append(name)
+    image = bpy.data.images.load(os.path.join(frames_dir, files[0]))
+    scene.render.resolution_x, scene.render.resolution_y = image.size
+    scene.render.resolution_percentage = 100
+    bpy.data.images.remove(image)
+
+    scene.frame_start, scene.frame_end = 1, len(files)
+    scene.render.fps = fps
+    scene.render.image_settings.file_format = 'FFMPEG'
+    scene.render.ffmpeg.format = 'MPEG4'
+    scene.render.ffmpeg.codec = 'H264'
+    scene.render.filepath = os.path.abspath(output_path)
+    scene.render.use_file_extension = False
+    bpy.ops.render.render(animation=True, scene=scene.name)
+    print(f"Encoded {len(files)} frames to {output_path}")
+
+
+def main(argv):
+    parser = argparse.ArgumentParser(prog="blender -b model.blend -P turntable.py --",
+                                     description="Render a turntable of a StraViz model.")
+    parser.add_argument("-o", "--output", required=True, help="Frame directory, or the video file with --encode.")
+    parser.add_argument("--preset", default="preview", choices=sorted(PRESETS), help="Render preset.")
+    parser.add_argument("--frames", type=int, default=120, help="Frames per full orbit.")
+    parser.add_argument("--start", type=int, default=1, help="First frame to render.")
+    parser.add_argument("--end", type=int, default=None, help="Last frame to render (defaults to --frames).")
+    parser.add_argument("--encode", default=None, metavar="FRAMES_DIR",
+                        help="Encode the frames in FRAMES_DIR into the --output video instead of rendering.")
+    parser.add_argument("--fps", type=int, default=24, help="Frame rate of the video.")
+    args = parser.parse_args(argv)
+
+    if args.encode:
+        encode_video(args.encode, args.output, args.fps)
+        return 0
+    scene = bpy.context.scene
+    setup_turntable(scene, args.frames)
+    apply_preset(scene, args.preset)
+    os.makedirs(args.output, exist_ok=True)
+    render_frames(scene, args.start, args.end or args.frames, args.output)
+    return 0
+
+
+if __name__ == "__main__":
+    # Blender passes its own arguments first; ours follow "--".
+    argv = sys.argv[sys.argv.index("--") + 1:] if "--" in sys.argv else []
+    sys.exit(main(argv))